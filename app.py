@@ -1,18 +1,18 @@
 # app.py
+import json
 import logging
 import os
-import subprocess
-import sys
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
 
 
 # Import our core logic
-from core.fetch import fetch_page
-from core.router import route_and_solve
-from core.submit import find_submit_url, submit_answer
+from core import batch, http_client, jobs, llm_gateway, logstream, shared, startup, tracing
+from core.browser import pool
+from core.chain import solve_quiz_chain
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -22,14 +22,20 @@ load_dotenv()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Install Playwright browsers
-    logger.info("Checking Playwright browsers...")
-    try:
-        subprocess.run(["playwright", "install", "chromium"], check=True)
-        logger.info("Playwright browsers installed.")
-    except Exception as e:
-        logger.error(f"Failed to install browsers: {e}")
+    # Startup: HTTP client now; browser check/install, pool and LLM client warm up
+    # in the background (see /readyz). render-build.sh installs Chromium at build time.
+    await startup.state.start()
+    # Background workers that run quiz chains
+    await jobs.manager.start()
     yield
+    await jobs.manager.stop()
+    await startup.state.stop()
+    # Shutdown: close pooled contexts and the browser
+    await pool.stop()
+    await http_client.stop()
+    llm_gateway.stop()
+    await shared.get_backend().close()
+    logstream.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -42,75 +48,93 @@ class QuizRequest(BaseModel):
 class QuizResponse(BaseModel):
     status: str
     message: str = None
+    job_id: str = None
+
+class BatchRequest(BaseModel):
+    jobs: list[QuizRequest]
+    concurrency: int = None
 
 # Validation constants
 VALID_EMAIL = os.getenv("STUDENT_EMAIL")
 VALID_SECRET = os.getenv("STUDENT_SECRET")
+# Extra emails a batch may solve for (comma-separated), e.g. a class roster
+BATCH_EMAILS = {e.strip() for e in os.getenv("BATCH_EMAILS", "").split(",") if e.strip()}
+
+def _check_credentials(email: str, secret: str, allowed: set = frozenset()):
+    if email != VALID_EMAIL and email not in allowed:
+        raise HTTPException(status_code=403, detail="Invalid email")
+    if secret != VALID_SECRET:
+        raise HTTPException(status_code=403, detail="Invalid secret")
 
 @app.post("/solve")
 async def solve_quiz(request: QuizRequest) -> QuizResponse:
     # 1. Validate credentials
-    if request.email != VALID_EMAIL:
-        raise HTTPException(status_code=403, detail="Invalid email")
-    if request.secret != VALID_SECRET:
-        raise HTTPException(status_code=403, detail="Invalid secret")
-    
+    _check_credentials(request.email, request.secret)
+
     try:
-        # 2. Start the solver chain
-        await solve_quiz_chain(request.url, request.email, request.secret)
-        return QuizResponse(status="success")
+        # 2. Queue the solver chain; progress is at /jobs/{job_id}
+        job = jobs.manager.submit(solve_quiz_chain, request.url, request.email, request.secret, url=request.url)
+        return QuizResponse(status="accepted", job_id=job.id)
+    except jobs.QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Global error in /solve: {e}", exc_info=True)
         return QuizResponse(status="error", message=str(e))
 
-async def solve_quiz_chain(initial_url: str, email: str, secret: str):
-    current_url = initial_url
-    attempt = 0
-    max_attempts = 15  # Safety limit to prevent infinite loops
-    
-    while current_url and attempt < max_attempts:
-        attempt += 1
-        logger.info(f"\n{'='*40}\n[QUIZ {attempt}] {current_url}\n{'='*40}")
-        
-        # A. Fetch the page (rendered JS)
-        page_data = await fetch_page(current_url)
-        if not page_data:
-            logger.error(f"Failed to fetch page: {current_url}")
-            break
-        
-        question = page_data["question"]
-        logger.info(f"Question Preview: {question[:200]}...")
-        
-        # B. Find where to submit
-        submit_url = find_submit_url(question, page_data["html"], current_url)
-        if not submit_url:
-            # Fallback: assume /submit relative to current
-            base = current_url.split('?')[0]
-            if '/' in base:
-                # heuristic: strip last segment and add 'submit' or similar?
-                # Safer default: domain + /submit
-                # But let's log error for now
-                logger.warning("No explicit submit URL found, guessing...")
-        
-        logger.info(f"Submit URL: {submit_url}")
-        
-        # C. Route to correct handler and solve
-        answer = await route_and_solve(question, current_url, page_data, email)
-        logger.info(f"Calculated Answer: {answer}")
-        
-        # D. Submit the answer
-        resp = await submit_answer(email, secret, current_url, answer, submit_url)
-        logger.info(f"Server Response: Correct={resp.get('correct')}, Msg={resp.get('reason')}")
-        
-        # E. Handle next step
-        if resp.get("correct"):
-            current_url = resp.get("url")
-            if not current_url:
-                logger.info("✅ QUIZ CHAIN COMPLETE! All steps solved.")
-                break
-        else:
-            # If wrong, check if we got a retry URL or just stop
-            current_url = resp.get("url")
-            if not current_url:
-                logger.error("❌ Failed step with no retry URL. Stopping.")
-                break
+@app.post("/solve/batch")
+async def solve_batch(request: BatchRequest):
+    """Run every job on a bounded worker pool; streams one JSON line per finished chain, then a summary."""
+    if not request.jobs:
+        raise HTTPException(status_code=400, detail="No jobs")
+    if len(request.jobs) > batch.MAX_JOBS:
+        raise HTTPException(status_code=413, detail=f"At most {batch.MAX_JOBS} jobs per batch")
+    for job in request.jobs:
+        _check_credentials(job.email, job.secret, BATCH_EMAILS)
+
+    async def stream():
+        async for record in batch.run_batch([job.model_dump() for job in request.jobs],
+                                            request.concurrency or batch.CONCURRENCY):
+            yield json.dumps(record, default=str) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> dict:
+    job = jobs.manager.get(job_id)
+    if job is not None:
+        return job.to_dict()
+    # Possibly running on another worker
+    snapshot = await shared.load_job(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    snapshot.pop("events", None)
+    snapshot.pop("event_count", None)
+    return snapshot
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    job = jobs.manager.get(job_id)
+    if job is not None:
+        stream = jobs.sse_stream(job)
+    elif await shared.load_job(job_id) is not None:
+        stream = jobs.sse_remote(job_id)
+    else:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return StreamingResponse(stream, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(tracing.metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/healthz")
+async def healthz():
+    # Liveness: the process is up and serving
+    return {"status": "ok", "uptime_s": startup.state.report()["uptime_s"]}
+
+@app.get("/readyz")
+async def readyz():
+    # Readiness: background warm-up (browser, LLM client, heavy imports) has finished and passed
+    report = startup.state.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
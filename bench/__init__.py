@@ -0,0 +1,9 @@
+"""
+Offline replay harness and benchmarks.
+
+    python -m bench.run --sizes 1000,10000,100000 --concurrency 1,4,16 --out bench.json
+
+Everything runs in-process: quiz pages, assets and /submit are served by
+bench.quiz_server through an ASGI transport, the LLM and transcription use
+their mock/fixture backends, and caches live in a throwaway directory.
+"""
@@ -0,0 +1,112 @@
+"""
+Batch benchmark: core.batch.run_batch over the same chains at growing pool
+sizes, against the local quiz-server stand-in. Every chain walks the same
+pages, so the report also shows how many page fetches the pool shared.
+Exits non-zero when any step is answered wrong or any job fails.
+
+    python -m bench.batch --concurrency 1,4,16 --jobs 32 --out batch.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+# Sets up the offline environment before any core module reads its settings
+from bench.run import WORKDIR, Scenario, fresh_caches  # noqa: E402
+from bench import fixtures  # noqa: E402
+from bench.quiz_server import QuizServer  # noqa: E402
+from core import batch, http_client, llm_gateway, logstream, transcribe  # noqa: E402
+
+logger = logging.getLogger("bench")
+
+
+async def run_level(start_url: str, jobs: int, concurrency: int) -> dict:
+    """Fresh caches, `jobs` chains through one batch; its summary plus time to first result."""
+    fresh_caches()
+    batch_jobs = [{"email": fixtures.email(n), "secret": "bench-secret", "url": start_url} for n in range(jobs)]
+    first_result, summary = None, None
+    t0 = time.perf_counter()
+    async for record in batch.run_batch(batch_jobs, concurrency):
+        if record["type"] == "summary":
+            summary = record
+        elif first_result is None:
+            first_result = round((time.perf_counter() - t0) * 1000, 1)
+    summary["first_result_ms"] = first_result
+    logger.info(f"concurrency={concurrency}: {summary['chains_per_s']} chains/s, fetches {summary['page_fetches']}")
+    return summary
+
+
+async def run(args) -> list:
+    server = QuizServer()
+    fixture_dir = os.path.join(WORKDIR, "transcripts-fixtures")
+    os.makedirs(fixture_dir, exist_ok=True)
+    scenario = Scenario(server, fixture_dir)
+    start_url = scenario.chain("batch", args.chain_steps, args.chain_size)
+    llm_gateway.set_backend(llm_gateway.MockBackend(
+        reply=lambda messages: server.scripted_reply(messages[-1]["content"]) or "0",
+        delay=args.llm_delay,
+    ))
+    transcribe.set_backend(transcribe.FixtureBackend(directory=fixture_dir))
+
+    with http_client.override(transport=server.transport()) as client:
+        try:
+            return [await run_level(start_url, args.jobs, c) for c in args.concurrency]
+        finally:
+            await client.aclose()
+            logstream.shutdown()
+
+
+def _csv_list(cast):
+    return lambda raw: [cast(x) for x in raw.split(",") if x.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=_csv_list(int), default=[1, 4, 16], help="pool sizes to compare")
+    parser.add_argument("--jobs", type=int, default=32, help="chains per batch")
+    parser.add_argument("--chain-steps", type=_csv_list(str), default=["csv_sum", "image_color", "logs_zip", "llm"])
+    parser.add_argument("--chain-size", type=int, default=10000)
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="simulated LLM latency in seconds")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+    logger.setLevel(logging.INFO)
+
+    # Handlers print progress; keep stdout for the JSON document
+    with contextlib.redirect_stdout(sys.stderr):
+        levels = asyncio.run(run(args))
+    # Throughput relative to the first pool size
+    first = levels[0]["chains_per_s"] if levels else 0
+    for level in levels:
+        level["speedup"] = round(level["chains_per_s"] / first, 2) if first else None
+
+    document = json.dumps({
+        "levels": levels,
+        "meta": {
+            "time": time.time(), "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "args": {k: v for k, v in vars(args).items() if k != "out"},
+        },
+    }, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(document + "\n")
+    else:
+        print(document)
+
+    # Every scripted step has a known answer, so any miss is a failure
+    failures = [f"concurrency={r['concurrency']}: {r['correct_steps']}/{r['steps']} steps correct, {r['failed']} failed jobs"
+                for r in levels if r["failed"] or r["correct_steps"] < r["steps"]]
+    for line in failures:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
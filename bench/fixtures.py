@@ -0,0 +1,77 @@
+import io
+import json
+import random
+import zipfile
+from PIL import Image
+
+
+def email(n: int) -> str:
+    return f"b{n:06d}@bench.local"
+
+
+# Every synthetic email has this length, so logs answers (total + len(email) % 5) are predictable
+EMAIL_LENGTH = len(email(0))
+
+
+def csv_data(rows: int, cutoff: int, seed: int = 0) -> tuple:
+    """(csv bytes, sum of every numeric cell above `cutoff`), as csv_sum computes it."""
+    rng = random.Random(seed)
+    lines = ["id,value,label"]
+    total = 0
+    for i in range(1, rows + 1):
+        value = rng.randint(0, 1000)
+        lines.append(f"{i},{value},item {i % 97}")
+        total += (i if i > cutoff else 0) + (value if value > cutoff else 0)
+    return ("\n".join(lines) + "\n").encode(), total
+
+
+def image_data(side: int, seed: int = 0) -> tuple:
+    """(png bytes, dominant color hex): a flat background with smaller noisy patches."""
+    rng = random.Random(seed)
+    background = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+    img = Image.new("RGB", (side, side), background)
+    pixels = img.load()
+    # Under half the pixels get other colors, so the background stays dominant
+    for _ in range(side * side // 3):
+        pixels[rng.randrange(side), rng.randrange(side)] = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue(), "#{:02x}{:02x}{:02x}".format(*background)
+
+
+def logs_zip(lines: int, seed: int = 0) -> tuple:
+    """(zip bytes, total download bytes + len(email) % 5) for a zipped JSONL log."""
+    rng = random.Random(seed)
+    total = 0
+    out = []
+    for i in range(lines):
+        event = "download" if rng.random() < 0.5 else rng.choice(("view", "upload", "login"))
+        size = rng.randint(0, 100000)
+        if event == "download":
+            total += size
+        out.append(json.dumps({"ts": i, "event": event, "bytes": size, "user": f"u{i % 50}"}))
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("logs.jsonl", "\n".join(out) + "\n")
+    return buf.getvalue(), str(total + EMAIL_LENGTH % 5)
+
+
+def audio_data(size: int, seed: int = 0) -> bytes:
+    """Opaque clip bytes; the fixture transcription backend maps them to text by hash."""
+    return random.Random(seed).randbytes(size)
+
+
+def question_text(words: int, seed: int = 0) -> str:
+    """Filler prose with a few URLs and numbers, for the extraction/routing micro-benchmarks."""
+    rng = random.Random(seed)
+    vocab = ["the", "data", "page", "value", "file", "column", "answer", "please", "compute", "report"]
+    parts = []
+    for i in range(words):
+        r = rng.random()
+        if r < 0.01:
+            parts.append(f"/bench/file{i}.csv")
+        elif r < 0.02:
+            parts.append(f"limit {rng.randint(0, 999)}")
+        else:
+            parts.append(rng.choice(vocab))
+    return " ".join(parts)
@@ -0,0 +1,95 @@
+import html
+import re
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+
+BASE_URL = "http://quiz.bench"
+
+CONTENT_TYPES = {
+    "csv": "text/csv", "png": "image/png", "zip": "application/zip", "json": "application/json",
+    "opus": "audio/ogg", "mp3": "audio/mpeg", "txt": "text/plain",
+}
+
+_MARKER = re.compile(r"\[\[bench:(\w+)\]\]")
+
+
+class QuizServer:
+    """
+    Stand-in for the quiz host: static pages, assets, and a /submit endpoint
+    that walks scripted chains. Talk to it through `http_client.override(transport=server.transport())`.
+    """
+
+    def __init__(self):
+        self.pages = {}    # path -> (question, expected answer, next path or None)
+        self.assets = {}   # path -> bytes
+        self.submissions = []
+        self.llm_replies = {}  # marker -> what the mock LLM answers for questions carrying it
+        self.app = self._build_app()
+
+    # --- scripting -----------------------------------------------------
+    def add_asset(self, path: str, data: bytes) -> str:
+        self.assets[path] = data
+        return path
+
+    def add_page(self, path: str, question: str, expected: str, next_path: str = None) -> str:
+        self.pages[path] = (question, str(expected), next_path)
+        return f"{BASE_URL}{path}"
+
+    def add_chain(self, name: str, steps: list) -> str:
+        """`steps` is [(question, expected)]; returns the first page URL."""
+        paths = [f"/quiz/{name}/{i}" for i in range(len(steps))]
+        for i, (question, expected) in enumerate(steps):
+            self.add_page(paths[i], question, expected, paths[i + 1] if i + 1 < len(paths) else None)
+        return f"{BASE_URL}{paths[0]}"
+
+    def scripted_reply(self, text: str):
+        """Mock LLM reply for the [[bench:<marker>]] in `text`, if any."""
+        m = _MARKER.search(text)
+        return self.llm_replies.get(m.group(1)) if m else None
+
+    def transport(self) -> httpx.ASGITransport:
+        return httpx.ASGITransport(app=self.app)
+
+    # --- app -------------------------------------------------------------
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/quiz/{rest:path}")
+        async def page(rest: str):
+            entry = self.pages.get(f"/quiz/{rest}")
+            if entry is None:
+                return Response(status_code=404)
+            # Static markup (no <script>), so the fetcher never needs a browser
+            body = (
+                f"<html><body><div id=\"result\"><p>{html.escape(entry[0])}</p>"
+                f"<p>Post your answer to {BASE_URL}/submit</p></div></body></html>"
+            )
+            return HTMLResponse(body)
+
+        @app.get("/bench/{rest:path}")
+        async def asset(rest: str):
+            data = self.assets.get(f"/bench/{rest}")
+            if data is None:
+                return Response(status_code=404)
+            ext = rest.rsplit(".", 1)[-1].lower()
+            return Response(data, media_type=CONTENT_TYPES.get(ext, "application/octet-stream"),
+                            headers={"ETag": f"\"{hash(data) & 0xffffffff:x}\""})
+
+        @app.post("/submit")
+        async def submit(request: Request):
+            payload = await request.json()
+            path = payload.get("url", "").removeprefix(BASE_URL)
+            entry = self.pages.get(path)
+            if entry is None:
+                return JSONResponse({"correct": False, "reason": "unknown quiz url"}, status_code=400)
+            _, expected, next_path = entry
+            correct = str(payload.get("answer")).strip() == expected
+            self.submissions.append({"url": path, "answer": payload.get("answer"), "correct": correct})
+            return {
+                "correct": correct,
+                "reason": None if correct else f"expected {expected!r}",
+                "url": f"{BASE_URL}{next_path}" if next_path else None,
+            }
+
+        return app
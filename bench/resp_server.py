@@ -0,0 +1,141 @@
+"""
+In-process stand-in for a Redis server: just enough of RESP2 for
+core.shared.RespBackend (PING, GET, SET with EX/PX/NX/XX, DEL, EXISTS,
+SELECT, AUTH, FLUSHDB).
+
+    python -m bench.resp_server --port 6399
+    SHARED_STATE=redis://127.0.0.1:6399/0 uvicorn app:app --workers 4
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RespServer:
+    def __init__(self):
+        self.data = {}  # key -> (value bytes, expires_at or None)
+        self.commands = 0
+        self._server = None
+
+    # --- storage ---------------------------------------------------------
+    def _get(self, key):
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def execute(self, args: list):
+        """Reply (bytes, int, str, None, or an Exception) for one command."""
+        self.commands += 1
+        name, args = args[0].upper().decode(), args[1:]
+        if name == "PING":
+            return "PONG"
+        if name in ("SELECT", "AUTH"):
+            return "OK"
+        if name == "FLUSHDB":
+            self.data.clear()
+            return "OK"
+        if name == "GET":
+            return self._get(args[0])
+        if name == "EXISTS":
+            return sum(self._get(k) is not None for k in args)
+        if name == "DEL":
+            found = sum(self._get(k) is not None for k in args)
+            for k in args:
+                self.data.pop(k, None)
+            return found
+        if name == "SET":
+            key, value, options = args[0], args[1], [a.upper().decode() for a in args[2:]]
+            expires_at = None
+            for i, option in enumerate(options):
+                if option in ("EX", "PX"):
+                    seconds = float(args[2 + i + 1]) / (1000 if option == "PX" else 1)
+                    expires_at = time.monotonic() + seconds
+            exists = self._get(key) is not None
+            if ("NX" in options and exists) or ("XX" in options and not exists):
+                return None
+            self.data[key] = (value, expires_at)
+            return "OK"
+        return ValueError(f"ERR unknown command '{name}'")
+
+    # --- protocol ----------------------------------------------------------
+    @staticmethod
+    def _encode(reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return f"-{reply}\r\n".encode()
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, str):
+            return f"+{reply}\r\n".encode()
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+    async def _read_command(self, reader) -> list:
+        line = (await reader.readuntil(b"\r\n"))[:-2]
+        if not line.startswith(b"*"):
+            # Inline command (e.g. typed into telnet)
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    async def _client(self, reader, writer):
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if not args:
+                    continue
+                if args[0].upper() == b"QUIT":
+                    writer.write(b"+OK\r\n")
+                    break
+                writer.write(self._encode(self.execute(args)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Listen on `port` (0 picks a free one); returns the bound port."""
+        self._server = await asyncio.start_server(self._client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+async def _serve(host: str, port: int):
+    server = RespServer()
+    port = await server.start(host, port)
+    logger.info(f"RESP stand-in listening on {host}:{port}")
+    await asyncio.Event().wait()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6399)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
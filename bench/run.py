@@ -0,0 +1,330 @@
+"""
+Benchmark runner: individual handlers at growing input sizes (cold and warm
+caches), then whole chains at growing concurrency. Writes one JSON document;
+with --baseline, exits non-zero when a p95 (or chain throughput) regresses
+by more than --tolerance, or when any answer that was right is now wrong.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+# Configure the app for offline use before any core module reads its settings
+WORKDIR = tempfile.mkdtemp(prefix="quiz-bench-")
+os.environ.setdefault("CACHE_DIR", os.path.join(WORKDIR, "cache"))
+os.environ.setdefault("LLM_BACKEND", "mock")
+os.environ.setdefault("TRANSCRIBE_BACKEND", "fixture")
+os.environ.setdefault("FETCH_STRATEGIES", "http")
+os.environ.setdefault("LLM_RPM", "1000000")
+os.environ.setdefault("LLM_CONCURRENCY", "64")
+
+from bench import fixtures  # noqa: E402
+from bench.quiz_server import BASE_URL, QuizServer  # noqa: E402
+from core import answers, assets, codegen, extract, http_client, llm_gateway, logstream, router, shared, transcribe  # noqa: E402
+from core.chain import solve_quiz_chain  # noqa: E402
+
+logger = logging.getLogger("bench")
+
+CUTOFF = 500
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies_ms: list) -> dict:
+    return {
+        "n": len(latencies_ms),
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+def peak_rss() -> dict:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+_round = 0
+
+
+def fresh_caches():
+    """Point the asset cache, transcript cache, answer memo, program cache and shared state at empty directories."""
+    global _round
+    _round += 1
+    root = os.path.join(WORKDIR, f"round{_round}")
+    assets.cache = assets.AssetCache(os.path.join(root, "assets"))
+    transcribe.CACHE_DIR = os.path.join(root, "transcripts")
+    answers.store = answers.AnswerStore(os.path.join(root, "answers.sqlite"))
+    codegen.store = codegen.ProgramStore(os.path.join(root, "programs.sqlite"))
+    shared.set_backend(shared.SQLiteBackend(os.path.join(root, "shared.sqlite")))
+
+
+# ----------------------------------------------------------------------
+# Scenario: assets and questions on the stand-in server
+# ----------------------------------------------------------------------
+class Scenario:
+    def __init__(self, server: QuizServer, fixture_dir: str):
+        self.server = server
+        self.fixture_dir = fixture_dir
+        self._n = 0
+
+    def case(self, kind: str, size: int) -> tuple:
+        """(solver name, question, expected answer or check callable) for `kind` at `size`."""
+        s = self.server
+        if kind == "csv_sum":
+            data, total = fixtures.csv_data(size, CUTOFF, seed=size)
+            path = s.add_asset(f"/bench/sum-{size}.csv", data)
+            return kind, f"Download {path}. Sum every value above the cutoff. Cutoff: {CUTOFF}", str(total)
+        if kind == "csv_normalize":
+            data, _ = fixtures.csv_data(size, CUTOFF, seed=size)
+            path = s.add_asset(f"/bench/norm-{size}.csv", data)
+            return kind, f"Normalize {path} to JSON with snake_case keys, sorted by id.", \
+                lambda answer: len(json.loads(answer)) == size
+        if kind == "image_color":
+            side = max(8, int(math.sqrt(size)))
+            data, dominant = fixtures.image_data(side, seed=size)
+            path = s.add_asset(f"/bench/heatmap-{size}.png", data)
+            return kind, f"What is the most frequent color in the heatmap {path}?", dominant
+        if kind == "logs_zip":
+            data, expected = fixtures.logs_zip(size, seed=size)
+            path = s.add_asset(f"/bench/logs-{size}.zip", data)
+            return kind, f"Download {path} and sum the bytes of all download events in the logs.", expected
+        if kind == "audio":
+            data = fixtures.audio_data(size, seed=size)
+            path = s.add_asset(f"/bench/clip-{size}.opus", data)
+            text = f"bench passphrase {size}"
+            with open(os.path.join(self.fixture_dir, hashlib.sha256(data).hexdigest() + ".txt"), "w") as f:
+                f.write(text)
+            return kind, f"Listen to the audio {path} and enter the passphrase.", text
+        if kind == "llm":
+            self._n += 1
+            marker = f"q{self._n}"
+            question = f"{fixtures.question_text(max(1, size // 100), seed=size)} [[bench:{marker}]]"
+            s.llm_replies[marker] = f"answer-{marker}"
+            return kind, question, s.llm_replies[marker]
+        raise ValueError(f"Unknown case kind: {kind}")
+
+    def chain(self, name: str, kinds: list, size: int) -> str:
+        steps = []
+        for kind in kinds:
+            _, question, expected = self.case(kind, size)
+            steps.append((question, expected if isinstance(expected, str) else ""))
+        return self.server.add_chain(name, steps)
+
+
+def _solver(name: str):
+    if name == router.fallback.name:
+        return router.fallback
+    return next(s for s in router.registry.solvers if s.name == name)
+
+
+def _correct(answer, expected) -> bool:
+    try:
+        return expected(answer) if callable(expected) else str(answer).strip() == expected
+    except Exception:
+        return False
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+async def bench_handler(scenario: Scenario, kind: str, size: int, repeat: int) -> list:
+    name, question, expected = scenario.case(kind, size)
+    page_url = f"{BASE_URL}/quiz/bench"
+    page_data = {"question": question, "html": "", "index": extract.build_index(page_url, question)}
+    solver = _solver(name)
+    results = []
+    for mode in ("cold", "warm"):
+        latencies, wrong = [], 0
+        fresh_caches()
+        for _ in range(repeat):
+            if mode == "cold":
+                fresh_caches()
+            t0 = time.perf_counter()
+            answer = await solver.solve(question, page_url, page_data, fixtures.email(0))
+            latencies.append((time.perf_counter() - t0) * 1000)
+            wrong += not _correct(answer, expected)
+        results.append({"name": kind, "size": size, "mode": mode, **summarize(latencies), "wrong": wrong})
+        logger.info(f"{kind} size={size} {mode}: {results[-1]}")
+    return results
+
+
+def bench_micro(size: int, repeat: int) -> list:
+    """Pure-CPU hot paths: page extraction and router scoring over growing question text."""
+    question = fixtures.question_text(size, seed=size)
+    page_url = f"{BASE_URL}/quiz/bench"
+    results = []
+    for name, fn in (("extract", lambda: extract.build_index(page_url, question)),
+                     ("route_score", lambda: router.registry.score(question))):
+        latencies = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            latencies.append((time.perf_counter() - t0) * 1000)
+        results.append({"name": name, "size": size, "mode": "cpu", **summarize(latencies), "wrong": 0})
+    return results
+
+
+async def bench_chains(scenario: Scenario, kinds: list, size: int, concurrency: int, chains: int) -> dict:
+    start_url = scenario.chain(f"c{concurrency}", kinds, size)
+    fresh_caches()
+    sem = asyncio.Semaphore(concurrency)
+    latencies, correct_steps, total_steps = [], 0, 0
+
+    async def one(n: int):
+        nonlocal correct_steps, total_steps
+        async with sem:
+            t0 = time.perf_counter()
+            steps = await solve_quiz_chain(start_url, fixtures.email(n), "bench-secret")
+            latencies.append((time.perf_counter() - t0) * 1000)
+            correct_steps += sum(1 for s in steps if s.get("correct"))
+            total_steps += len(steps)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(chains)))
+    wall = time.perf_counter() - t0
+    result = {
+        "steps": len(kinds), "size": size, "concurrency": concurrency, "chains": chains,
+        "wall_s": round(wall, 3), "chains_per_s": round(chains / wall, 3) if wall else 0.0,
+        **summarize(latencies), "correct_steps": correct_steps, "total_steps": total_steps,
+    }
+    logger.info(f"chains concurrency={concurrency}: {result}")
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    old = {(r["name"], r["size"], r["mode"]): r for r in baseline.get("handlers", [])}
+    for r in results["handlers"]:
+        b = old.get((r["name"], r["size"], r["mode"]))
+        if not b:
+            continue
+        # Correctness is not subject to the tolerance
+        if r["wrong"] > b.get("wrong", 0):
+            regressions.append(f"{r['name']} size={r['size']} {r['mode']}: wrong {b.get('wrong', 0)} -> {r['wrong']}")
+        if b["p95_ms"] > 0 and r["p95_ms"] > b["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{r['name']} size={r['size']} {r['mode']}: p95 {b['p95_ms']} -> {r['p95_ms']} ms")
+    old = {(r["steps"], r["concurrency"]): r for r in baseline.get("chains", [])}
+    for r in results["chains"]:
+        b = old.get((r["steps"], r["concurrency"]))
+        if not b:
+            continue
+        # As a share of steps, so runs with a different --chains still compare
+        if r["correct_steps"] * b["total_steps"] < b["correct_steps"] * r["total_steps"]:
+            regressions.append(
+                f"chains concurrency={r['concurrency']}: correct steps {b['correct_steps']}/{b['total_steps']}"
+                f" -> {r['correct_steps']}/{r['total_steps']}"
+            )
+        if r["chains_per_s"] < b["chains_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"chains concurrency={r['concurrency']}: {b['chains_per_s']} -> {r['chains_per_s']} chains/s"
+            )
+    return regressions
+
+
+async def run(args) -> dict:
+    server = QuizServer()
+    fixture_dir = os.path.join(WORKDIR, "transcripts-fixtures")
+    os.makedirs(fixture_dir, exist_ok=True)
+    scenario = Scenario(server, fixture_dir)
+    llm_gateway.set_backend(llm_gateway.MockBackend(
+        reply=lambda messages: server.scripted_reply(messages[-1]["content"]) or "0",
+        delay=args.llm_delay,
+    ))
+    transcribe.set_backend(transcribe.FixtureBackend(directory=fixture_dir))
+
+    results = {"handlers": [], "chains": [], "rss": {}}
+    with http_client.override(transport=server.transport()) as client:
+        try:
+            for size in args.sizes:
+                for kind in args.handlers:
+                    results["handlers"].extend(await bench_handler(scenario, kind, size, args.repeat))
+                results["handlers"].extend(bench_micro(size, args.repeat))
+                results["rss"][f"handlers_size_{size}"] = peak_rss()
+            for concurrency in args.concurrency:
+                chains = max(args.chains, concurrency)
+                results["chains"].append(
+                    await bench_chains(scenario, args.chain_steps, args.chain_size, concurrency, chains)
+                )
+            results["rss"]["chains"] = peak_rss()
+        finally:
+            await client.aclose()
+            logstream.shutdown()
+    return results
+
+
+def _csv_list(cast):
+    return lambda raw: [cast(x) for x in raw.split(",") if x.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=_csv_list(int), default=[1000, 10000, 100000],
+                        help="input sizes (rows / log lines / pixels / bytes)")
+    parser.add_argument("--handlers", type=_csv_list(str),
+                        default=["csv_sum", "csv_normalize", "image_color", "logs_zip", "audio", "llm"])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per handler, size and cache mode")
+    parser.add_argument("--concurrency", type=_csv_list(int), default=[1, 4, 16])
+    parser.add_argument("--chains", type=int, default=16, help="chains per concurrency level (at least the level)")
+    parser.add_argument("--chain-steps", type=_csv_list(str),
+                        default=["csv_sum", "image_color", "logs_zip", "audio", "llm"])
+    parser.add_argument("--chain-size", type=int, default=10000)
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="simulated LLM latency in seconds")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", help="previous JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+    logger.setLevel(logging.INFO)
+
+    # Handlers print progress; keep stdout for the JSON document
+    with contextlib.redirect_stdout(sys.stderr):
+        results = asyncio.run(run(args))
+    results["meta"] = {
+        "time": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+    }
+
+    document = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(document + "\n")
+    else:
+        print(document)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Worker scaling benchmark: the same batch of chains split across 1, 2, 4...
+worker processes that share one cache directory and one shared-state
+backend (SQLite file, or the RESP stand-in with --backend resp). Chains
+for the same email repeat (--distinct), so the report also shows how many
+steps were solved versus taken from another worker. Exits non-zero when
+any step is answered wrong.
+
+    python -m bench.scaling --workers 1,2,4 --chains 32 --distinct 16 --out scaling.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger("bench")
+
+
+# ----------------------------------------------------------------------
+# Worker process
+# ----------------------------------------------------------------------
+async def _work(index: int, workers: int, options: dict, level_dir: str, ready, go) -> dict:
+    # Imported here: the settings they read are only in the environment now
+    from bench import fixtures
+    from bench.quiz_server import QuizServer
+    from bench.run import Scenario
+    from core import http_client, llm_gateway, logstream, transcribe
+    from core.chain import solve_quiz_chain
+
+    server = QuizServer()
+    fixture_dir = os.path.join(level_dir, "transcripts-fixtures")
+    os.makedirs(fixture_dir, exist_ok=True)
+    # Every worker scripts the identical chain, so step inputs (and memo keys) match
+    scenario = Scenario(server, fixture_dir)
+    start_url = scenario.chain("scale", options["chain_steps"], options["chain_size"])
+    llm_gateway.set_backend(llm_gateway.MockBackend(
+        reply=lambda messages: server.scripted_reply(messages[-1]["content"]) or "0",
+        delay=options["llm_delay"],
+    ))
+    transcribe.set_backend(transcribe.FixtureBackend(directory=fixture_dir))
+
+    mine = [n for n in range(options["chains"]) if n % workers == index]
+    sem = asyncio.Semaphore(options["concurrency"])
+    counts = {"chains": 0, "steps": 0, "correct_steps": 0, "reused": 0, "deduped": 0}
+
+    async def one(n: int):
+        async with sem:
+            steps = await solve_quiz_chain(start_url, fixtures.email(n % options["distinct"]), "bench-secret")
+        counts["chains"] += 1
+        counts["steps"] += len(steps)
+        counts["correct_steps"] += sum(1 for s in steps if s.get("correct"))
+        counts["reused"] += sum(1 for s in steps if s.get("reused"))
+        counts["deduped"] += sum(1 for s in steps if s.get("deduped"))
+
+    with http_client.override(transport=server.transport()) as client:
+        try:
+            ready.put(index)
+            await asyncio.to_thread(go.wait)
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one(n) for n in mine))
+            busy = time.perf_counter() - t0
+        finally:
+            await client.aclose()
+            logstream.shutdown()
+    return {"worker": index, **counts, "busy_s": round(busy, 3)}
+
+
+def _worker_main(index, workers, options, level_dir, state_url, ready, results, go):
+    os.environ["CACHE_DIR"] = os.path.join(level_dir, "cache")
+    os.environ["SHARED_STATE"] = state_url
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    with contextlib.redirect_stdout(sys.stderr):
+        results.put(asyncio.run(_work(index, workers, options, level_dir, ready, go)))
+
+
+# ----------------------------------------------------------------------
+# Parent
+# ----------------------------------------------------------------------
+@contextlib.contextmanager
+def _resp_stand_in():
+    """bench.resp_server on its own thread; yields its redis:// URL."""
+    from bench.resp_server import RespServer
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = RespServer()
+    port = asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+    try:
+        yield f"redis://127.0.0.1:{port}/0"
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+
+@contextlib.contextmanager
+def _state_url(backend: str, level_dir: str):
+    if backend == "resp":
+        with _resp_stand_in() as url:
+            yield url
+    else:
+        yield f"sqlite:///{os.path.join(level_dir, 'shared.sqlite')}"
+
+
+def run_level(workers: int, options: dict, root: str, backend: str, timeout: float) -> dict:
+    """Fresh caches and shared state, `workers` processes, one timed batch of chains."""
+    level_dir = os.path.join(root, f"workers{workers}")
+    os.makedirs(level_dir, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    ready, results, go = ctx.Queue(), ctx.Queue(), ctx.Event()
+    with _state_url(backend, level_dir) as url:
+        procs = [
+            ctx.Process(target=_worker_main, args=(i, workers, options, level_dir, url, ready, results, go))
+            for i in range(workers)
+        ]
+        for p in procs:
+            p.start()
+        try:
+            # Imports and setup happen before the clock starts
+            for _ in procs:
+                ready.get(timeout=timeout)
+            t0 = time.perf_counter()
+            go.set()
+            per_worker = sorted((results.get(timeout=timeout) for _ in procs), key=lambda r: r["worker"])
+            wall = time.perf_counter() - t0
+        finally:
+            for p in procs:
+                p.join(timeout=10)
+                if p.is_alive():
+                    p.terminate()
+
+    totals = {k: sum(r[k] for r in per_worker) for k in ("chains", "steps", "correct_steps", "reused", "deduped")}
+    result = {
+        "workers": workers, "backend": backend, "wall_s": round(wall, 3),
+        "chains_per_s": round(totals["chains"] / wall, 3) if wall else 0.0,
+        **totals, "solved": totals["steps"] - totals["reused"] - totals["deduped"],
+        "per_worker": per_worker,
+    }
+    logger.info(f"workers={workers}: {result['chains_per_s']} chains/s, {result['solved']} solved")
+    return result
+
+
+def _csv_list(cast):
+    return lambda raw: [cast(x) for x in raw.split(",") if x.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=_csv_list(int), default=[1, 2, 4])
+    parser.add_argument("--chains", type=int, default=32, help="chains per level, split across the workers")
+    parser.add_argument("--distinct", type=int, default=16, help="distinct emails; the rest are repeats")
+    parser.add_argument("--concurrency", type=int, default=4, help="chains in flight per worker")
+    parser.add_argument("--chain-steps", type=_csv_list(str), default=["csv_sum", "image_color", "logs_zip", "llm"])
+    parser.add_argument("--chain-size", type=int, default=10000)
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="simulated LLM latency in seconds")
+    parser.add_argument("--backend", choices=("sqlite", "resp"), default="sqlite")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+    logger.setLevel(logging.INFO)
+
+    options = {
+        "chains": args.chains, "distinct": max(1, min(args.distinct, args.chains)),
+        "concurrency": args.concurrency, "chain_steps": args.chain_steps,
+        "chain_size": args.chain_size, "llm_delay": args.llm_delay,
+    }
+    root = tempfile.mkdtemp(prefix="quiz-scaling-")
+    levels = [run_level(n, options, root, args.backend, args.timeout) for n in args.workers]
+    # Relative to the first level: speedup in throughput, efficiency per worker
+    first = levels[0] if levels and levels[0]["chains_per_s"] else None
+    for level in levels:
+        speedup = level["chains_per_s"] / first["chains_per_s"] if first else None
+        level["speedup"] = round(speedup, 2) if first else None
+        level["efficiency"] = round(speedup * first["workers"] / level["workers"], 2) if first else None
+
+    document = json.dumps({
+        "levels": levels,
+        "meta": {
+            "time": time.time(), "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "args": {k: v for k, v in vars(args).items() if k != "out"},
+        },
+    }, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(document + "\n")
+    else:
+        print(document)
+
+    # Every scripted step has a known answer, so any miss is a failure
+    failures = [f"workers={r['workers']}: {r['correct_steps']}/{r['steps']} steps correct"
+                for r in levels if r["correct_steps"] < r["steps"]]
+    for line in failures:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
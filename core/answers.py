@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from core import assets, extract, shared
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("ANSWER_DB", os.path.join(assets.CACHE_DIR, "answers.sqlite"))
+# Longest the memo waits for a file to fingerprint before solving without it
+FINGERPRINT_TIMEOUT = float(os.getenv("ANSWER_FINGERPRINT_TIMEOUT", "5"))
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    return _WS_RE.sub(" ", question).strip().lower()
+
+
+def referenced_assets(index: extract.PageIndex) -> list:
+    """Absolute URLs of the data files an answer may depend on."""
+    return sorted(set(index.all_assets() + index.known_file_urls()))
+
+
+def solver_inputs(index: extract.PageIndex) -> list:
+    """
+    The files a handler can actually read: the first asset of each type
+    (PageIndex.asset) and the first bare file name of each type.
+    """
+    first = {}
+    for u in index.known_file_urls():
+        first.setdefault(u.rsplit(".", 1)[-1].lower(), u)
+    return sorted({urls[0] for urls in index.assets.values() if urls} | set(first.values()))
+
+
+async def key_for(question: str, url: str, email: str, index: extract.PageIndex = None) -> str:
+    """
+    Memo key: normalized question + email (handlers mix len(email) into answers)
+    + content hashes of the files a handler may read, so a changed file never
+    hits. Other links on the page (a second image, say) are not waited for.
+    A file still downloading after FINGERPRINT_TIMEOUT gets a one-off
+    fingerprint: the step misses the memo rather than waiting or hitting stale.
+    """
+    urls = solver_inputs(index or extract.build_index(url, question))
+    # The downloads go on (usually already started by prefetch); handlers reuse them
+    tasks = [asyncio.ensure_future(assets.cache.ensure(u)) for u in urls]
+    if tasks:
+        await asyncio.wait(tasks, timeout=FINGERPRINT_TIMEOUT)
+    fingerprints = [[u, _fingerprint(t)] for u, t in zip(urls, tasks)]
+    raw = json.dumps([normalize_question(question), email, fingerprints])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _fingerprint(task: asyncio.Future) -> str:
+    if not task.done():
+        task.add_done_callback(_swallow)
+        return "slow:" + os.urandom(8).hex()
+    if task.cancelled() or task.exception() is not None:
+        return "unavailable"
+    return task.result()
+
+
+def _swallow(task: asyncio.Future):
+    if not task.cancelled():
+        task.exception()
+
+
+class AnswerStore:
+    """
+    SQLite-backed answer memo. Every (key, answer) pair is kept with the verdict
+    the submit endpoint gave it; only accepted answers are ever returned.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT NOT NULL, answer TEXT NOT NULL, status TEXT NOT NULL,"
+                " question TEXT, email TEXT, updated_at REAL NOT NULL,"
+                " PRIMARY KEY (key, answer))"
+            )
+            self._db.commit()
+        return self._db
+
+    def lookup(self, key: str):
+        row = self.db.execute(
+            "SELECT answer FROM answers WHERE key = ? AND status = 'accepted' ORDER BY updated_at DESC LIMIT 1",
+            (key,),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record(self, key: str, answer, correct, question: str = "", email: str = ""):
+        """
+        Store `answer` with its verdict (True/False, or None when the submit
+        gave none, e.g. a network error). The latest real verdict wins; an
+        unknown one never overwrites it.
+        """
+        status = "accepted" if correct is True else "rejected" if correct is False else "pending"
+        encoded = json.dumps(answer)
+        self.db.execute(
+            "INSERT INTO answers VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (key, answer) DO UPDATE SET status = "
+            "CASE WHEN excluded.status = 'pending' THEN answers.status "
+            "ELSE excluded.status END, updated_at = excluded.updated_at",
+            (key, encoded, status, question[:500], email, time.time()),
+        )
+        self.db.commit()
+
+
+# Process-wide store
+store = AnswerStore()
+
+
+async def lookup(key: str):
+    """Accepted answer for `key`, from this process's store or one another worker shared."""
+    answer = store.lookup(key)
+    if answer is not None:
+        return answer
+    try:
+        raw = await shared.get_backend().get(f"answer:{key}")
+    except Exception as e:
+        logger.warning(f"Shared answers unavailable: {e}")
+        return None
+    if raw is None:
+        return None
+    answer = json.loads(raw)
+    store.record(key, answer, True)
+    return answer
+
+
+async def record(key: str, answer, correct, question: str = "", email: str = ""):
+    store.record(key, answer, correct, question, email)
+    if correct is True:
+        try:
+            await shared.get_backend().set(f"answer:{key}", json.dumps(answer))
+        except Exception as e:
+            logger.warning(f"Accepted answer not shared: {e}")
+    elif correct is False:
+        await shared.forget(key)
@@ -0,0 +1,300 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from core import capture, http_client, shared, tracing
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("CACHE_DIR", "/tmp/quiz_cache")
+MEMORY_BYTES = int(os.getenv("ASSET_MEMORY_BYTES", str(64 * 1024 * 1024)))
+# Entries younger than this are served without a revalidation round trip
+FRESH_SECONDS = float(os.getenv("ASSET_FRESH_SECONDS", "600"))
+CHUNK_SIZE = 256 * 1024
+
+
+class MemoryLRU:
+    """Content-hash -> bytes, bounded by total payload size."""
+
+    def __init__(self, max_bytes: int = MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+
+    def get(self, key: str):
+        data = self._items.get(key)
+        if data is not None:
+            self._items.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        if key in self._items:
+            self._items.move_to_end(key)
+            return
+        self._items[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self._items.clear()
+        self.size = 0
+
+
+class DiskStore:
+    """
+    URL index in SQLite plus content-addressed blobs (<dir>/blobs/<sha256>),
+    so identical payloads served under different URLs are stored once.
+    """
+
+    def __init__(self, root: str = CACHE_DIR):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(self.blob_dir, exist_ok=True)
+            self._db = sqlite3.connect(os.path.join(self.root, "assets.sqlite"), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS assets ("
+                " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, size INTEGER NOT NULL,"
+                " etag TEXT, last_modified TEXT, content_type TEXT, checked_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def lookup(self, url: str):
+        row = self.db.execute(
+            "SELECT sha256, size, etag, last_modified, content_type, checked_at FROM assets WHERE url = ?", (url,)
+        ).fetchone()
+        if not row:
+            return None
+        keys = ("sha256", "size", "etag", "last_modified", "content_type", "checked_at")
+        return dict(zip(keys, row))
+
+    def record(self, url: str, sha: str, size: int, headers) -> None:
+        self.db.execute(
+            "INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, sha, size, headers.get("etag"), headers.get("last-modified"),
+             headers.get("content-type"), time.time()),
+        )
+        self.db.commit()
+
+    def touch(self, url: str) -> None:
+        self.db.execute("UPDATE assets SET checked_at = ? WHERE url = ?", (time.time(), url))
+        self.db.commit()
+
+    def blob_path(self, sha: str) -> str:
+        return os.path.join(self.blob_dir, sha)
+
+    def read_blob(self, sha: str):
+        try:
+            with open(self.blob_path(sha), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def adopt_blob(self, sha: str, tmp_path: str) -> None:
+        """Move a fully written temp file into place as blob `sha` (no-op if already stored)."""
+        path = self.blob_path(sha)
+        if not os.path.exists(path):
+            os.replace(tmp_path, path)
+
+
+class AssetCache:
+    """
+    Downloads are streamed straight into content-addressed blobs on disk, so
+    even very large assets never have to sit in memory; `fetch` then loads
+    small ones into the LRU, while `path`/`stream` let callers work off the
+    file in chunks.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, memory_bytes: int = MEMORY_BYTES, fresh_seconds: float = FRESH_SECONDS):
+        self.memory = MemoryLRU(memory_bytes)
+        self.disk = DiskStore(root)
+        self.fresh_seconds = fresh_seconds
+        self._inflight = {}
+        self.stats = {
+            "memory_hits": 0, "disk_hits": 0, "revalidated": 0, "misses": 0,
+            "bytes_from_cache": 0, "bytes_from_network": 0,
+        }
+
+    def _fresh(self, entry) -> bool:
+        return (
+            entry is not None
+            and time.time() - entry["checked_at"] < self.fresh_seconds
+            and os.path.exists(self.disk.blob_path(entry["sha256"]))
+        )
+
+    async def _download(self, url: str, entry, replay: bool = True):
+        """
+        Async generator over the body of `url`, teeing it into a blob.
+        On a 304 the existing blob is replayed instead (unless `replay` is False).
+        """
+        headers = {}
+        if entry is not None and os.path.exists(self.disk.blob_path(entry["sha256"])):
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        if capture.replaying():
+            source = capture.replay_asset(url)
+        else:
+            source = http_client.stream("GET", url, kind="asset", headers=headers)
+        async with source as resp:
+            if resp.status_code == 304 and headers:
+                self.disk.touch(url)
+                self.stats["revalidated"] += 1
+                if replay:
+                    async for chunk in self._read_blob(entry["sha256"]):
+                        yield chunk
+                return
+            resp.raise_for_status()
+
+            hasher = hashlib.sha256()
+            size = 0
+            tmp = os.path.join(self.disk.blob_dir, f".{os.getpid()}.{id(resp)}.part")
+            os.makedirs(self.disk.blob_dir, exist_ok=True)
+            try:
+                with open(tmp, "wb") as f:
+                    async for chunk in resp.aiter_bytes(CHUNK_SIZE):
+                        hasher.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+                        yield chunk
+                sha = hasher.hexdigest()
+                self.disk.adopt_blob(sha, tmp)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            self.disk.record(url, sha, size, resp.headers)
+            self.stats["misses"] += 1
+            self.stats["bytes_from_network"] += size
+
+    async def _read_blob(self, sha: str):
+        with open(self.disk.blob_path(sha), "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.stats["bytes_from_cache"] += len(chunk)
+                yield chunk
+
+    def _capture(self, url: str):
+        if capture.recording():
+            entry = self.disk.lookup(url)
+            if entry is not None:
+                capture.record_asset(url, self.disk.blob_path(entry["sha256"]), entry)
+
+    async def _ensure(self, url: str) -> str:
+        entry = self.disk.lookup(url)
+        if self._fresh(entry):
+            return entry["sha256"]
+        # Workers sharing this cache directory download each URL once
+        async with shared.lock(f"asset:{self.disk.root}:{url}"):
+            entry = self.disk.lookup(url)
+            if self._fresh(entry):
+                return entry["sha256"]
+            async for _ in self._download(url, entry, replay=False):
+                pass
+        return self.disk.lookup(url)["sha256"]
+
+    async def ensure(self, url: str) -> str:
+        """Make sure `url` is on disk; returns its content hash."""
+        # Concurrent requests for the same URL share one download
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._ensure(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        sha = await asyncio.shield(task)
+        self._capture(url)
+        return sha
+
+    async def fetch(self, url: str) -> bytes:
+        with tracing.span("asset", url=url, mode="bytes") as sp:
+            entry = self.disk.lookup(url)
+            if self._fresh(entry):
+                data = self.memory.get(entry["sha256"])
+                if data is not None:
+                    self.stats["memory_hits"] += 1
+                    self.stats["bytes_from_cache"] += len(data)
+                    sp.set(cache="memory", bytes=len(data))
+                    self._capture(url)
+                    return data
+                self.stats["disk_hits"] += 1
+                sp.set(cache="disk")
+            else:
+                sp.set(cache="miss")
+            sha = await self.ensure(url)
+            data = await asyncio.to_thread(self.disk.read_blob, sha)
+            self.memory.put(sha, data)
+            sp.set(bytes=len(data))
+            return data
+
+    async def path(self, url: str) -> str:
+        """Local file holding the body of `url` (read-only; shared between URLs)."""
+        with tracing.span("asset", url=url, mode="path") as sp:
+            entry = self.disk.lookup(url)
+            if self._fresh(entry):
+                self.stats["disk_hits"] += 1
+                sp.set(cache="disk", bytes=entry["size"])
+                self._capture(url)
+                return self.disk.blob_path(entry["sha256"])
+            sp.set(cache="miss")
+            return self.disk.blob_path(await self.ensure(url))
+
+    async def stream(self, url: str):
+        """Body of `url` in chunks, from disk when cached, else straight off the wire."""
+        if url in self._inflight:
+            await self._inflight[url]
+        entry = self.disk.lookup(url)
+        if self._fresh(entry):
+            self.stats["disk_hits"] += 1
+            source = self._read_blob(entry["sha256"])
+        else:
+            source = self._download(url, entry)
+        async for chunk in source:
+            yield chunk
+        self._capture(url)
+
+    def fingerprint(self, url: str):
+        """Content hash last seen for `url`, or None if never fetched."""
+        entry = self.disk.lookup(url)
+        return entry["sha256"] if entry else None
+
+
+# Process-wide cache shared by all handlers
+cache = AssetCache()
+tracing.metrics.collect("quiz_asset_cache_events_total", "Asset cache hits, misses and bytes served.", "counter",
+                        lambda: [({"event": k}, v) for k, v in cache.stats.items()])
+
+
+async def fetch_bytes(url: str) -> bytes:
+    return await cache.fetch(url)
+
+
+async def fetch_text(url: str) -> str:
+    return (await cache.fetch(url)).decode("utf-8", errors="replace")
+
+
+async def fetch_json(url: str):
+    return json.loads(await cache.fetch(url))
+
+
+async def fetch_path(url: str) -> str:
+    return await cache.path(url)
+
+
+def stream(url: str):
+    return cache.stream(url)
@@ -0,0 +1,142 @@
+"""
+Many quiz chains on one bounded pool of worker tasks. They share the
+process's browser pool, HTTP and LLM clients and caches, and identical page
+fetches across chains are done once (core.fetch.share_pages). Results come
+back as each chain finishes, followed by aggregate throughput.
+
+    python -m core.batch jobs.jsonl --concurrency 8 > results.jsonl
+
+Each job is {"email", "secret", "url"}; the file is a JSON array or JSON lines.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import time
+from core import fetch
+from core.chain import solve_quiz_chain
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "64"))
+MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "1000"))
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def _solve_one(index: int, job: dict) -> dict:
+    record = {"type": "result", "index": index, "email": job["email"], "url": job["url"]}
+    t0 = time.perf_counter()
+    try:
+        steps = await solve_quiz_chain(job["url"], job["email"], job["secret"])
+        record.update(status="done", correct_steps=sum(1 for s in steps if s.get("correct")), steps=steps)
+    except Exception as e:
+        logger.error(f"Batch job {index} failed: {e}", exc_info=True)
+        record.update(status="failed", error=str(e), correct_steps=0, steps=[])
+    record["duration_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return record
+
+
+async def run_batch(jobs: list, concurrency: int = CONCURRENCY):
+    """
+    Solve `jobs` ([{email, secret, url}]) with at most `concurrency` chains in
+    flight. Async generator: one {"type": "result"} per job in completion
+    order, then one {"type": "summary"}.
+    """
+    concurrency = max(1, min(concurrency, MAX_CONCURRENCY, len(jobs) or 1))
+    pending = asyncio.Queue()
+    for item in enumerate(jobs):
+        pending.put_nowait(item)
+    finished = asyncio.Queue()
+    pages = {}
+    before = dict(fetch.stats)
+
+    async def worker():
+        with fetch.share_pages(pages):
+            while not pending.empty():
+                index, job = pending.get_nowait()
+                finished.put_nowait(await _solve_one(index, job))
+
+    logger.info(f"Batch of {len(jobs)} chains, {concurrency} at a time")
+    t0 = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    latencies, done, steps, correct = [], 0, 0, 0
+    try:
+        for _ in jobs:
+            record = await finished.get()
+            latencies.append(record["duration_ms"])
+            done += record["status"] == "done"
+            steps += len(record["steps"])
+            correct += record["correct_steps"]
+            yield record
+    finally:
+        # Also when the consumer goes away mid-batch
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    wall = time.perf_counter() - t0
+    yield {
+        "type": "summary", "jobs": len(jobs), "done": done, "failed": len(jobs) - done,
+        "concurrency": concurrency, "wall_s": round(wall, 3),
+        "chains_per_s": round(len(jobs) / wall, 3) if wall else 0.0,
+        "steps": steps, "correct_steps": correct, "steps_per_s": round(steps / wall, 3) if wall else 0.0,
+        "p50_ms": _percentile(latencies, 50), "p95_ms": _percentile(latencies, 95),
+        "page_fetches": {k: fetch.stats[k] - before[k] for k in fetch.stats},
+    }
+
+
+def load_jobs(path: str) -> list:
+    """Jobs from a JSON array or JSON-lines file ("-" for stdin)."""
+    if path == "-":
+        raw = sys.stdin.read()
+    else:
+        with open(path) as f:
+            raw = f.read()
+    raw = raw.strip()
+    jobs = json.loads(raw) if raw.startswith("[") else [json.loads(line) for line in raw.splitlines() if line.strip()]
+    for n, job in enumerate(jobs):
+        missing = {"email", "secret", "url"} - set(job)
+        if missing:
+            raise ValueError(f"Job {n} is missing {', '.join(sorted(missing))}")
+    return jobs
+
+
+async def _main(args) -> int:
+    from core import http_client, llm_gateway
+    from core.browser import pool
+
+    failed = 0
+    try:
+        async for record in run_batch(load_jobs(args.jobs), args.concurrency):
+            if record["type"] == "result":
+                failed += record["status"] != "done"
+            print(json.dumps(record, default=str), flush=True)
+    finally:
+        await pool.stop()
+        await http_client.stop()
+        llm_gateway.stop()
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m core.batch")
+    parser.add_argument("jobs", help="JSON array or JSON lines of {email, secret, url}; - for stdin")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    args = parser.parse_args(argv)
+    # Logs go to stderr; stdout carries one JSON document per line
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Pool sizing (override via environment)
+MAX_CONTEXTS = int(os.getenv("BROWSER_MAX_CONTEXTS", "4"))
+CONTEXT_MAX_USES = int(os.getenv("BROWSER_CONTEXT_MAX_USES", "20"))
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+class BrowserPool:
+    """
+    One headless Chromium shared by the whole process, launched on first use.
+    Pages are handed out from isolated browser contexts; at most `max_contexts`
+    are in use at once, and a context is thrown away after `max_uses` pages
+    or as soon as anything goes wrong inside it.
+    """
+
+    def __init__(self, max_contexts: int = MAX_CONTEXTS, max_uses: int = CONTEXT_MAX_USES):
+        self.max_contexts = max_contexts
+        self.max_uses = max_uses
+        self._playwright = None
+        self._browser = None
+        self._idle = []  # [(context, uses)]
+        self._sem = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+        self.stats = {"launches": 0, "contexts_created": 0, "contexts_recycled": 0, "pages": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self):
+        async with self._lock:
+            if self.running:
+                return
+            t0 = time.perf_counter()
+            if self._playwright is None:
+                # Imported on first launch: processes that never need a browser never load Playwright
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+            self._idle.clear()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self.stats["launches"] += 1
+            logger.info(f"Browser pool started in {_ms(t0)} ms")
+
+    async def stop(self):
+        async with self._lock:
+            for ctx, _ in self._idle:
+                try:
+                    await ctx.close()
+                except Exception:
+                    pass
+            self._idle.clear()
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception as e:
+                    logger.warning(f"Browser close failed: {e}")
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+            logger.info("Browser pool stopped.")
+
+    async def warm(self, contexts: int = 1):
+        """Launch the browser and park up to `contexts` ready-made contexts in the pool."""
+        await self.start()
+        while len(self._idle) < min(contexts, self.max_contexts):
+            ctx = await self._browser.new_context()
+            self.stats["contexts_created"] += 1
+            self._idle.append((ctx, 0))
+
+    async def _acquire_context(self):
+        if not self.running:
+            await self.start()
+        if self._idle:
+            return self._idle.pop()
+        ctx = await self._browser.new_context()
+        self.stats["contexts_created"] += 1
+        return ctx, 0
+
+    async def _release_context(self, ctx, uses: int, broken: bool):
+        if broken or uses >= self.max_uses or not self.running:
+            self.stats["contexts_recycled"] += 1
+            try:
+                await ctx.close()
+            except Exception:
+                pass
+        else:
+            self._idle.append((ctx, uses))
+
+    @asynccontextmanager
+    async def page(self, timings: dict = None):
+        """Yield a fresh page. Fills `timings` (ms) with queue/context/page setup costs."""
+        timings = timings if timings is not None else {}
+        t0 = time.perf_counter()
+        async with self._sem:
+            timings["queue_ms"] = _ms(t0)
+
+            t = time.perf_counter()
+            ctx, uses = await self._acquire_context()
+            timings["context_ms"] = _ms(t)
+
+            broken = False
+            page = None
+            try:
+                t = time.perf_counter()
+                page = await ctx.new_page()
+                timings["page_ms"] = _ms(t)
+                self.stats["pages"] += 1
+
+                def _on_crash(_):
+                    nonlocal broken
+                    broken = True
+
+                page.on("crash", _on_crash)
+                yield page
+            except Exception:
+                broken = True
+                raise
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        broken = True
+                await self._release_context(ctx, uses + 1, broken)
+
+
+# Process-wide pool, started/stopped by the app lifespan
+pool = BrowserPool()
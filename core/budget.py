@@ -0,0 +1,120 @@
+"""
+Time left in a quiz chain. solve_quiz_chain opens a Budget; everything it
+calls (fetch, routing, handlers, submit, HTTP, LLM) reads it from context to
+size its timeouts and to skip expensive fallbacks when the deadline is near.
+
+    QUIZ_TIME_LIMIT=180        seconds from the first page (0: unlimited)
+    QUIZ_SUBMIT_RESERVE=10     seconds kept back for submitting the answer
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from core import tracing
+
+TIME_LIMIT = float(os.getenv("QUIZ_TIME_LIMIT", "180"))
+SUBMIT_RESERVE = float(os.getenv("QUIZ_SUBMIT_RESERVE", "10"))
+# No browser render / LLM call is started with less than this left to solve in
+BROWSER_MIN_SECONDS = float(os.getenv("BUDGET_BROWSER_MIN_SECONDS", "20"))
+LLM_MIN_SECONDS = float(os.getenv("BUDGET_LLM_MIN_SECONDS", "15"))
+# A derived timeout never drops below this, so a late call can still finish
+MIN_TIMEOUT = float(os.getenv("BUDGET_MIN_TIMEOUT", "1"))
+
+STAGE_SECONDS = tracing.metrics.histogram("quiz_budget_stage_seconds", "Chain time budget spent, by stage.")
+
+
+class Budget:
+    """
+    A deadline (time.monotonic()) with a slice reserved for the final submit,
+    plus the seconds each stage has used.
+    """
+
+    def __init__(self, limit: float = TIME_LIMIT, reserve: float = SUBMIT_RESERVE):
+        self.started = time.monotonic()
+        self.deadline = self.started + limit if limit > 0 else None
+        self.reserve = reserve
+        self.stages = {}
+
+    def remaining(self, submit: bool = False) -> float:
+        """Seconds left to work in (to submit in, with `submit`); inf when unlimited."""
+        if self.deadline is None:
+            return float("inf")
+        return self.deadline - time.monotonic() - (0 if submit else self.reserve)
+
+    @property
+    def solve_deadline(self):
+        """When solving must stop to leave time for the submit (None when unlimited)."""
+        return None if self.deadline is None else self.deadline - self.reserve
+
+    def affords(self, seconds: float, submit: bool = False) -> bool:
+        return self.remaining(submit) >= seconds
+
+    def expired(self) -> bool:
+        return self.remaining(submit=True) <= 0
+
+    def timeout(self, default: float, submit: bool = False) -> float:
+        """`default` capped by the time left, but not below MIN_TIMEOUT."""
+        return max(min(default, self.remaining(submit)), MIN_TIMEOUT)
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - t0
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            STAGE_SECONDS.observe(elapsed, stage=name)
+
+    def report(self) -> dict:
+        used = time.monotonic() - self.started
+        return {
+            "used_s": round(used, 2),
+            "left_s": None if self.deadline is None else round(self.deadline - time.monotonic(), 2),
+            "stages_s": {k: round(v, 2) for k, v in self.stages.items()},
+        }
+
+
+_current = contextvars.ContextVar("budget", default=None)
+
+
+def current():
+    """The chain's Budget, or None outside a chain."""
+    return _current.get()
+
+
+@contextmanager
+def use(budget: Budget):
+    """Make `budget` current for this block and every task started inside it."""
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+def timeout(default: float, submit: bool = False) -> float:
+    """`default`, capped by the current budget if there is one."""
+    budget = _current.get()
+    return default if budget is None else budget.timeout(default, submit)
+
+
+def affords(seconds: float, submit: bool = False) -> bool:
+    budget = _current.get()
+    return budget is None or budget.affords(seconds, submit)
+
+
+def solve_deadline():
+    budget = _current.get()
+    return None if budget is None else budget.solve_deadline
+
+
+@contextmanager
+def stage(name: str):
+    """Charge this block to `name` on the current budget (no-op outside a chain)."""
+    budget = _current.get()
+    if budget is None:
+        yield
+        return
+    with budget.stage(name):
+        yield
@@ -0,0 +1,283 @@
+"""
+Record a live chain into one SQLite archive, then replay it offline.
+
+    CAPTURE=/tmp/run.qcap uvicorn app:app     # record every chain
+    python -m core.capture replay /tmp/run.qcap
+
+Captured: rendered pages (HTML + text), asset bodies, LLM prompts/replies,
+transcripts, and submit requests/responses (secret redacted). Bodies are
+zlib-compressed and stored once per content hash. In replay mode every one
+of those is served from the archive: no browser, no network.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import asynccontextmanager
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_PATH = os.getenv("CAPTURE", "")
+REPLAY_PATH = os.getenv("REPLAY", "")
+
+
+class ReplayMiss(KeyError):
+    """The replayed run asked for something the captured run never did."""
+
+
+class Archive:
+    def __init__(self, path: str):
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+        self._cursors = {}  # (kind, key) -> how many matching records were replayed so far
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(
+                "CREATE TABLE IF NOT EXISTS blobs (sha256 TEXT PRIMARY KEY, data BLOB NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS records ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, key TEXT NOT NULL,"
+                " meta TEXT NOT NULL, sha256 TEXT, created_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS records_kind_key ON records (kind, key, seq);"
+            )
+            self._db.commit()
+        return self._db
+
+    def put(self, kind: str, key: str, meta: dict, body: bytes = None):
+        sha = hashlib.sha256(body).hexdigest() if body is not None else None
+        with self._lock:
+            if sha is not None:
+                self.db.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (sha, zlib.compress(body, 6)))
+            self.db.execute(
+                "INSERT INTO records (kind, key, meta, sha256, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(meta, default=str), sha, time.time()),
+            )
+            self.db.commit()
+
+    def get(self, kind: str, key: str) -> tuple:
+        """
+        (meta, body) of the next unreplayed record for (kind, key); once they
+        run out the last one keeps being returned (e.g. a page fetched again).
+        """
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT meta, sha256 FROM records WHERE kind = ? AND key = ? ORDER BY seq", (kind, key)
+            ).fetchall()
+            if not rows:
+                raise ReplayMiss(f"{kind} {key}")
+            n = self._cursors.get((kind, key), 0)
+            self._cursors[(kind, key)] = n + 1
+            meta, sha = rows[min(n, len(rows) - 1)]
+            body = None
+            if sha is not None:
+                body = zlib.decompress(self.db.execute("SELECT data FROM blobs WHERE sha256 = ?", (sha,)).fetchone()[0])
+        return json.loads(meta), body
+
+    def records(self, kind: str) -> list:
+        rows = self.db.execute("SELECT key, meta FROM records WHERE kind = ? ORDER BY seq", (kind,)).fetchall()
+        return [(key, json.loads(meta)) for key, meta in rows]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+archive = None
+mode = None  # "capture" | "replay" | None
+
+
+def start(path: str, new_mode: str) -> Archive:
+    global archive, mode
+    archive, mode = Archive(path), new_mode
+    logger.info(f"Capture: {new_mode} using {path}")
+    return archive
+
+
+def stop():
+    global archive, mode
+    if archive is not None:
+        archive.close()
+    archive, mode = None, None
+    _recorded_assets.clear()
+
+
+def recording() -> bool:
+    return mode == "capture"
+
+
+def replaying() -> bool:
+    return mode == "replay"
+
+
+def _safe(fn):
+    # Capturing must never break the live run it is observing
+    def wrapper(*args, **kwargs):
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Capture write failed ({fn.__name__}): {e}")
+    return wrapper
+
+
+# ----------------------------------------------------------------------
+# Hooks (called from fetch, assets, llm_gateway, transcribe, submit, chain)
+# ----------------------------------------------------------------------
+@_safe
+def record_chain(initial_url: str, email: str):
+    archive.put("chain", initial_url, {"url": initial_url, "email": email})
+
+
+@_safe
+def record_page(url: str, html: str, question: str, strategy: str, timings: dict):
+    archive.put("page", url, {"strategy": strategy, "timings": timings, "question": question}, html.encode())
+
+
+def replay_page(url: str) -> tuple:
+    """(html, text, captured timings) for `url`."""
+    meta, body = archive.get("page", url)
+    return body.decode(), meta["question"], meta.get("timings", {})
+
+
+_recorded_assets = set()
+
+
+@_safe
+def record_asset(url: str, path: str, entry: dict):
+    """Body of `url` from its cache blob; each URL once per process (cache hits included)."""
+    if url in _recorded_assets:
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    headers = {"content-type": entry.get("content_type"), "etag": entry.get("etag"),
+               "last-modified": entry.get("last_modified")}
+    archive.put("asset", url, {"headers": {k: v for k, v in headers.items() if v}}, data)
+    _recorded_assets.add(url)
+
+
+@asynccontextmanager
+async def replay_asset(url: str):
+    """Stands in for http_client.stream("GET", url): the captured body as a 200 response."""
+    meta, body = archive.get("asset", url)
+    yield httpx.Response(200, content=body, headers=meta.get("headers", {}), request=httpx.Request("GET", url))
+
+
+@_safe
+def record_llm(key: str, messages: list, model: str, text: str):
+    archive.put("llm", key, {"model": model, "messages": messages, "reply": text})
+
+
+def replay_llm(key: str) -> str:
+    meta, _ = archive.get("llm", key)
+    return meta["reply"]
+
+
+@_safe
+def record_transcript(key: str, text: str):
+    archive.put("transcript", key, {"text": text})
+
+
+def replay_transcript(key: str) -> str:
+    meta, _ = archive.get("transcript", key)
+    return meta["text"]
+
+
+@_safe
+def record_submit(submit_url: str, payload: dict, response: dict):
+    request = {k: v for k, v in payload.items() if k != "secret"}
+    archive.put("submit", payload.get("url", ""), {"submit_url": submit_url, "request": request, "response": response})
+
+
+def replay_submit(payload: dict) -> dict:
+    """
+    The captured verdict for this quiz URL. If the answer differs from the
+    captured one the verdict is unknown; that is flagged instead of guessed.
+    """
+    meta, _ = archive.get("submit", payload.get("url", ""))
+    response = dict(meta["response"])
+    captured = meta["request"].get("answer")
+    if captured != payload.get("answer"):
+        logger.warning(f"Replay: answer changed for {payload.get('url')}: {captured!r} -> {payload.get('answer')!r}")
+        response["correct"] = None
+        response["replay_answer_changed"] = True
+        response["captured_answer"] = captured
+    return response
+
+
+if CAPTURE_PATH:
+    start(CAPTURE_PATH, "capture")
+elif REPLAY_PATH:
+    start(REPLAY_PATH, "replay")
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+async def replay_chains(path: str, work_dir: str = None) -> list:
+    """Re-run every captured chain from `path`; returns [{url, steps, duration_ms}]."""
+    import tempfile
+    from core import answers, assets, codegen, shared, transcribe
+    from core.chain import solve_quiz_chain
+
+    start(path, "replay")
+    # Empty caches, so every asset and answer really comes from the archive
+    work_dir = work_dir or tempfile.mkdtemp(prefix="quiz-replay-")
+    assets.cache = assets.AssetCache(os.path.join(work_dir, "assets"))
+    answers.store = answers.AnswerStore(os.path.join(work_dir, "answers.sqlite"))
+    codegen.store = codegen.ProgramStore(os.path.join(work_dir, "programs.sqlite"))
+    shared.set_backend(shared.SQLiteBackend(os.path.join(work_dir, "shared.sqlite")))
+    transcribe.CACHE_DIR = os.path.join(work_dir, "transcripts")
+    results = []
+    try:
+        for url, meta in archive.records("chain"):
+            t0 = time.perf_counter()
+            steps = await solve_quiz_chain(url, meta["email"], "replay")
+            results.append({"url": url, "steps": steps, "duration_ms": round((time.perf_counter() - t0) * 1000, 1)})
+    finally:
+        stop()
+    return results
+
+
+def main(argv=None) -> int:
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(prog="python -m core.capture")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("replay", help="re-run the captured chains offline")
+    p.add_argument("archive")
+    p.add_argument("--out", help="write the JSON report here instead of stdout")
+    p = sub.add_parser("show", help="list what an archive holds")
+    p.add_argument("archive")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "show":
+        db = Archive(args.archive).db
+        for kind, count in db.execute("SELECT kind, COUNT(*) FROM records GROUP BY kind ORDER BY kind"):
+            print(f"{kind:12} {count}")
+        return 0
+
+    report = json.dumps(asyncio.run(replay_chains(args.archive)), indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    # Run against the importable module, whose globals the hooks read
+    from core.capture import main as _main
+
+    raise SystemExit(_main())
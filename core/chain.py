@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from core import answers, assets, budget, capture, codegen, prefetch, shared, tracing
+from core.router import route_and_solve, stats as router_stats
+from core.submit import find_submit_url, submit_answer
+
+logger = logging.getLogger(__name__)
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+async def solve_quiz_chain(initial_url: str, email: str, secret: str, on_event=None) -> list:
+    """
+    Solve quiz pages until the server stops handing out URLs or the time
+    budget (core.budget) runs out.
+    `on_event(event: dict)` is called for every step event; returns the per-step records.
+    """
+    def emit(event_type: str, **data):
+        if on_event is not None:
+            on_event({"type": event_type, "time": time.time(), **data})
+
+    if capture.recording():
+        capture.record_chain(initial_url, email)
+    steps = []
+    max_attempts = 15  # Safety limit to prevent infinite loops
+    next_page = prefetch.PagePrefetch()
+    # Everything below (including prefetch tasks) sizes its timeouts from this
+    with tracing.trace("quiz_chain", url=initial_url) as trace, budget.use(budget.Budget()) as b:
+        emit("trace_started", trace_id=trace.id)
+        try:
+            await _run(initial_url, email, secret, steps, next_page, emit, max_attempts, b)
+        finally:
+            next_page.cancel()
+            emit("budget", **b.report())
+
+    logger.info(f"Budget use: {b.report()}")
+    logger.info(f"Asset cache: {assets.cache.stats}")
+    logger.info(f"Handler stats: {router_stats()}")
+    return steps
+
+
+async def _solve(memo_key, question, current_url, page_data, email, b: budget.Budget):
+    """(answer, deduped), settled by the budget's solve deadline."""
+    # One worker solves identical steps; the rest wait for its answer
+    solving = shared.solve_once(memo_key, lambda: route_and_solve(question, current_url, page_data, email))
+    if b.deadline is None:
+        return await solving
+    # Races settle on their own at the solve deadline; this only catches
+    # runaway solvers, half way into the submit reserve
+    cutoff = b.deadline - b.reserve / 2 - time.monotonic()
+    return await asyncio.wait_for(solving, max(cutoff, budget.MIN_TIMEOUT))
+
+
+async def _run(current_url, email, secret, steps, next_page, emit, max_attempts, b):
+    attempt = 0
+    while current_url and attempt < max_attempts:
+        if b.expired():
+            logger.error(f"❌ Time budget used up ({b.report()}). Stopping.")
+            emit("budget_exhausted", url=current_url, **b.report())
+            break
+        attempt += 1
+        with tracing.span("step", step=attempt, url=current_url):
+            logger.info(f"\n{'='*40}\n[QUIZ {attempt}] {current_url}\n{'='*40}")
+            step = {"step": attempt, "url": current_url, "timings": {}}
+            steps.append(step)
+            emit("step_started", step=attempt, url=current_url)
+
+            # A. Fetch the page (possibly already rendering since the last submit)
+            t0 = time.perf_counter()
+            with b.stage("fetch"):
+                page_data = await next_page.take(current_url)
+            step["timings"]["fetch_ms"] = _ms(t0)
+            if not page_data:
+                logger.error(f"Failed to fetch page: {current_url}")
+                step["error"] = "fetch failed"
+                emit("step_failed", step=attempt, url=current_url, error=step["error"])
+                break
+
+            question = page_data["question"]
+            logger.info(f"Question Preview: {question[:200]}...")
+            logger.info(f"Fetch timings (ms): {page_data.get('timings')}")
+            emit("page_fetched", step=attempt, url=current_url, fetch_timings=page_data.get("timings"))
+
+            # Start every referenced download now; handlers find them in the asset cache
+            index = page_data["index"]
+            downloads = prefetch.start_downloads(prefetch.asset_urls(index))
+            step["prefetched"] = len(downloads)
+
+            # B. Find where to submit
+            submit_url = find_submit_url(question, page_data["html"], current_url, index)
+            if not submit_url:
+                # Fallback: assume /submit relative to current
+                base = current_url.split('?')[0]
+                if '/' in base:
+                    # heuristic: strip last segment and add 'submit' or similar?
+                    # Safer default: domain + /submit
+                    # But let's log error for now
+                    logger.warning("No explicit submit URL found, guessing...")
+
+            logger.info(f"Submit URL: {submit_url}")
+
+            # C. Reuse an accepted answer for identical inputs, else route and solve
+            t0 = time.perf_counter()
+            with b.stage("solve"):
+                memo_key = await answers.key_for(question, current_url, email, index)
+                answer = await answers.lookup(memo_key)
+                step["reused"] = answer is not None
+                step["deduped"] = False
+                if answer is not None:
+                    logger.info(f"Reusing accepted answer: {answer}")
+                else:
+                    try:
+                        answer, step["deduped"] = await _solve(memo_key, question, current_url, page_data, email, b)
+                        logger.info(f"{'Shared' if step['deduped'] else 'Calculated'} Answer: {answer}")
+                    except asyncio.TimeoutError:
+                        # Submitting something still gets a verdict (and often the next URL)
+                        logger.error("No answer before the solve deadline; submitting an empty one")
+                        answer = ""
+                        step["timed_out"] = True
+            step["timings"]["solve_ms"] = _ms(t0)
+            step["answer"] = answer
+            emit("answered", step=attempt, answer=answer, reused=step["reused"], deduped=step["deduped"])
+
+            # D. Submit the answer
+            t0 = time.perf_counter()
+            with b.stage("submit"):
+                resp = await submit_answer(email, secret, current_url, answer, submit_url)
+            step["timings"]["submit_ms"] = _ms(t0)
+            step["budget_left_s"] = b.report()["left_s"]
+            # Warm the next page before doing any bookkeeping for this one
+            if resp.get("url") and attempt < max_attempts:
+                next_page.start(resp.get("url"))
+            logger.info(f"Server Response: Correct={resp.get('correct')}, Msg={resp.get('reason')}")
+            await answers.record(memo_key, answer, resp.get("correct"), question, email)
+            codegen.settle(question, answer, resp.get("correct"))
+            step["correct"] = bool(resp.get("correct"))
+            step["reason"] = resp.get("reason")
+            emit("submitted", step=attempt, correct=step["correct"], reason=step["reason"],
+                 next_url=resp.get("url"), timings=step["timings"])
+
+            # E. Handle next step
+            if resp.get("correct"):
+                current_url = resp.get("url")
+                if not current_url:
+                    logger.info("✅ QUIZ CHAIN COMPLETE! All steps solved.")
+                    break
+            else:
+                # If wrong, check if we got a retry URL or just stop
+                current_url = resp.get("url")
+                if not current_url:
+                    logger.error("❌ Failed step with no retry URL. Stopping.")
+                    break
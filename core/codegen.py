@@ -0,0 +1,168 @@
+"""
+Programs the LLM writes once per question template and the sandbox runs
+against the full data file. Values that change between askings (numbers,
+dates, emails) are lifted out of the question into PARAMS, so one cached
+program serves every variant of a template.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from core import assets, llm_gateway, sandbox
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("PROGRAM_DB", os.path.join(assets.CACHE_DIR, "programs.sqlite"))
+# Characters of the data file shown to the LLM, enough to see its shape
+SAMPLE_CHARS = int(os.getenv("CODEGEN_SAMPLE_CHARS", "2000"))
+# How far into a SQL dump to look for CREATE statements
+SCHEMA_SCAN_CHARS = 1024 * 1024
+# Programs whose answers are still waiting for a verdict
+MAX_PENDING = 256
+
+_PARAM = re.compile(
+    r"(?P<email>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    r"|(?P<url>https?://\S+)"
+    r"|(?P<date>\b\d{4}-\d{2}-\d{2}\b)"
+    r"|(?P<number>(?<![\w.])-?\d+(?:\.\d+)?(?!\w|\.\d))"
+)
+_WS_RE = re.compile(r"\s+")
+_CODE_BLOCK = re.compile(r"```(\w+)?\s*\n(.*?)```", re.DOTALL)
+
+SYSTEM_PROMPT = """You write one short program that answers a question about a data file.
+The program runs offline against the FULL file; you only see its beginning.
+Reply with exactly one fenced code block and nothing else:
+- ```python: `path` is the file, `text()` returns its contents, `db` is an sqlite3
+  connection with the dump loaded (.sql files only), `PARAMS` is the list of values
+  marked {0}, {1}, ... in the question. Import only these modules: %s.
+  Set `answer`.
+- ```sql (.sql files only): one SELECT against the loaded database; use :p0, :p1, ...
+  for PARAMS.
+Never hard-code a value that appears as {n}; read it from PARAMS.
+""" % ", ".join(sandbox.MODULES)
+
+
+def template(question: str) -> tuple:
+    """(question with variable values replaced by {0}, {1}..., [values]); URLs become <url>."""
+    params = []
+
+    def lift(m):
+        if m.group("url"):
+            return "<url>"
+        value = m.group(0)
+        if m.group("number"):
+            value = float(value) if "." in value else int(value)
+        params.append(value)
+        return "{%d}" % (len(params) - 1)
+
+    return _PARAM.sub(lift, _WS_RE.sub(" ", question).strip()), params
+
+
+def file_kind(name: str) -> str:
+    return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+class ProgramStore:
+    """
+    SQLite-backed program cache: (template, file kind) -> generated program.
+    Only programs whose answer the submit endpoint accepted are kept.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS programs ("
+                " key TEXT PRIMARY KEY, template TEXT NOT NULL, language TEXT NOT NULL, code TEXT NOT NULL,"
+                " runs INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    @staticmethod
+    def key(template_text: str, kind: str) -> str:
+        return hashlib.sha256(f"{kind}\n{template_text}".encode()).hexdigest()
+
+    def lookup(self, key: str):
+        """(language, code) or None."""
+        row = self.db.execute("SELECT language, code FROM programs WHERE key = ?", (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def record(self, key: str, template_text: str, language: str, code: str):
+        """Keep a program whose answer was accepted; counts reuse of an existing one."""
+        self.db.execute(
+            "INSERT INTO programs VALUES (?, ?, ?, ?, 1, ?) ON CONFLICT (key) DO UPDATE SET "
+            "language = excluded.language, code = excluded.code, runs = programs.runs + 1, "
+            "updated_at = excluded.updated_at",
+            (key, template_text[:1000], language, code, time.time()),
+        )
+        self.db.commit()
+
+    def forget(self, key: str):
+        self.db.execute("DELETE FROM programs WHERE key = ?", (key,))
+        self.db.commit()
+
+
+# Process-wide store
+store = ProgramStore()
+
+# (question, answer) -> (key, template, language, code) until the chain submits
+_pending = OrderedDict()
+
+
+def propose(question: str, answer: str, key: str, template_text: str, language: str, code: str):
+    """Remember which program gave `answer`; settle() keeps or drops it once the verdict is in."""
+    _pending[(question, str(answer))] = (key, template_text, language, code)
+    _pending.move_to_end((question, str(answer)))
+    while len(_pending) > MAX_PENDING:
+        _pending.popitem(last=False)
+
+
+def settle(question: str, answer, correct):
+    """
+    Verdict for a submitted answer: an accepted program is stored, a rejected
+    one forgotten (so the next asking regenerates it). Unknown verdicts
+    change nothing.
+    """
+    pending = _pending.pop((question, str(answer)), None)
+    if pending is None or correct is None:
+        return
+    key, template_text, language, code = pending
+    if correct:
+        store.record(key, template_text, language, code)
+    else:
+        logger.info("Program answer rejected; forgetting it")
+        store.forget(key)
+
+
+def sample(path: str, kind: str) -> str:
+    """The start of the file; for SQL dumps, every CREATE statement plus the first rows."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        content = f.read(SCHEMA_SCAN_CHARS if kind == "sql" else SAMPLE_CHARS)
+    if kind != "sql" or len(content) <= SAMPLE_CHARS:
+        return content[:SAMPLE_CHARS]
+    creates = re.findall(r"CREATE\s+TABLE.*?\);", content, re.IGNORECASE | re.DOTALL)
+    schema = "\n".join(creates)[:SAMPLE_CHARS]
+    return f"{schema}\n...\n{content[:max(SAMPLE_CHARS - len(schema), 500)]}"
+
+
+async def generate(template_text: str, params: list, name: str, head: str) -> tuple:
+    """Ask the LLM for a program; returns (language, code)."""
+    kind = file_kind(name)
+    values = ", ".join(f"{{{i}}}={v!r}" for i, v in enumerate(params)) or "(none)"
+    context = f"File: {name} ({kind})\nPARAMS: {values}\n\n--- Beginning of {name} ---\n{head}\n---------------------"
+    reply = await llm_gateway.complete(SYSTEM_PROMPT, template_text, context, temperature=0.0)
+    m = _CODE_BLOCK.search(reply)
+    language, code = ((m.group(1) or "python").lower(), m.group(2)) if m else ("python", reply)
+    if language in ("py", "python3"):
+        language = "python"
+    return language, code.strip()
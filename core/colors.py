@@ -0,0 +1,86 @@
+import io
+import os
+from collections import Counter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # PIL itself is imported lazily, see pil()
+    from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # Counter-based fallback below
+    np = None
+
+# exact | downscale | quantize
+DEFAULT_MODE = os.getenv("COLOR_MODE", "exact")
+# Pixel budget for the "downscale" mode
+MAX_PIXELS = int(os.getenv("COLOR_MAX_PIXELS", str(1_000_000)))
+# Bits kept per channel for the "quantize" histogram
+QUANT_BITS = int(os.getenv("COLOR_QUANT_BITS", "5"))
+
+
+def to_hex(rgb) -> str:
+    r, g, b = (int(c) for c in rgb)
+    return "#{:02x}{:02x}{:02x}".format(r, g, b)
+
+
+def pil():
+    """PIL.Image, imported on first use (keeps it out of app startup)."""
+    from PIL import Image
+
+    return Image
+
+
+def load(data: bytes, mode: str = DEFAULT_MODE, region: tuple = None) -> "Image.Image":
+    """Decode to RGB, optionally cropped to `region` (x0, y0, x1, y1) and shrunk for "downscale"."""
+    Image = pil()
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    if region:
+        img = img.crop(region)
+    if mode == "downscale" and img.width * img.height > MAX_PIXELS:
+        factor = int(((img.width * img.height) / MAX_PIXELS) ** 0.5) + 1
+        # Nearest-neighbour sampling keeps real pixel colors (no blending)
+        img = img.resize((max(1, img.width // factor), max(1, img.height // factor)), Image.NEAREST)
+    return img
+
+
+def packed(img: "Image.Image"):
+    """Pixels as a flat uint32 array of 0xRRGGBB."""
+    arr = np.asarray(img, dtype=np.uint32).reshape(-1, 3)
+    return (arr[:, 0] << 16) | (arr[:, 1] << 8) | arr[:, 2]
+
+
+def _unpack(value: int) -> tuple:
+    value = int(value)
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+def top_colors(img: "Image.Image", k: int = 1, mode: str = DEFAULT_MODE) -> list:
+    """[(hex, count)] most common first; ties go to the color seen first in the image."""
+    if np is None:
+        return [(to_hex(c), n) for c, n in Counter(img.getdata()).most_common(k)]
+    px = packed(img)
+    if mode == "quantize":
+        # Find the busiest coarse bin with a small bincount, then resolve exact colors inside it
+        shift, mask = 8 - QUANT_BITS, (1 << QUANT_BITS) - 1
+        r, g, b = (px >> (16 + shift)) & mask, (px >> (8 + shift)) & mask, (px >> shift) & mask
+        bins = (r << (2 * QUANT_BITS)) | (g << QUANT_BITS) | b
+        counts = np.bincount(bins, minlength=1 << (3 * QUANT_BITS))
+        best = np.argsort(counts)[::-1][:k]
+        px = px[np.isin(bins, best)]
+    values, first_seen, counts = np.unique(px, return_index=True, return_counts=True)
+    # Sort by count desc, then first appearance asc (matches Counter.most_common)
+    order = np.lexsort((first_seen, -counts))[:k]
+    return [(to_hex(_unpack(values[i])), int(counts[i])) for i in order]
+
+
+def dominant(img: "Image.Image", mode: str = DEFAULT_MODE) -> str:
+    return top_colors(img, 1, mode)[0][0]
+
+
+def mean_color(img: "Image.Image") -> str:
+    if np is None:
+        pixels = list(img.getdata())
+        return to_hex(round(sum(p[i] for p in pixels) / len(pixels)) for i in range(3))
+    arr = np.asarray(img, dtype=np.float64).reshape(-1, 3)
+    return to_hex(np.rint(arr.mean(axis=0)))
@@ -0,0 +1,187 @@
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
+
+BATCH_ROWS = 8192
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+
+
+async def iter_batches(chunks, batch_rows: int = BATCH_ROWS):
+    """
+    Parse an async stream of byte chunks as CSV, yielding lists of rows.
+    Only whole records are handed to the csv module, so quoted fields that
+    span chunk (or line) boundaries are kept intact.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buf = ""
+    batch = []
+    async for chunk in chunks:
+        buf += decoder.decode(chunk)
+        cut = buf.rfind("\n")
+        # Back off to a newline that is not inside an open quote
+        while cut != -1 and buf.count('"', 0, cut) % 2:
+            cut = buf.rfind("\n", 0, cut)
+        if cut == -1:
+            continue
+        batch.extend(csv.reader(io.StringIO(buf[:cut + 1])))
+        buf = buf[cut + 1:]
+        if len(batch) >= batch_rows:
+            yield batch
+            batch = []
+    buf += decoder.decode(b"", final=True)
+    if buf:
+        batch.extend(csv.reader(io.StringIO(buf)))
+    if batch:
+        yield batch
+
+
+# First characters float() can accept (digits, sign, point, space, inf/nan)
+_NUMERIC_START = frozenset("0123456789+-. \t\n\r\x0b\x0ciInN")
+
+
+def _cell_float(cell: str):
+    # Most cells in a text column fail this check, which is far cheaper than a raised ValueError
+    if cell[:1] not in _NUMERIC_START:
+        return None
+    try:
+        return float(cell)
+    except ValueError:
+        return None
+
+
+class _SumColumn:
+    """
+    Per-column state: numeric columns are summed a batch at a time; once a
+    column has held anything else it is parsed cell by cell for good, so
+    numbers further down a text column still count.
+    """
+
+    def __init__(self):
+        self.mixed = False
+
+    def total_above(self, values, cutoff: float) -> float:
+        if not self.mixed:
+            try:
+                if np is not None:
+                    arr = np.asarray(values, dtype=np.float64)
+                    return float(arr[arr > cutoff].sum())
+                return sum(v for v in map(float, values) if v > cutoff)
+            except ValueError:
+                self.mixed = True
+        return sum(v for v in map(_cell_float, values) if v is not None and v > cutoff)
+
+
+async def sum_above(chunks, cutoff: float) -> float:
+    """Sum of every numeric cell greater than `cutoff` (header and ragged rows included)."""
+    columns = []
+    total = 0.0
+    first = True
+    async for batch in iter_batches(chunks):
+        if first:
+            # The header row is checked cell by cell so it never poisons column typing
+            header, batch = batch[0], batch[1:]
+            total += sum(v for v in map(_cell_float, header) if v is not None and v > cutoff)
+            first = False
+        width = len(batch[0]) if batch else 0
+        regular = [row for row in batch if len(row) == width]
+        if len(regular) != len(batch):
+            for row in batch:
+                if len(row) != width:
+                    total += sum(v for v in map(_cell_float, row) if v is not None and v > cutoff)
+        if not regular:
+            continue
+        while len(columns) < width:
+            columns.append(_SumColumn())
+        for col, values in zip(columns, zip(*regular)):
+            total += col.total_above(values, cutoff)
+    return total
+
+
+# Column names that get typed during normalization
+INT_COLUMNS = {"id", "value", "salary", "age", "count"}
+DATE_COLUMNS = {"joined", "date", "signup_date"}
+
+
+def snake_case(name: str) -> str:
+    # "Full Name" -> "full_name"
+    return name.strip().lower().replace(" ", "_")
+
+
+def _int_or_raw(val: str):
+    try:
+        return int(val)
+    except ValueError:
+        return val
+
+
+class _DateColumn:
+    """Remembers which format matched last, so most cells need a single strptime."""
+
+    def __init__(self):
+        self.formats = list(DATE_FORMATS)
+
+    def __call__(self, val: str):
+        for i, fmt in enumerate(self.formats):
+            try:
+                dt = datetime.strptime(val, fmt)
+            except ValueError:
+                continue
+            if i:
+                self.formats.insert(0, self.formats.pop(i))
+            return dt.strftime("%Y-%m-%d")
+        return val
+
+
+async def normalized_rows(chunks):
+    """Rows as dicts with snake_case keys and typed id/number/date columns."""
+    keys = converters = None
+    async for batch in iter_batches(chunks):
+        if keys is None:
+            header, batch = batch[0], batch[1:]
+            keys = [snake_case(k) for k in header]
+            converters = [
+                _int_or_raw if k in INT_COLUMNS else _DateColumn() if k in DATE_COLUMNS else None
+                for k in keys
+            ]
+        for row in batch:
+            if not row:
+                continue
+            out = {}
+            for key, conv, val in zip(keys, converters, row):
+                val = val.strip()
+                out[key] = conv(val) if conv else val
+            yield out
+
+
+async def encode_sorted(rows, key: str = "id"):
+    """
+    JSON array of `rows` ordered by `key`, produced in chunks. Rows that already
+    arrive in order are encoded as they come; only out-of-order input is buffered.
+    """
+    encoder = json.JSONEncoder()
+    chunks = ["["]
+    pending = []
+    last = None
+    ordered = True
+    async for row in rows:
+        k = row.get(key, 0)
+        if ordered and (last is None or k >= last):
+            chunks.append((", " if len(chunks) > 1 else "") + "".join(encoder.iterencode(row)))
+            last = k
+            continue
+        ordered = False
+        pending.append(row)
+    if pending:
+        # Merge the already encoded prefix back in with the stragglers
+        done = json.loads("".join(chunks) + "]")
+        merged = sorted(done + pending, key=lambda x: x.get(key, 0))
+        return encoder.encode(merged)
+    chunks.append("]")
+    return "".join(chunks)
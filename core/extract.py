@@ -0,0 +1,138 @@
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+# The base URL for files seems to be the one in the logs
+BASE_FILE_URL = "https://tds-llm-analysis.s-anand.net/project2-reevals/"
+
+# Common files used in this project (mentioned by bare name in questions)
+KNOWN_FILES = [
+    "echo.json", "config.json", "database.sql", "contacts.csv",
+    "email.txt", "dates.txt", "numbers.txt", "comments.txt"
+]
+
+ASSET_EXTENSIONS = ("png", "jpg", "jpeg", "gif", "csv", "zip", "gz", "jsonl", "json",
+                    "opus", "mp3", "wav", "sql", "txt", "md", "pdf")
+
+# One scanner for everything we pull out of free text; named groups say what matched
+_SCAN = re.compile(
+    r"(?P<url>(?:https?://|(?<![\w.:/])/(?=\w))[^\s<>\"'`]+)"
+    r"|\b(?P<known>" + "|".join(re.escape(f) for f in KNOWN_FILES) + r")\b"
+    r"|\b(?P<secret_key>secret|code|token|key|password)\b\s*(?:is|:|=)\s*[\"']?(?P<secret>[A-Za-z0-9_\-]{4,})"
+    r"|\b(?P<param>[A-Za-z_]\w*)\b(?:\s*[:=]\s*|\s+)(?P<number>-?\d+(?:\.\d+)?)(?!\d|\.\d)",
+    re.IGNORECASE,
+)
+_SUBMIT_IN_HTML = re.compile(r'https?://[^\s<>"\']+/submit[^\s<>"\']*')
+_TRAILING = ".,;:!?)]}'\""
+
+
+class PageIndex:
+    """Everything a handler may need from a fetched page, resolved against the page URL."""
+
+    def __init__(self, page_url: str):
+        self.page_url = page_url
+        self.assets = {}      # extension -> [absolute url] (question text first, then markup)
+        self.links = []       # every other absolute URL, in order of appearance
+        self.known_files = []  # bare KNOWN_FILES names mentioned
+        self.submit_url = None
+        self.tokens = []      # secret-like values (text, comments, data-* attributes)
+        self.params = {}      # lower-cased name -> first number given for it
+        self.comments = []
+        self.data_attrs = {}  # data-* name -> first value
+
+    def asset(self, *extensions: str):
+        """First asset URL with any of `extensions` (earlier extensions win), or None."""
+        for ext in extensions:
+            if self.assets.get(ext):
+                return self.assets[ext][0]
+        return None
+
+    def all_assets(self) -> list:
+        seen = []
+        for urls in self.assets.values():
+            seen.extend(u for u in urls if u not in seen)
+        return seen
+
+    def known_file_urls(self) -> list:
+        return [f"{BASE_FILE_URL}{name}" for name in self.known_files]
+
+    def _add_url(self, raw: str):
+        raw = raw.rstrip(_TRAILING)
+        if not raw or raw == "/":
+            return
+        url = urljoin(self.page_url, raw)
+        path = urlsplit(url).path
+        ext = path.rsplit(".", 1)[-1].lower() if "." in path.rsplit("/", 1)[-1] else ""
+        if ext in ASSET_EXTENSIONS:
+            bucket = self.assets.setdefault(ext, [])
+            if url not in bucket:
+                bucket.append(url)
+        elif url not in self.links:
+            self.links.append(url)
+        if self.submit_url is None and "/submit" in path and url.startswith("http"):
+            self.submit_url = url
+
+    def _scan(self, text: str):
+        for m in _SCAN.finditer(text):
+            if m.group("url"):
+                self._add_url(m.group("url"))
+            elif m.group("known"):
+                name = m.group("known").lower()
+                if name not in self.known_files:
+                    self.known_files.append(name)
+            elif m.group("secret"):
+                self.tokens.append(m.group("secret"))
+            elif m.group("param"):
+                self.params.setdefault(m.group("param").lower(), _number(m.group("number")))
+
+
+def _number(raw: str):
+    return float(raw) if "." in raw else int(raw)
+
+
+class _DomScanner(HTMLParser):
+    def __init__(self, index: PageIndex):
+        super().__init__(convert_charrefs=True)
+        self.index = index
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if not value:
+                continue
+            if name in ("href", "src", "action", "data-src", "data-url"):
+                self.index._add_url(value)
+            if name.startswith("data-"):
+                self.index.data_attrs.setdefault(name[5:], value)
+                if any(k in name for k in ("secret", "code", "token", "key")):
+                    self.index.tokens.append(value)
+
+    def handle_comment(self, data):
+        comment = data.strip()
+        self.index.comments.append(comment)
+        if re.fullmatch(r"[0-9a-zA-Z_\-]{6,}", comment):
+            self.index.tokens.append(comment)
+
+
+def build_index(page_url: str, question: str = "", html: str = "") -> PageIndex:
+    """
+    One pass over the question text (the page's visible text), then one over
+    the markup's attributes and comments. Question-text hits come first everywhere.
+    """
+    index = PageIndex(page_url)
+    index._scan(question)
+    if html:
+        dom = _DomScanner(index)
+        dom.feed(html)
+        dom.close()
+        index._scan(" ".join(c for c in index.comments))
+        if index.submit_url is None:
+            # e.g. only mentioned inside an inline script
+            m = _SUBMIT_IN_HTML.search(html)
+            if m:
+                index.submit_url = m.group(0).rstrip(_TRAILING)
+    if index.submit_url is None:
+        # Fallback: domain + /submit
+        parts = urlsplit(page_url)
+        if parts.scheme and parts.netloc:
+            index.submit_url = f"{parts.scheme}://{parts.netloc}/submit"
+    return index
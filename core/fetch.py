@@ -1,22 +1,143 @@
-from playwright.async_api import async_playwright
+import asyncio
+import contextvars
 import logging
+import os
+import time
+from contextlib import contextmanager
+from core import budget, capture, extract, readiness, tracing
+from core.browser import pool
 
-async def fetch_page(url: str) -> dict:
+# Inside share_pages(), a page fetched by one chain is reused by the others this long
+PAGE_SHARE_TTL = float(os.getenv("PAGE_SHARE_TTL", "60"))
+
+stats = {"fetches": 0, "coalesced": 0, "shared_hits": 0}
+tracing.metrics.collect("quiz_page_fetch_events_total", "Page fetches, and fetches served by another chain's.",
+                        "counter", lambda: [({"event": k}, v) for k, v in stats.items()])
+
+_inflight = {}
+_shared_pages = contextvars.ContextVar("shared_pages", default=None)
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def _page(url: str, html: str, body: str, timings: dict, strategy: str) -> dict:
+    question = body.strip()
+    t0 = time.perf_counter()
+    # Single extraction pass; handlers read URLs/params from here instead of re-scanning
+    index = extract.build_index(url, question, html)
+    timings["extract_ms"] = _ms(t0)
+    return {"html": html, "question": question, "index": index, "timings": timings, "strategy": strategy}
+
+@contextmanager
+def share_pages(pages: dict = None):
+    """
+    Reuse pages across every chain in this block (and tasks started in it)
+    for PAGE_SHARE_TTL seconds. Pass the same `pages` dict to share between tasks.
+    """
+    token = _shared_pages.set({} if pages is None else pages)
+    try:
+        yield
+    finally:
+        _shared_pages.reset(token)
+
+async def fetch_page(url: str, strategies: list = None, selector: str = None, text: str = None) -> dict:
+    """
+    Fetch a quiz page, trying the cheapest readiness strategy first
+    (see core.readiness) and remembering which one worked for this URL pattern.
+    Concurrent fetches of the same URL share one render.
+    """
+    # Recordings need every chain's own fetch
+    if strategies or selector or text or capture.recording():
+        return await _fetch_page(url, strategies, selector, text)
+    pages = _shared_pages.get()
+    if pages is not None:
+        hit = pages.get(url)
+        if hit is not None and hit[0] > time.monotonic():
+            stats["shared_hits"] += 1
+            return dict(hit[1])
+    entry = _inflight.get(url)  # [task, waiters]
+    if entry is None:
+        entry = _inflight[url] = [asyncio.ensure_future(_fetch_page(url, None, None, None)), 0]
+        entry[0].add_done_callback(lambda _: _forget(url, entry))
+    else:
+        stats["coalesced"] += 1
+    entry[1] += 1
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
-            # 15s timeout for page load
-            await page.goto(url, wait_until="networkidle", timeout=15000)
-            # Small wait for JS rendering
-            await page.wait_for_timeout(1000)
-            
-            html = await page.content()
-            text = await page.text_content("body")
-            
-            await browser.close()
-            return {"html": html, "question": text.strip() if text else ""}
+        page = await asyncio.shield(entry[0])
+    finally:
+        entry[1] -= 1
+        # A render nobody waits for any more (e.g. a cancelled prefetch) is stopped
+        if entry[1] == 0 and not entry[0].done():
+            entry[0].cancel()
+            _forget(url, entry)
+    if page is None:
+        return None
+    if pages is not None:
+        pages[url] = (time.monotonic() + PAGE_SHARE_TTL, page)
+    # Callers get their own dict; the parsed index inside is shared read-only
+    return dict(page)
+
+def _forget(url: str, entry: list):
+    if _inflight.get(url) is entry:
+        del _inflight[url]
+
+async def _fetch_page(url: str, strategies: list, selector: str, text: str) -> dict:
+    stats["fetches"] += 1
+    with tracing.span("fetch_page", url=url) as sp:
+        if capture.replaying():
+            html, body, timings = capture.replay_page(url)
+            page = _page(url, html, body, {"captured": timings}, "replay")
+        else:
+            page = await _fetch(url, strategies, selector, text)
+        if page is None:
+            sp.fail("no content")
+            return None
+        sp.set(strategy=page["strategy"], bytes=len(page["html"]), **page["timings"])
+        if capture.recording():
+            capture.record_page(url, page["html"], page["question"], page["strategy"], page["timings"])
+        return page
+
+async def _fetch(url: str, strategies: list, selector: str, text: str) -> dict:
+    timings = {}
+    order = readiness.plan(url, strategies)
+    try:
+        # 1. No browser at all if the page is static
+        if order and order[0] == "http":
+            order = order[1:]
+            t0 = time.perf_counter()
+            try:
+                result = await readiness.via_http(url)
+            except Exception as e:
+                logging.warning(f"HTTP fetch failed, falling back to browser: {e}")
+                result = None
+            timings["http_ms"] = _ms(t0)
+            if result and result[1].strip():
+                readiness.remember(url, "http")
+                html, body = result
+                return _page(url, html, body, timings, "http")
+
+        # 2. Browser strategies, cheapest first, on one leased page
+        if order and not budget.affords(budget.BROWSER_MIN_SECONDS):
+            raise RuntimeError("Too little time left for a browser render")
+        last_error = None
+        async with pool.page(timings) as page:
+            for strategy in order:
+                t0 = time.perf_counter()
+                try:
+                    if not await readiness.wait_ready(page, url, strategy, selector, text):
+                        continue
+                    html = await page.content()
+                    body = await page.text_content("body")
+                except Exception as e:
+                    last_error = e
+                    logging.warning(f"Readiness '{strategy}' failed for {url}: {e}")
+                    continue
+                finally:
+                    timings[f"{strategy}_ms"] = _ms(t0)
+                if body and body.strip():
+                    readiness.remember(url, strategy)
+                    return _page(url, html, body, timings, strategy)
+        raise RuntimeError(f"No readiness strategy produced content ({last_error})")
     except Exception as e:
         logging.error(f"Fetch error: {e}")
         return None
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import os
+import random
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+import httpx
+from core import budget, tracing
+
+logger = logging.getLogger(__name__)
+
+# Per call class: (total timeout seconds, retries)
+CALL_CLASSES = {
+    "page": (float(os.getenv("HTTP_PAGE_TIMEOUT", "15")), int(os.getenv("HTTP_PAGE_RETRIES", "1"))),
+    "asset": (float(os.getenv("HTTP_ASSET_TIMEOUT", "30")), int(os.getenv("HTTP_ASSET_RETRIES", "2"))),
+    "submit": (float(os.getenv("HTTP_SUBMIT_TIMEOUT", "30")), int(os.getenv("HTTP_SUBMIT_RETRIES", "2"))),
+    "llm": (float(os.getenv("HTTP_LLM_TIMEOUT", "60")), int(os.getenv("HTTP_LLM_RETRIES", "2"))),
+}
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "4"))
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "10"))
+# A retry is only worth it with at least this long left after the backoff
+MIN_RETRY_SECONDS = float(os.getenv("HTTP_MIN_RETRY_SECONDS", "2"))
+
+REQUESTS = tracing.metrics.counter("quiz_http_requests_total", "Outbound HTTP responses by call class and status.")
+RETRIES = tracing.metrics.counter("quiz_http_retries_total", "Outbound HTTP retries by call class.")
+
+RETRY_STATUS = {429, 502, 503, 504}
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS"}
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = os.getenv("HTTP2", "1") != "0"
+except ImportError:
+    HTTP2 = False
+
+_client = None
+_host_slots = {}
+
+
+def create_client(transport: httpx.AsyncBaseTransport = None) -> httpx.AsyncClient:
+    kwargs = {
+        "follow_redirects": True,
+        "timeout": httpx.Timeout(CALL_CLASSES["asset"][0], connect=CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    }
+    if transport is not None:
+        kwargs["transport"] = transport
+    else:
+        kwargs["http2"] = HTTP2
+    return httpx.AsyncClient(**kwargs)
+
+
+async def start():
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+        logger.info(f"HTTP client ready (http2={HTTP2}, per-host limit={PER_HOST_LIMIT})")
+
+
+async def stop():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    # Semaphores belong to the loop that used them; a later loop starts afresh
+    _host_slots.clear()
+
+
+def get_client() -> httpx.AsyncClient:
+    """Provider for the app-scoped client; created lazily outside the lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+def set_client(client: httpx.AsyncClient) -> httpx.AsyncClient:
+    """Install `client` as the shared client and return the previous one."""
+    global _client
+    previous, _client = _client, client
+    return previous
+
+
+@contextmanager
+def override(transport: httpx.AsyncBaseTransport = None, client: httpx.AsyncClient = None):
+    """Temporarily route every outbound call through `client` (or a client on `transport`)."""
+    client = client or create_client(transport)
+    previous = set_client(client)
+    try:
+        yield client
+    finally:
+        set_client(previous)
+
+
+def timeout_for(kind: str) -> httpx.Timeout:
+    """Timeout of call class `kind`, capped by what is left of the chain's budget."""
+    total, _ = CALL_CLASSES.get(kind, CALL_CLASSES["asset"])
+    total = budget.timeout(total, submit=kind == "submit")
+    return httpx.Timeout(total, connect=min(CONNECT_TIMEOUT, total))
+
+
+def _backoff(attempt: int, retry_after: str = None) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX) * (0.5 + random.random() / 2)
+
+
+def _slot(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    if host not in _host_slots:
+        _host_slots[host] = asyncio.Semaphore(PER_HOST_LIMIT)
+    return _host_slots[host]
+
+
+async def request(method: str, url: str, kind: str = "asset", **kwargs) -> httpx.Response:
+    """
+    Send a request on the shared client with the timeout/retry policy of `kind`.
+    Non-idempotent requests (submits) are only retried when the connection
+    was never established, so an answer is never posted twice.
+    """
+    method = method.upper()
+    _, retries = CALL_CLASSES.get(kind, CALL_CLASSES["asset"])
+    kwargs.setdefault("timeout", timeout_for(kind))
+    with tracing.span("http", method=method, kind=kind, host=urlsplit(url).netloc) as sp:
+        resp = await _request(get_client(), method, url, kind, retries, sp, **kwargs)
+        sp.set(status=resp.status_code, bytes=len(resp.content))
+        REQUESTS.inc(kind=kind, status=resp.status_code)
+        return resp
+
+
+async def _request(client, method, url, kind, retries, sp, **kwargs) -> httpx.Response:
+    attempt = 0
+    while True:
+        sp.set(retries=attempt)
+        try:
+            async with _slot(url):
+                resp = await client.request(method, url, **kwargs)
+            if resp.status_code in RETRY_STATUS and method in IDEMPOTENT and attempt < retries:
+                delay = _backoff(attempt, resp.headers.get("retry-after"))
+                if not budget.affords(delay + MIN_RETRY_SECONDS, submit=kind == "submit"):
+                    return resp
+                logger.warning(f"{method} {url} -> HTTP {resp.status_code}, retrying in {delay:.2f}s")
+                RETRIES.inc(kind=kind)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            return resp
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            error = e
+        except httpx.TransportError as e:
+            if method not in IDEMPOTENT:
+                raise
+            error = e
+        delay = _backoff(attempt)
+        if attempt >= retries or not budget.affords(delay + MIN_RETRY_SECONDS, submit=kind == "submit"):
+            raise error
+        logger.warning(f"{method} {url} failed ({error!r}), retrying in {delay:.2f}s")
+        RETRIES.inc(kind=kind)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+@asynccontextmanager
+async def stream(method: str, url: str, kind: str = "asset", **kwargs):
+    """
+    Streaming variant of request(): yields the response before the body is read.
+    Only connection failures are retried, since a body may already be half consumed.
+    """
+    method = method.upper()
+    _, retries = CALL_CLASSES.get(kind, CALL_CLASSES["asset"])
+    kwargs.setdefault("timeout", timeout_for(kind))
+    client = get_client()
+    attempt = 0
+    with tracing.span("http", method=method, kind=kind, host=urlsplit(url).netloc, stream=True) as sp:
+        async with _slot(url):
+            while True:
+                try:
+                    resp = await client.send(client.build_request(method, url, **kwargs), stream=True)
+                    break
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                    delay = _backoff(attempt)
+                    if attempt >= retries or not budget.affords(delay + MIN_RETRY_SECONDS, submit=kind == "submit"):
+                        raise
+                    logger.warning(f"{method} {url} failed ({e!r}), retrying in {delay:.2f}s")
+                    RETRIES.inc(kind=kind)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+            sp.set(status=resp.status_code, retries=attempt)
+            REQUESTS.inc(kind=kind, status=resp.status_code)
+            try:
+                yield resp
+            finally:
+                sp.set(bytes=resp.num_bytes_downloaded)
+                await resp.aclose()
+
+
+async def get(url: str, kind: str = "asset", **kwargs) -> httpx.Response:
+    return await request("GET", url, kind, **kwargs)
+
+
+async def post(url: str, kind: str = "submit", **kwargs) -> httpx.Response:
+    return await request("POST", url, kind, **kwargs)
@@ -0,0 +1,237 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from core import shared, tracing
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "500"))
+# Shared snapshots of a running job are written at most this often
+JOB_SNAPSHOT_SECONDS = float(os.getenv("JOB_SNAPSHOT_SECONDS", "0.5"))
+# Latest events carried in a snapshot (for remote SSE)
+JOB_SNAPSHOT_EVENTS = int(os.getenv("JOB_SNAPSHOT_EVENTS", "200"))
+# Identifies this process in job snapshots other workers read
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+TERMINAL = ("done", "failed")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, fn, args: tuple, meta: dict = None):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.args = args
+        self.meta = meta or {}
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.steps = {}
+        self.events = []
+        self.result = None
+        self.error = None
+        self.on_change = None
+        self._listeners = []
+
+    def emit(self, event: dict):
+        self.events.append(event)
+        if "step" in event:
+            step = self.steps.setdefault(event["step"], {"step": event["step"]})
+            step.update({k: v for k, v in event.items() if k not in ("type", "time")})
+            step["status"] = event["type"]
+        for queue in self._listeners:
+            queue.put_nowait(event)
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        if self.status in TERMINAL:
+            queue.put_nowait(None)
+        else:
+            self._listeners.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._listeners:
+            self._listeners.remove(queue)
+
+    def _close(self):
+        for queue in self._listeners:
+            queue.put_nowait(None)
+        self._listeners.clear()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "worker": WORKER_ID,
+            **self.meta,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_ms": round((self.finished_at - self.started_at) * 1000, 1)
+            if self.finished_at and self.started_at else None,
+            "steps": [self.steps[k] for k in sorted(self.steps)],
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Runs queued jobs on a fixed number of worker tasks.
+    `fn(*args, on_event=job.emit)` is awaited for each job.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_max: int = JOB_QUEUE_MAX, history: int = JOB_HISTORY):
+        self.workers = workers
+        self.queue_max = queue_max
+        self.history = history
+        self.jobs = OrderedDict()
+        self._queue = None
+        self._tasks = []
+        self._dirty = set()
+        self._flushes = {}  # job id -> (flush task, wake-up event)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(self.queue_max)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Job manager started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, fn, *args, **meta) -> Job:
+        if self._queue is None:
+            raise RuntimeError("JobManager not started")
+        job = Job(fn, args, meta)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"{self.queue_max} jobs already queued")
+        self.jobs[job.id] = job
+        job.on_change = self._share
+        self._share(job)
+        while len(self.jobs) > self.history:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.status not in TERMINAL:
+                break
+            self.jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def _share(self, job: Job):
+        # Snapshot to the shared store, so whichever worker gets /jobs/{id} can answer.
+        # Changes are coalesced: one writer per job, at most one write per JOB_SNAPSHOT_SECONDS
+        self._dirty.add(job.id)
+        flush = self._flushes.get(job.id)
+        if flush is None:
+            wake = asyncio.Event()
+            self._flushes[job.id] = (asyncio.ensure_future(self._flush(job, wake)), wake)
+        elif job.status in TERMINAL:
+            flush[1].set()
+
+    async def _flush(self, job: Job, wake: asyncio.Event):
+        try:
+            while job.id in self._dirty:
+                self._dirty.discard(job.id)
+                await shared.save_job(self._snapshot(job))
+                if job.status not in TERMINAL:
+                    # The terminal status is written as soon as it is reached
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(wake.wait(), JOB_SNAPSHOT_SECONDS)
+        finally:
+            self._flushes.pop(job.id, None)
+
+    @staticmethod
+    def _snapshot(job: Job) -> dict:
+        return {**job.to_dict(), "events": job.events[-JOB_SNAPSHOT_EVENTS:], "event_count": len(job.events)}
+
+    async def _worker(self, n: int):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            job.emit({"type": "job_started", "time": job.started_at})
+            try:
+                job.result = await job.fn(*job.args, on_event=job.emit)
+                job.status = "done"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "cancelled"
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                job.emit({"type": f"job_{job.status}", "time": job.finished_at, "error": job.error})
+                job._close()
+                self._queue.task_done()
+
+
+async def sse_stream(job: Job):
+    """Server-sent events for `job`: past events first, then live ones until it finishes."""
+    queue = job.subscribe()
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    finally:
+        job.unsubscribe(queue)
+
+
+async def sse_remote(job_id: str, poll: float = 0.5):
+    """sse_stream for a job run by another worker, fed from its shared snapshots."""
+    sent = 0
+    while True:
+        snapshot = await shared.load_job(job_id)
+        if snapshot is None:
+            break
+        # Snapshots carry only the latest events; older ones are gone
+        events = snapshot.get("events", [])
+        total = snapshot.get("event_count", len(events))
+        for event in events[max(0, sent - (total - len(events))):]:
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        sent = total
+        if snapshot["status"] in TERMINAL:
+            break
+        await asyncio.sleep(poll)
+
+
+# Process-wide manager, started/stopped by the app lifespan
+manager = JobManager()
+
+
+def _job_counts():
+    counts = {status: 0 for status in ("queued", "running", *TERMINAL)}
+    for job in manager.jobs.values():
+        counts[job.status] += 1
+    return [({"status": k}, v) for k, v in counts.items()]
+
+
+tracing.metrics.collect("quiz_jobs", "Jobs held by the manager, by status.", "gauge", _job_counts)
@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from core import budget, capture, http_client, tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+BACKEND = os.getenv("LLM_BACKEND", "openai")
+PROXY_BASE_URL = "https://aiproxy.sanand.workers.dev/openai/v1"
+# Token budget for file context packed into a prompt
+CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "6000"))
+CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+REQUESTS_PER_MINUTE = float(os.getenv("LLM_RPM", "60"))
+RETRIES = int(os.getenv("LLM_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a ~4 chars/token estimate
+    tiktoken = None
+
+
+# ----------------------------------------------------------------------
+# Token budgeting
+# ----------------------------------------------------------------------
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.encoding_for_model(DEFAULT_MODEL)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("o200k_base")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    enc = _get_encoding()
+    return len(enc.encode(text)) if enc else (len(text) + 3) // 4
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """Cut `text` to at most `budget` tokens, keeping the head."""
+    enc = _get_encoding()
+    if enc is None:
+        return text if len(text) <= budget * 4 else text[: budget * 4]
+    tokens = enc.encode(text)
+    return text if len(tokens) <= budget else enc.decode(tokens[:budget])
+
+
+def pack_context(files: list, budget: int = CONTEXT_TOKENS) -> str:
+    """
+    Render [(name, content)] as prompt sections within `budget` tokens.
+    Small files go in whole; the budget left over is shared by the large ones.
+    """
+    sized = sorted(((count_tokens(c), n, c) for n, c in files), key=lambda x: x[0])
+    sections = {}
+    remaining = budget
+    for i, (tokens, name, content) in enumerate(sized):
+        share = remaining // (len(sized) - i)
+        if tokens <= share:
+            sections[name] = content
+            remaining -= tokens
+        else:
+            sections[name] = truncate_tokens(content, share) + f"\n...(truncated, {tokens - share} more tokens)"
+            remaining -= share
+    return "".join(
+        f"\n\n--- Content of {name} ---\n{sections[name]}\n---------------------" for name, _ in files
+    )
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+class Backend:
+    name = "base"
+    key = "default"
+
+    async def chat(self, messages: list, model: str, temperature: float):
+        """Return (text, usage dict with prompt/completion/cached tokens)."""
+        raise NotImplementedError
+
+
+class OpenAIBackend(Backend):
+    name = "openai"
+
+    def __init__(self):
+        self._client = None
+        self._http = None
+        self.token = os.environ.get("AIPROXY_TOKEN") or os.environ.get("OPENAI_API_KEY")
+        # Limits are enforced per API key
+        self.key = hashlib.sha256((self.token or "").encode()).hexdigest()[:12]
+
+    def client(self):
+        # Rebuilt whenever the shared connection pool is (after http_client.stop() or an override)
+        shared_http = http_client.get_client()
+        if self._client is None or self._http is not shared_http:
+            from openai import AsyncOpenAI
+
+            if not self.token:
+                raise RuntimeError("No API Token found in environment variables.")
+            # Reuse the shared connection pool; retries are handled by the gateway
+            self._http = shared_http
+            args = {
+                "api_key": self.token,
+                "http_client": shared_http,
+                # Per-call limits (and the chain budget) are applied by the gateway
+                "timeout": http_client.CALL_CLASSES["llm"][0],
+                "max_retries": 0,
+            }
+            # Check if it's a real OpenAI key or a Proxy Token
+            if not self.token.startswith("sk-"):
+                args["base_url"] = PROXY_BASE_URL
+            self._client = AsyncOpenAI(**args)
+        return self._client
+
+    async def chat(self, messages: list, model: str, temperature: float):
+        response = await self.client().chat.completions.create(
+            model=model, messages=messages, temperature=temperature
+        )
+        usage = response.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        return response.choices[0].message.content.strip(), {
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "completion_tokens": usage.completion_tokens if usage else 0,
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        }
+
+
+class MockBackend(Backend):
+    """
+    Offline stand-in. `reply` is a fixed string or a callable(messages) -> str;
+    defaults to $LLM_MOCK_REPLY.
+    """
+    name = "mock"
+    key = "mock"
+
+    def __init__(self, reply=None, delay: float = 0.0):
+        self.reply = reply if reply is not None else os.getenv("LLM_MOCK_REPLY", "0")
+        self.delay = delay
+        self.calls = []
+
+    async def chat(self, messages: list, model: str, temperature: float):
+        self.calls.append(messages)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        text = self.reply(messages) if callable(self.reply) else self.reply
+        prompt = sum(count_tokens(m["content"]) for m in messages)
+        return text, {"prompt_tokens": prompt, "completion_tokens": count_tokens(text), "cached_tokens": 0}
+
+
+BACKENDS = {"openai": OpenAIBackend, "mock": MockBackend}
+_backend = None
+
+
+def get_backend() -> Backend:
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[BACKEND]()
+    return _backend
+
+
+def set_backend(backend: Backend) -> Backend:
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+def openai_client():
+    """The pooled AsyncOpenAI client (also used for Whisper)."""
+    backend = get_backend()
+    if not isinstance(backend, OpenAIBackend):
+        backend = OpenAIBackend()
+    return backend.client()
+
+
+# ----------------------------------------------------------------------
+# Limits
+# ----------------------------------------------------------------------
+class RateLimiter:
+    """Token bucket: `rate` requests per minute, bursting up to `burst`."""
+
+    def __init__(self, rate: float = REQUESTS_PER_MINUTE, burst: int = CONCURRENCY):
+        self.rate = rate / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_limits = {}
+
+
+def _limits_for(key: str):
+    if key not in _limits:
+        _limits[key] = (asyncio.Semaphore(CONCURRENCY), RateLimiter())
+    return _limits[key]
+
+
+def stop():
+    """Drop loop-bound limits, so a later event loop (lifespan restart, bench, tests) starts afresh."""
+    _limits.clear()
+
+
+def _retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "RateLimitError", "TimeoutError")
+
+
+# ----------------------------------------------------------------------
+# Gateway
+# ----------------------------------------------------------------------
+_inflight = {}
+calls = deque(maxlen=200)  # recent per-call reports
+stats = {"calls": 0, "coalesced": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+tracing.metrics.collect("quiz_llm_events_total", "LLM gateway calls, retries and token usage.", "counter",
+                        lambda: [({"event": k}, v) for k, v in stats.items()])
+
+
+async def _call(backend: Backend, messages: list, model: str, temperature: float) -> str:
+    sem, limiter = _limits_for(backend.key)
+    attempt = 0
+    with tracing.span("llm", model=model, backend=backend.name) as sp:
+        async with sem:
+            while True:
+                await limiter.acquire()
+                t0 = time.perf_counter()
+                try:
+                    text, usage = await asyncio.wait_for(
+                        backend.chat(messages, model, temperature), budget.timeout(http_client.CALL_CLASSES["llm"][0])
+                    )
+                except Exception as e:
+                    delay = BACKOFF_BASE * (2 ** attempt) * (0.5 + random.random() / 2)
+                    if attempt >= RETRIES or not _retryable(e) or not budget.affords(delay + budget.LLM_MIN_SECONDS):
+                        raise
+                    logger.warning(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+                    stats["retries"] += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                latency = round((time.perf_counter() - t0) * 1000, 1)
+                report = {"model": model, "backend": backend.name, "latency_ms": latency, **usage}
+                calls.append(report)
+                stats["calls"] += 1
+                for k in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                    stats[k] += usage.get(k, 0)
+                sp.set(retries=attempt, **usage)
+                logger.info(f"LLM call: {report}")
+                return text
+
+
+async def complete(system: str, question: str, context: str = "", model: str = DEFAULT_MODEL,
+                   temperature: float = 0.1) -> str:
+    """
+    One chat completion. The static system prompt comes first and the
+    per-question text last, so repeated calls share a cacheable prefix.
+    Identical concurrent requests share a single upstream call.
+    """
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": f"{context.strip()}\n\nQuestion: {question}" if context else f"Question: {question}"},
+    ]
+    if capture.replaying():
+        # Keyed on the prompt only, so the replay does not depend on which backend recorded it
+        return capture.replay_llm(_prompt_key(messages, model))
+    backend = get_backend()
+    key = hashlib.sha256(json.dumps([backend.name, model, temperature, messages]).encode()).hexdigest()
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_call(backend, messages, model, temperature))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        stats["coalesced"] += 1
+    text = await asyncio.shield(task)
+    if capture.recording():
+        capture.record_llm(_prompt_key(messages, model), messages, model, text)
+    return text
+
+
+def _prompt_key(messages: list, model: str) -> str:
+    return hashlib.sha256(json.dumps([model, messages]).encode()).hexdigest()
@@ -0,0 +1,200 @@
+import asyncio
+import gzip
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Below this much uncompressed data, forking workers costs more than it saves
+PARALLEL_MIN_BYTES = int(os.getenv("LOGS_PARALLEL_MIN_BYTES", str(8 * 1024 * 1024)))
+MAX_WORKERS = int(os.getenv("LOGS_MAX_WORKERS", str(os.cpu_count() or 2)))
+
+_pool = None
+
+
+@dataclass(frozen=True)
+class AggSpec:
+    """sum/count of `field` over JSON lines matching every (key, value) in `where`, optionally per `group_by`."""
+    op: str = "sum"
+    field: str = "bytes"
+    where: tuple = (("event", "download"),)
+    group_by: str = None
+
+    def needles(self) -> tuple:
+        # Raw substrings a line must contain before it is worth parsing
+        return tuple(str(v).encode() for _, v in self.where)
+
+    def matches(self, obj: dict) -> bool:
+        return all(str(obj.get(k)) == str(v) for k, v in self.where)
+
+
+def spec_from_question(question: str) -> AggSpec:
+    """
+    Best-effort spec from the wording, or None when the question names no
+    filter this can trust. Only a sum of bytes without a filter defaults to
+    download events (the classic question).
+    """
+    q = question.lower()
+    where = []
+    for key, value in re.findall(
+        r'\b(?:where|with|whose|if)\s+["\']?(\w+)["\']?\s*(?:==|=|\bis\b)\s*["\']([\w.\-/]+)["\']', question, re.IGNORECASE
+    ):
+        where.append((key, value))
+    if not where:
+        where = _implied_filters(question)
+    op = "count" if re.search(r'\bhow many\b|\bcount\b|\bnumber of\b', q) and "bytes" not in q else "sum"
+    agg_field = _agg_field(question) if op == "sum" else "bytes"
+    if not where:
+        if op == "sum" and _BYTES_WORDS.search(question):
+            where = [("event", "download")]
+        elif op == "count" or agg_field is None:
+            # Counting every line, or summing an unnamed field, is a guess
+            return None
+    m = re.search(r'\b(?:group(?:ed)?\s+by|for each)\s+["\']?(\w+)["\']?', question, re.IGNORECASE)
+    group_by = m.group(1) if m else None
+    return AggSpec(op=op, field=agg_field or "bytes", where=tuple(where), group_by=group_by)
+
+
+# "returned status 404", "with status code 500"
+_STATUS = re.compile(r'\bstatus(?:\s+code)?\s+(?:of\s+)?(\d{3})\b', re.IGNORECASE)
+# "error events", "download event": the word names the event
+_EVENT = re.compile(r'\b(\w+)\s+events?\b', re.IGNORECASE)
+_NOT_EVENTS = {"all", "the", "of", "these", "those", "log", "logged", "any", "many", "number", "total", "matching", "each"}
+
+
+def _implied_filters(question: str) -> list:
+    where = [("status", m.group(1)) for m in _STATUS.finditer(question)][:1]
+    for m in _EVENT.finditer(question):
+        if m.group(1).lower() not in _NOT_EVENTS:
+            where.append(("event", m.group(1).lower()))
+            break
+    return where
+
+
+_QUOTED_FIELD = re.compile(r'\b(?:sum|total)\s+(?:of\s+)?(?:the\s+)?["\'](\w+)["\']', re.IGNORECASE)
+# "total size", "sum of download bytes", "bandwidth used"
+_BYTES_WORDS = re.compile(r'\b(?:size|sizes|bytes?|bandwidth|volume)\b', re.IGNORECASE)
+# "total of X", "the sum of the X", "total amount of X": the noun after "of"
+_OF_FIELD = re.compile(
+    r'\b(?:sum|total)\s+(?:(?:amount|combined|overall|value|values)\s+)*of\s+(?:the\s+|all\s+)?(\w+)',
+    re.IGNORECASE,
+)
+# "sum the latency of ...": the first word
+_FIRST_FIELD = re.compile(r'\b(?:sum|total)\s+(?:the\s+)?(\w+)', re.IGNORECASE)
+
+
+def _agg_field(question: str) -> str:
+    """The JSON field to sum (size and byte wording always means `bytes`), or None when none is named."""
+    m = _QUOTED_FIELD.search(question)
+    if m:
+        return m.group(1)
+    if _BYTES_WORDS.search(question):
+        return "bytes"
+    m = _OF_FIELD.search(question) or _FIRST_FIELD.search(question)
+    if m and m.group(1).lower() not in ("number", "count", "amount"):
+        return m.group(1)
+    return None
+
+
+def _aggregate_lines(lines, spec: AggSpec) -> dict:
+    totals = {}
+    needles = spec.needles()
+    for line in lines:
+        if not all(n in line for n in needles):
+            continue
+        try:
+            obj = _loads(line)
+        except ValueError:
+            continue
+        if not isinstance(obj, dict) or not spec.matches(obj):
+            continue
+        key = str(obj.get(spec.group_by)) if spec.group_by else ""
+        if spec.op == "count":
+            totals[key] = totals.get(key, 0) + 1
+        else:
+            value = obj.get(spec.field, 0)
+            if isinstance(value, (int, float)):
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+class _Mapped(mmap.mmap):
+    # zipfile wants a seekable() file object; mmap only grows one in Python 3.13
+    def seekable(self):
+        return True
+
+
+def _open_member(archive: zipfile.ZipFile, name: str):
+    raw = archive.open(name)
+    return gzip.GzipFile(fileobj=raw) if name.endswith(".gz") else raw
+
+
+def aggregate_member(path: str, name: str, spec: AggSpec) -> dict:
+    """Aggregate one archive member; runs inside worker processes."""
+    with open(path, "rb") as f, _Mapped(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with zipfile.ZipFile(mm) as archive, _open_member(archive, name) as member:
+            return _aggregate_lines(member, spec)
+
+
+def aggregate_stream(path: str, spec: AggSpec) -> dict:
+    """Plain or gzip-compressed JSON-lines file (not a zip)."""
+    with open(path, "rb") as f:
+        gz = f.read(2) == b"\x1f\x8b"
+    with (gzip.open(path, "rb") if gz else open(path, "rb")) as f:
+        return _aggregate_lines(f, spec)
+
+
+def _merge(parts) -> dict:
+    totals = {}
+    for part in parts:
+        for k, v in part.items():
+            totals[k] = totals.get(k, 0) + v
+    return totals
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Never fork the server itself: its threads (to_thread workers, SQLite
+        # connections) may hold locks a forked child would inherit held
+        context = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=context)
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def aggregate(path: str, spec: AggSpec) -> dict:
+    """Aggregate a downloaded log archive at `path`; zip members are spread across processes."""
+    if not zipfile.is_zipfile(path):
+        return await asyncio.to_thread(aggregate_stream, path, spec)
+    with zipfile.ZipFile(path) as archive:
+        infos = [i for i in archive.infolist() if not i.is_dir()]
+    total_size = sum(i.file_size for i in infos)
+    names = [i.filename for i in infos]
+    if len(names) > 1 and total_size >= PARALLEL_MIN_BYTES:
+        loop = asyncio.get_running_loop()
+        pool = _get_pool()
+        logger.info(f"Aggregating {len(names)} members ({total_size} bytes) across {MAX_WORKERS} processes")
+        parts = await asyncio.gather(*(loop.run_in_executor(pool, aggregate_member, path, n, spec) for n in names))
+    else:
+        parts = await asyncio.to_thread(lambda: [aggregate_member(path, n, spec) for n in names])
+    return _merge(parts)
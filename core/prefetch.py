@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from core import answers, assets, extract
+from core.fetch import fetch_page
+
+logger = logging.getLogger(__name__)
+
+
+def asset_urls(index: extract.PageIndex) -> list:
+    """Every data file the page points at, in the question text or the markup."""
+    return answers.referenced_assets(index)
+
+
+def _swallow(task: asyncio.Task):
+    # Failures surface again when a handler fetches the same URL
+    if not task.cancelled() and task.exception() is not None:
+        logger.info(f"Prefetch failed: {task.exception()}")
+
+
+def start_downloads(urls: list) -> list:
+    """Start downloading `urls` into the asset cache without waiting for them."""
+    tasks = []
+    for url in urls:
+        task = asyncio.create_task(assets.cache.ensure(url))
+        task.add_done_callback(_swallow)
+        tasks.append(task)
+    if urls:
+        logger.info(f"Prefetching {len(urls)} assets")
+    return tasks
+
+
+class PagePrefetch:
+    """At most one speculative page render, started as soon as the next URL is known."""
+
+    def __init__(self):
+        self.url = None
+        self.task = None
+
+    def start(self, url: str):
+        self.cancel()
+        self.url = url
+        self.task = asyncio.create_task(fetch_page(url))
+
+    async def take(self, url: str):
+        """Page data for `url`, reusing the speculative render when it matches."""
+        if self.task is not None and self.url == url:
+            task, self.task, self.url = self.task, None, None
+            return await task
+        self.cancel()
+        return await fetch_page(url)
+
+    def cancel(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self.task, self.url = None, None
@@ -0,0 +1,111 @@
+import logging
+import os
+import re
+from urllib.parse import urlsplit
+from core import budget, http_client, static_page
+
+logger = logging.getLogger(__name__)
+
+# Cheapest first. Override with FETCH_STRATEGIES="http,mutation,networkidle"
+STRATEGIES = ["http", "mutation", "selector", "networkidle"]
+DEFAULT_STRATEGIES = [
+    s.strip() for s in os.getenv("FETCH_STRATEGIES", ",".join(STRATEGIES)).split(",") if s.strip() in STRATEGIES
+]
+READY_SELECTOR = os.getenv("FETCH_READY_SELECTOR")
+READY_TEXT = os.getenv("FETCH_READY_TEXT")
+QUIET_MS = int(os.getenv("FETCH_QUIET_MS", "300"))
+MAX_WAIT_MS = int(os.getenv("FETCH_MAX_WAIT_MS", "5000"))
+GOTO_TIMEOUT_MS = int(os.getenv("FETCH_GOTO_TIMEOUT_MS", "15000"))
+
+# Resolves once the DOM has seen no mutations for `quietMs` (or `maxMs` passed)
+QUIESCENCE_JS = """
+([quietMs, maxMs]) => new Promise(resolve => {
+    const start = performance.now();
+    let last = start;
+    const obs = new MutationObserver(() => { last = performance.now(); });
+    obs.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    const tick = () => {
+        const now = performance.now();
+        if (now - last >= quietMs || now - start >= maxMs) {
+            obs.disconnect();
+            resolve(Math.round(now - start));
+        } else {
+            setTimeout(tick, 25);
+        }
+    };
+    setTimeout(tick, 25);
+})
+"""
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+# url pattern -> name of the cheapest strategy that produced content there
+_learned = {}
+
+
+def url_pattern(url: str) -> str:
+    parts = urlsplit(url)
+    path = _NUMERIC_SEGMENT.sub("/*", parts.path.rstrip("/"))
+    return f"{parts.netloc}{path}"
+
+
+def plan(url: str, strategies: list = None) -> list:
+    """Strategies to try for `url`, starting at the one that last worked for its pattern."""
+    order = list(strategies or DEFAULT_STRATEGIES)
+    learned = _learned.get(url_pattern(url))
+    if learned in order:
+        order = order[order.index(learned):]
+    return order
+
+
+def remember(url: str, strategy: str):
+    key = url_pattern(url)
+    if _learned.get(key) != strategy:
+        logger.info(f"Readiness: '{strategy}' works for {key}")
+        _learned[key] = strategy
+
+
+def forget(url: str = None):
+    if url is None:
+        _learned.clear()
+    else:
+        _learned.pop(url_pattern(url), None)
+
+
+async def via_http(url: str):
+    """
+    Plain GET with simple inline scripts applied statically (see core.static_page).
+    None when the page still needs a browser.
+    """
+    resp = await http_client.get(url, kind="page")
+    resp.raise_for_status()
+    return static_page.render(resp.text)
+
+
+async def wait_ready(page, url: str, strategy: str, selector: str = None, text: str = None) -> bool:
+    """Navigate `page` to `url` and wait according to `strategy`. False if not applicable."""
+    selector = selector or READY_SELECTOR
+    text = text or READY_TEXT
+    # Never wait past what is left of the chain's budget
+    goto_ms = budget.timeout(GOTO_TIMEOUT_MS / 1000) * 1000
+    max_wait_ms = budget.timeout(MAX_WAIT_MS / 1000) * 1000
+    if strategy == "mutation":
+        await page.goto(url, wait_until="domcontentloaded", timeout=goto_ms)
+        await page.evaluate(QUIESCENCE_JS, [QUIET_MS, max_wait_ms])
+    elif strategy == "selector":
+        if not selector and not text:
+            return False
+        await page.goto(url, wait_until="domcontentloaded", timeout=goto_ms)
+        if selector:
+            await page.wait_for_selector(selector, timeout=max_wait_ms)
+        if text:
+            await page.wait_for_function(
+                "t => document.body && document.body.innerText.includes(t)", arg=text, timeout=max_wait_ms
+            )
+    elif strategy == "networkidle":
+        await page.goto(url, wait_until="networkidle", timeout=goto_ms)
+        # Settle late DOM writes without a fixed sleep
+        await page.evaluate(QUIESCENCE_JS, [QUIET_MS, max_wait_ms])
+    else:
+        return False
+    return True
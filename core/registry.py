@@ -0,0 +1,93 @@
+import logging
+import re
+import time
+from core import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class Solver:
+    """
+    A handler plus the evidence that a question is meant for it.
+    `signals` are (regex, weight) pairs; confidence is the capped sum of the
+    weights of every distinct signal found in the question.
+    `failure_values` are answers the handler gives when it could not solve the
+    question; the router treats them as no answer.
+    `args` names what the handler takes, in order (question/url/email/page_data/index).
+    """
+
+    def __init__(self, name: str, handler, signals: list, args: tuple = ("question", "url"),
+                 failure_values: tuple = ()):
+        self.name = name
+        self.handler = handler
+        self.signals = signals
+        self.args = args
+        self.failure_values = set(failure_values)
+        self.stats = {"hits": 0, "errors": 0, "fallbacks": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    async def solve(self, question: str, url: str, page_data: dict, email: str):
+        available = {"question": question, "url": url, "email": email, "page_data": page_data,
+                     "index": (page_data or {}).get("index")}
+        t0 = time.perf_counter()
+        self.stats["hits"] += 1
+        try:
+            with tracing.span("handler", handler=self.name) as sp:
+                answer = await self.handler(*(available[a] for a in self.args))
+                sp.set(answer_type=type(answer).__name__, failure=answer in self.failure_values)
+                return answer
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            elapsed = (time.perf_counter() - t0) * 1000
+            self.stats["total_ms"] += elapsed
+            self.stats["max_ms"] = max(self.stats["max_ms"], elapsed)
+
+
+class Registry:
+    def __init__(self):
+        self.solvers = []
+        self._patterns = None  # [(compiled signal, [(solver index, weight)])]
+
+    def register(self, solver: Solver) -> Solver:
+        self.solvers.append(solver)
+        self._patterns = None
+        return solver
+
+    def _compile(self):
+        # A pattern shared by several solvers is searched once for all its owners
+        groups = {}
+        for si, solver in enumerate(self.solvers):
+            for pattern, weight in solver.signals:
+                groups.setdefault(pattern, []).append((si, weight))
+        self._patterns = [(re.compile(pattern, re.IGNORECASE), owners) for pattern, owners in groups.items()]
+
+    def score(self, question: str) -> list:
+        """[(confidence, solver)] best first."""
+        if self._patterns is None:
+            self._compile()
+        # Each signal on its own: in one alternation, a match would hide any
+        # other signal overlapping it (e.g. config.json hiding \.json)
+        totals = [0.0] * len(self.solvers)
+        for pattern, owners in self._patterns:
+            if pattern.search(question):
+                for si, weight in owners:
+                    totals[si] += weight
+        # Stable sort keeps registration order as the tie-breaker
+        ranked = sorted(
+            ((min(round(t, 3), 1.0), s) for t, s in zip(totals, self.solvers) if t > 0),
+            key=lambda pair: -pair[0],
+        )
+        return ranked
+
+    def stats(self) -> dict:
+        report = {}
+        for s in self.solvers:
+            hits = s.stats["hits"]
+            report[s.name] = {
+                **s.stats,
+                "avg_ms": round(s.stats["total_ms"] / hits, 1) if hits else 0.0,
+                "total_ms": round(s.stats["total_ms"], 1),
+                "max_ms": round(s.stats["max_ms"], 1),
+            }
+        return report
@@ -1,20 +1,217 @@
 # core/router.py
+import asyncio
 import logging
+import os
+import time
+from core import budget, tracing
+from core.registry import Registry, Solver
 from handlers import (
-    image_color, audio, llm  # Keep it simple: Image, Audio, LLM
+    audio, code_exec, csv_normalize, csv_sum, git_cmd, github_tree, image_color,
+    literal_path, llm, logs_zip, scrape, uv_cmd,
 )
 
-async def route_and_solve(question: str, url: str, page_data: dict, email: str) -> str:
-    q = question.lower()
-    
-    # 1. Image Tasks
-    if "heatmap" in q or "color" in q or ".png" in q:
-        return await image_color.handler(question, url)
-        
-    # 2. Audio Tasks
-    if "audio" in q or "listen" in q or ".opus" in q or ".mp3" in q:
-        return await audio.handler(question, url)
-
-    # 3. EVERYTHING ELSE -> LLM
-    # This handles SQL, CSV, JSON, Docker, Git, Curl, etc.
-    return await llm.handler(question, url)
+logger = logging.getLogger(__name__)
+
+# Below this, nothing cheap is trusted and the LLM answers
+MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.6"))
+# Racing: when the top solvers score within RACE_MARGIN of each other (or the
+# best is below MIN_CONFIDENCE), up to RACE_TOP_K of those scoring at least
+# RACE_MIN_CONFIDENCE run at once instead of betting on one
+RACE = os.getenv("ROUTER_RACE", "1") == "1"
+RACE_TOP_K = int(os.getenv("ROUTER_RACE_TOP_K", "3"))
+RACE_MARGIN = float(os.getenv("ROUTER_RACE_MARGIN", "0.2"))
+RACE_MIN_CONFIDENCE = float(os.getenv("ROUTER_RACE_MIN_CONFIDENCE", "0.3"))
+
+race_stats = {"races": 0, "early_wins": 0, "cancelled": 0, "cross_checks": 0, "deadline_hits": 0}
+
+# Signals are (regex, weight); failure_values are what a handler returns when it has no answer
+registry = Registry()
+registry.register(Solver("image_color", image_color.handler, [
+    (r"heatmap", 0.6), (r"\bcolou?rs?\b", 0.6), (r"\.png\b", 0.6),
+], args=("question", "url", "index"), failure_values=("#000000",)))
+registry.register(Solver("audio", audio.handler, [
+    (r"\baudio\b", 0.6), (r"\blisten", 0.6), (r"\.opus\b", 0.6), (r"\.mp3\b", 0.6), (r"\btranscri", 0.3),
+], args=("question", "url", "index"), failure_values=("0",)))
+registry.register(Solver("uv_cmd", uv_cmd.handler, [
+    (r"\buv\s+http\b", 0.9),
+], args=("question", "url", "email"), failure_values=("uv http get https://example.com",)))
+registry.register(Solver("csv_sum", csv_sum.handler, [
+    (r"\bcutoff\b", 0.5), (r"\.csv\b", 0.3), (r"\bsum\b", 0.2),
+], args=("question", "url", "index"), failure_values=("0",)))
+registry.register(Solver("csv_normalize", csv_normalize.handler, [
+    (r"\bnormali[sz]", 0.4), (r"snake[\s_-]?case", 0.3), (r"\.csv\b", 0.3), (r"\bjson\b", 0.1),
+], args=("question", "url", "index"), failure_values=("[]",)))
+registry.register(Solver("logs_zip", logs_zip.handler, [
+    (r"\.zip\b", 0.5), (r"\blogs?\b", 0.2), (r"\bbytes\b", 0.2), (r"\.jsonl\b", 0.2),
+], args=("question", "url", "email", "index"), failure_values=("0",)))
+registry.register(Solver("github_tree", github_tree.handler, [
+    (r"\bgithub\b", 0.4), (r"\btrees?\b", 0.3), (r"pathPrefix|\bextension\b", 0.2), (r"\.json\b", 0.1),
+], args=("question", "url", "email", "index"), failure_values=("0",)))
+registry.register(Solver("scrape", scrape.handler, [
+    (r"\bscrape\b", 0.7), (r"\bsecret\b", 0.2),
+], failure_values=("error", "not_found")))
+registry.register(Solver("git_cmd", git_cmd.handler, [
+    (r"env\.sample", 0.5), (r"\bgit\b", 0.2), (r"\bcommit\b", 0.2),
+], args=("question",)))
+registry.register(Solver("literal_path", literal_path.handler, [
+    (r"/project2/\S+\.md\b", 0.5), (r"\b(?:exact|relative)\s+(?:path|link)\b", 0.3),
+], args=("question",)))
+# Data questions over the course files: an LLM-written program runs on the whole file
+registry.register(Solver("code_exec", code_exec.handler, [
+    (r"\bdatabase\.sql\b", 0.6), (r"\b(?:numbers|dates|comments)\.txt\b", 0.6), (r"\b(?:config|echo)\.json\b", 0.4),
+    (r"\b(?:how many|count|sum|total|average|mean|median|maximum|minimum|distinct)\b", 0.2),
+], args=("question", "url", "index"), failure_values=("",)))
+
+# EVERYTHING ELSE -> LLM (SQL, JSON, Docker, Curl, ...)
+fallback = Solver("llm", llm.handler, [], args=("question", "url", "index"))
+
+
+def stats() -> dict:
+    return {**registry.stats(), fallback.name: fallback.stats}
+
+
+tracing.metrics.collect(
+    "quiz_handler_events_total", "Handler invocations, errors and LLM fallbacks.", "counter",
+    lambda: [({"handler": name, "event": k}, s[k]) for name, s in stats().items()
+             for k in ("hits", "errors", "fallbacks")],
+)
+tracing.metrics.collect("quiz_router_race_events_total", "Solver races, early wins, cancellations and cross-checks.",
+                        "counter", lambda: [({"event": k}, v) for k, v in race_stats.items()])
+
+
+def race_field(ranked: list, llm: bool = True) -> list:
+    """
+    [(confidence, solver)] to race for this question, or [] to route as usual.
+    Obvious questions (a clear leader above MIN_CONFIDENCE) never race, and
+    the LLM only joins when it would have been asked anyway (and `llm` allows).
+    """
+    if not RACE or not ranked:
+        return []
+    plausible = [(c, s) for c, s in ranked[:RACE_TOP_K] if c >= RACE_MIN_CONFIDENCE]
+    if not plausible:
+        return []
+    top = ranked[0][0]
+    if top >= MIN_CONFIDENCE:
+        field = [plausible[0]] + [(c, s) for c, s in plausible[1:] if top - c <= RACE_MARGIN]
+        return field if len(field) > 1 else []
+    return plausible + [(0.0, fallback)] if llm else plausible
+
+
+async def _race(field: list, question: str, url: str, page_data: dict, email: str, deadline: float, sp,
+                llm: bool = True) -> str:
+    """
+    Run every solver in `field` at once. A cheap answer wins as soon as every
+    higher-ranked cheap solver has finished; the LLM, when racing, wins
+    outright. The rest are cancelled. Disagreeing cheap answers go to the LLM
+    as a cross-check; at `deadline` the best answer in hand is taken.
+    """
+    race_stats["races"] += 1
+    sp.set(raced=[s.name for _, s in field])
+    logger.info("Racing " + ", ".join(s.name for _, s in field))
+    pending = {asyncio.ensure_future(s.solve(question, url, page_data, email)): s for _, s in field}
+    cheap = [s for _, s in field if s is not fallback]
+    llm_raced = len(cheap) < len(field)
+    finished = set()
+    held = {}  # solver name -> answer
+    winner = None
+    timed_out = False
+    try:
+        while pending and winner is None:
+            # Only settle at the deadline if there is something to settle for
+            timeout = max(deadline - time.monotonic(), 0) if deadline is not None and held else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                timed_out = True
+                race_stats["deadline_hits"] += 1
+                break
+            for task in done:
+                solver = pending.pop(task)
+                finished.add(solver.name)
+                try:
+                    answer = task.result()
+                except Exception as e:
+                    logger.warning(f"{solver.name} failed in race ({e})")
+                    continue
+                if answer not in solver.failure_values:
+                    held[solver.name] = answer
+            if fallback.name in held:
+                winner = fallback
+            elif not llm_raced:
+                # The leading cheap answer stands once nothing ranked above it is still running
+                for solver in cheap:
+                    if solver.name not in finished:
+                        break
+                    if solver.name in held:
+                        winner = solver
+                        break
+    finally:
+        for task in pending:
+            task.cancel()
+        race_stats["cancelled"] += len(pending)
+    sp.set(cancelled=len(pending), deadline_hit=timed_out)
+
+    cheap_held = [(s, held[s.name]) for s in cheap if s.name in held]
+    agreed = len({str(a).strip() for _, a in cheap_held}) <= 1
+    if winner is not None and (winner is fallback or agreed):
+        race_stats["early_wins"] += bool(pending)
+        sp.set(handler=winner.name)
+        return held[winner.name]
+
+    if not agreed and not llm_raced and not timed_out and llm:
+        # Cheap solvers disagree: the LLM breaks the tie
+        race_stats["cross_checks"] += 1
+        logger.info("Cross-checking " + ", ".join(f"{s.name}={a!r}" for s, a in cheap_held))
+        try:
+            verdict = str(await fallback.solve(question, url, page_data, email)).strip()
+            for solver, answer in cheap_held:
+                if str(answer).strip() == verdict:
+                    sp.set(handler=solver.name, cross_checked=True)
+                    return answer
+        except Exception as e:
+            logger.error(f"Cross-check failed ({e})")
+    if cheap_held:
+        # Highest-ranked answer in hand
+        sp.set(handler=cheap_held[0][0].name)
+        return cheap_held[0][1]
+    if llm_raced or not llm:
+        raise RuntimeError("Every raced solver failed")
+    sp.set(handler=fallback.name, fell_back=True)
+    return await fallback.solve(question, url, page_data, email)
+
+
+async def route_and_solve(question: str, url: str, page_data: dict, email: str, deadline: float = None) -> str:
+    """
+    Answer `question` with the best-scoring solver, or race the plausible ones
+    when the scores are close. `deadline` (time.monotonic(); by default the
+    chain budget's) bounds a race. Near the deadline the LLM is not called.
+    """
+    with tracing.span("route") as sp:
+        if deadline is None:
+            deadline = budget.solve_deadline()
+        llm_ok = budget.affords(budget.LLM_MIN_SECONDS)
+        ranked = registry.score(question)
+        if ranked:
+            logger.info("Router scores: " + ", ".join(f"{s.name}={c:.2f}" for c, s in ranked[:3]))
+        field = race_field(ranked, llm_ok)
+        if field:
+            return await _race(field, question, url, page_data, email, deadline, sp, llm_ok)
+        if ranked and ranked[0][0] >= MIN_CONFIDENCE:
+            solver = ranked[0][1]
+            logger.info(f"Routing to {solver.name}")
+            sp.set(handler=solver.name, confidence=ranked[0][0])
+            answer = None
+            try:
+                answer = await solver.solve(question, url, page_data, email)
+                if answer not in solver.failure_values:
+                    return answer
+                logger.warning(f"{solver.name} gave no answer ({answer}); falling back to LLM")
+            except Exception as e:
+                logger.error(f"{solver.name} failed ({e}); falling back to LLM")
+            if not llm_ok and answer is not None:
+                logger.warning("Too little time left for the LLM; keeping the handler's answer")
+                sp.set(skipped_llm=True)
+                return answer
+            solver.stats["fallbacks"] += 1
+
+        sp.set(handler=fallback.name, fell_back=bool(ranked and ranked[0][0] >= MIN_CONFIDENCE))
+        return await fallback.solve(question, url, page_data, email)
@@ -0,0 +1,237 @@
+"""
+Run a short generated program against one local data file in a separate,
+confined Python process. Generated code is shaped by untrusted page text,
+so it only runs where the OS can isolate it (Linux with unprivileged user
+namespaces, via util-linux `unshare`):
+
+- new user, network, mount and PID namespaces: no network interfaces, no
+  other processes in sight;
+- chroot into an empty scratch directory holding only a read-only bind of
+  the data file, so nothing else on disk (the app, .env, caches) is visible;
+- a seccomp filter refusing exec, fork/clone, sockets, mount, chroot and
+  namespace calls, so the program cannot start anything or undo the above;
+- CPU, memory and file-size rlimits, a wall clock timeout and an empty
+  environment.
+
+Modules are imported before the chroot; a program can only use those in
+MODULES. Where the isolation is unavailable nothing is run (SandboxError)
+and code_exec leaves the question to the LLM.
+"""
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from core import budget
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = float(os.getenv("SANDBOX_TIMEOUT", "10"))
+CPU_SECONDS = int(os.getenv("SANDBOX_CPU_SECONDS", "10"))
+MEMORY_MB = int(os.getenv("SANDBOX_MEMORY_MB", "512"))
+# Largest file the program may write (into its scratch directory)
+FILE_MB = int(os.getenv("SANDBOX_FILE_MB", "16"))
+MAX_ANSWER_CHARS = int(os.getenv("SANDBOX_MAX_ANSWER_CHARS", "10000"))
+UNSHARE = os.getenv("SANDBOX_UNSHARE") or shutil.which("unshare")
+
+LANGUAGES = ("python", "sql")
+
+# Everything a program can import (nothing else exists inside the chroot)
+MODULES = (
+    "array", "base64", "bisect", "calendar", "collections", "csv", "datetime", "decimal", "difflib",
+    "fractions", "functools", "gzip", "hashlib", "heapq", "html", "io", "itertools", "json", "math",
+    "operator", "random", "re", "sqlite3", "statistics", "string", "textwrap", "time", "unicodedata",
+    "urllib.parse", "zipfile",
+)
+
+# Executed with `python -I -c` inside the namespaces; reads its job as JSON on
+# stdin and writes one JSON line. Any failure to confine aborts before the
+# program runs.
+_HARNESS = r"""
+import contextlib, ctypes, importlib, io, json, os, platform, resource, sqlite3, sys, traceback
+job = json.load(sys.stdin)
+
+def _report(**result):
+    sys.stdout.write(json.dumps(result) + "\n")
+    sys.stdout.flush()
+
+# Denied syscalls per architecture: (AUDIT_ARCH, {name: number})
+_ARCHES = {
+    "x86_64": (0xC000003E, dict(
+        socket=41, socketpair=53, clone=56, fork=57, vfork=58, execve=59, ptrace=101, add_key=248,
+        request_key=249, keyctl=250, pivot_root=155, chroot=161, mount=165, umount2=166, unshare=272,
+        setns=308, bpf=321, execveat=322, open_tree=428, move_mount=429, fsopen=430, fsmount=432,
+        clone3=435, mount_setattr=442)),
+    "aarch64": (0xC00000B7, dict(
+        umount2=39, mount=40, pivot_root=41, chroot=51, unshare=97, ptrace=117, socket=198,
+        socketpair=199, add_key=217, request_key=218, keyctl=219, clone=220, execve=221, setns=268,
+        bpf=280, execveat=281, open_tree=428, move_mount=429, fsopen=430, fsmount=432, clone3=435,
+        mount_setattr=442)),
+}
+
+class _Filter(ctypes.Structure):
+    _fields_ = [("code", ctypes.c_ushort), ("jt", ctypes.c_ubyte), ("jf", ctypes.c_ubyte), ("k", ctypes.c_uint32)]
+
+class _Program(ctypes.Structure):
+    _fields_ = [("len", ctypes.c_ushort), ("filter", ctypes.POINTER(_Filter))]
+
+def _seccomp(libc):
+    arch, denied = _ARCHES[platform.machine()]
+    numbers = sorted(denied.values())
+    n = len(numbers)
+    ld, jeq, jge, ret = 0x20, 0x15, 0x35, 0x06
+    prog = [(ld, 0, 0, 4), (jeq, 1, 0, arch), (ret, 0, 0, 0x80000000), (ld, 0, 0, 0)]
+    if arch == 0xC000003E:
+        prog.append((jge, n + 1, 0, 0x40000000))  # x32 syscalls
+    prog += [(jeq, n - i, 0, nr) for i, nr in enumerate(numbers)]
+    prog += [(ret, 0, 0, 0x7FFF0000), (ret, 0, 0, 0x00050001)]  # allow / EPERM
+    filters = (_Filter * len(prog))(*prog)
+    fprog = _Program(len(prog), filters)
+    if libc.prctl(38, 1, 0, 0, 0) != 0:  # PR_SET_NO_NEW_PRIVS
+        raise OSError(ctypes.get_errno(), "no_new_privs")
+    if libc.prctl(22, 2, ctypes.byref(fprog), 0, 0) != 0:  # PR_SET_SECCOMP, SECCOMP_MODE_FILTER
+        raise OSError(ctypes.get_errno(), "seccomp")
+
+def _mount(libc, src, dst, flags):
+    if libc.mount(src and src.encode(), dst.encode(), None, flags, None) != 0:
+        raise OSError(ctypes.get_errno(), f"mount {dst}")
+
+def _confine():
+    for name in job["modules"]:
+        importlib.import_module(name)
+    importlib.import_module("_strptime")  # datetime.strptime imports it lazily
+    db = None
+    if job["kind"] == "sql":
+        db = sqlite3.connect(":memory:")
+        with open(job["path"], encoding="utf-8", errors="replace") as f:
+            db.executescript(f.read())
+    libc = ctypes.CDLL(None, use_errno=True)
+    root, inner = job["root"], "/data/input" + ("." + job["kind"] if job["kind"] else "")
+    os.makedirs(root + "/data")
+    open(root + inner, "w").close()
+    _mount(libc, job["path"], root + inner, 4096)  # MS_BIND
+    _mount(libc, None, root + inner, 4096 | 32 | 1)  # MS_BIND | MS_REMOUNT | MS_RDONLY
+    os.chroot(root)
+    os.chdir("/")
+    mb = 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_CPU, (job["cpu"], job["cpu"]))
+    resource.setrlimit(resource.RLIMIT_AS, (job["memory_mb"] * mb, job["memory_mb"] * mb))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (job["file_mb"] * mb, job["file_mb"] * mb))
+    _seccomp(libc)
+    return inner, db
+
+try:
+    path, db = _confine()
+except BaseException as e:
+    _report(isolation=f"{type(e).__name__}: {e}")
+    sys.exit(0)
+
+PARAMS = job["params"]
+def text():
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def _render(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+try:
+    with contextlib.redirect_stdout(io.StringIO()):
+        if job["language"] == "sql":
+            rows = db.execute(job["code"], {f"p{i}": v for i, v in enumerate(PARAMS)}).fetchall()
+            answer = rows[0][0] if len(rows) == 1 and len(rows[0]) == 1 else [list(r) for r in rows]
+        else:
+            scope = {"__name__": "__sandbox__", "path": path, "text": text, "db": db, "PARAMS": PARAMS}
+            exec(compile(job["code"], "<program>", "exec"), scope)
+            answer = scope.get("answer")
+    if answer is None:
+        raise ValueError("program did not set `answer`")
+    _report(answer=_render(answer))
+except BaseException:
+    _report(error=traceback.format_exc(limit=3)[-1500:])
+"""
+
+
+class SandboxError(Exception):
+    pass
+
+
+_probe = None  # asyncio.Task -> reason isolation is unavailable, or None
+
+
+async def unavailable():
+    """Why generated code cannot be run here (None when it can). Checked once per process."""
+    global _probe
+    if _probe is None:
+        _probe = asyncio.ensure_future(_check_isolation())
+    return await asyncio.shield(_probe)
+
+
+async def _check_isolation():
+    if sys.platform != "linux" or not UNSHARE:
+        return "needs Linux with util-linux unshare"
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("1")
+    try:
+        answer = await _execute("answer = text()", "python", f.name, "txt", [], TIMEOUT)
+    except SandboxError as e:
+        logger.warning(f"Sandbox isolation unavailable, generated code will not run: {e}")
+        return str(e)
+    finally:
+        os.unlink(f.name)
+    return None if answer == "1" else f"probe answered {answer!r}"
+
+
+async def run(code: str, language: str, path: str, kind: str = "", params: list = (), timeout: float = TIMEOUT) -> str:
+    """
+    Answer printed by `code` run against the file at `path`.
+    Python programs see `path`, `text()`, `PARAMS`, `db` (for .sql dumps) and
+    set `answer`; SQL runs as one query on `db` with PARAMS bound as :p0, :p1...
+    """
+    if language not in LANGUAGES:
+        raise SandboxError(f"Unsupported language: {language}")
+    if language == "sql" and kind != "sql":
+        raise SandboxError("SQL programs need a .sql dump")
+    reason = await unavailable()
+    if reason:
+        raise SandboxError(f"No isolation available ({reason})")
+    return await _execute(code, language, path, kind, params, budget.timeout(timeout))
+
+
+async def _execute(code: str, language: str, path: str, kind: str, params: list, timeout: float) -> str:
+    with tempfile.TemporaryDirectory(prefix="quiz-sandbox-") as scratch:
+        root = os.path.join(scratch, "root")
+        job = json.dumps({
+            "code": code, "language": language, "path": os.path.abspath(path), "kind": kind,
+            "params": list(params), "root": root, "modules": MODULES,
+            "cpu": CPU_SECONDS, "memory_mb": MEMORY_MB, "file_mb": FILE_MB,
+        }).encode()
+        proc = await asyncio.create_subprocess_exec(
+            UNSHARE, "--user", "--map-root-user", "--net", "--mount", "--pid", "--fork", "--kill-child",
+            sys.executable, "-I", "-c", _HARNESS,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            cwd=scratch, env={"PATH": os.defpath, "HOME": "/", "LANG": "C.UTF-8"},
+        )
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(job), timeout)
+        except asyncio.TimeoutError:
+            raise SandboxError(f"Program exceeded {timeout:.1f}s")
+        finally:
+            # Also when a race cancels us; --kill-child takes the program down too
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+    lines = out.decode(errors="replace").strip().splitlines()
+    try:
+        result = json.loads(lines[-1])
+    except (IndexError, ValueError):
+        # Killed by an rlimit before it could report, or unshare refused
+        raise SandboxError(f"Sandbox exited {proc.returncode}: {err.decode(errors='replace')[-300:]}")
+    if "isolation" in result:
+        raise SandboxError(f"Could not confine the program: {result['isolation']}")
+    if "error" in result:
+        raise SandboxError(result["error"].strip().splitlines()[-1])
+    return str(result["answer"])[:MAX_ANSWER_CHARS]
@@ -0,0 +1,353 @@
+"""
+State shared by every worker process (and node): job snapshots, solved
+answers, and the locks that keep two workers from solving the same step or
+downloading the same asset at once.
+
+    SHARED_STATE=sqlite:///tmp/quiz_cache/shared.sqlite   (default; one node)
+    SHARED_STATE=redis://host:6379/0                      (several nodes)
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from core import tracing
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("CACHE_DIR", "/tmp/quiz_cache")
+SHARED_STATE = os.getenv("SHARED_STATE", f"sqlite:///{os.path.join(CACHE_DIR, 'shared.sqlite')}")
+# A lock outlives a crashed holder by at most this long
+LOCK_TTL = float(os.getenv("SHARED_LOCK_TTL", "120"))
+RESULT_TTL = float(os.getenv("SHARED_RESULT_TTL", "3600"))
+JOB_TTL = float(os.getenv("SHARED_JOB_TTL", "86400"))
+POLL_INTERVAL = float(os.getenv("SHARED_POLL_INTERVAL", "0.2"))
+
+stats = {"solved": 0, "deduped": 0, "lock_waits": 0, "lock_timeouts": 0}
+
+
+class Backend:
+    """String key/value store with expiry and set-if-absent."""
+    name = "base"
+
+    async def get(self, key: str):
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: float = None):
+        raise NotImplementedError
+
+    async def add(self, key: str, value: str, ttl: float = None) -> bool:
+        """Set `key` only if it is absent (or expired); True if this call set it."""
+        raise NotImplementedError
+
+    async def delete(self, key: str):
+        raise NotImplementedError
+
+    async def release(self, key: str, value: str):
+        """Delete `key` only if it still holds `value`."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class SQLiteBackend(Backend):
+    """One SQLite file (WAL) shared by every process on the host."""
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+        return self._db
+
+    @staticmethod
+    def _expiry(ttl):
+        return time.time() + ttl if ttl else None
+
+    def _purge(self):
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.db.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+    def _execute(self, sql: str, params: tuple, purge: bool) -> tuple:
+        # In a worker thread: a write can wait on another process's lock
+        with self._lock:
+            cur = self.db.execute(sql, params)
+            result = cur.fetchone(), cur.rowcount
+            if purge:
+                self._purge()
+        return result
+
+    async def _run(self, sql: str, params: tuple, purge: bool = False) -> tuple:
+        return await asyncio.to_thread(self._execute, sql, params, purge)
+
+    async def get(self, key: str):
+        row, _ = await self._run(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        )
+        return row[0] if row else None
+
+    async def set(self, key: str, value: str, ttl: float = None):
+        await self._run("INSERT OR REPLACE INTO kv VALUES (?, ?, ?)", (key, value, self._expiry(ttl)), purge=True)
+
+    async def add(self, key: str, value: str, ttl: float = None) -> bool:
+        _, changed = await self._run(
+            "INSERT INTO kv VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE kv.expires_at IS NOT NULL AND kv.expires_at <= ?",
+            (key, value, self._expiry(ttl), time.time()), purge=True,
+        )
+        return changed == 1
+
+    async def delete(self, key: str):
+        await self._run("DELETE FROM kv WHERE key = ?", (key,))
+
+    async def release(self, key: str, value: str):
+        await self._run("DELETE FROM kv WHERE key = ? AND value = ?", (key, value))
+
+    async def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class RespError(Exception):
+    pass
+
+
+class RespBackend(Backend):
+    """
+    Minimal client for the Redis protocol (RESP2): GET/SET/DEL only, so any
+    Redis-compatible server works, including bench.resp_server.
+    """
+    name = "resp"
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, password: str = None):
+        self.host, self.port, self.db, self.password = host, port, db, password
+        self._reader = self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._roundtrip("AUTH", self.password)
+        if self.db:
+            await self._roundtrip("SELECT", str(self.db))
+
+    async def _roundtrip(self, *args):
+        out = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._writer.write(b"".join(out))
+        await self._writer.drain()
+        return await self._reply()
+
+    async def _reply(self):
+        line = (await self._reader.readuntil(b"\r\n"))[:-2]
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            return (await self._reader.readexactly(n + 2))[:-2].decode()
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [await self._reply() for _ in range(n)]
+        raise RespError(f"Unexpected reply: {line[:50]!r}")
+
+    async def command(self, *args):
+        async with self._lock:
+            if self._writer is None:
+                await self._connect()
+            try:
+                return await self._roundtrip(*args)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Drop the connection; the next command reconnects
+                self._writer = None
+                raise
+
+    async def get(self, key: str):
+        return await self.command("GET", key)
+
+    async def set(self, key: str, value: str, ttl: float = None):
+        args = ["SET", key, value]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        await self.command(*args)
+
+    async def add(self, key: str, value: str, ttl: float = None) -> bool:
+        args = ["SET", key, value, "NX"]
+        if ttl:
+            args += ["PX", int(ttl * 1000)]
+        return await self.command(*args) == "OK"
+
+    async def delete(self, key: str):
+        await self.command("DEL", key)
+
+    async def release(self, key: str, value: str):
+        # GET + DEL rather than a script, so plain stand-ins work too;
+        # the window only matters if the lock expired in between
+        if await self.get(key) == value:
+            await self.delete(key)
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def from_url(url: str) -> Backend:
+    parts = urlsplit(url)
+    if parts.scheme == "sqlite":
+        return SQLiteBackend(parts.path if not parts.netloc else f"{parts.netloc}{parts.path}")
+    if parts.scheme in ("redis", "resp"):
+        db = int(parts.path.strip("/") or 0)
+        return RespBackend(parts.hostname or "127.0.0.1", parts.port or 6379, db, parts.password)
+    raise ValueError(f"Unsupported SHARED_STATE: {url}")
+
+
+_backend = None
+
+
+def get_backend() -> Backend:
+    global _backend
+    if _backend is None:
+        _backend = from_url(SHARED_STATE)
+        logger.info(f"Shared state: {_backend.name} ({SHARED_STATE})")
+    return _backend
+
+
+def set_backend(backend: Backend) -> Backend:
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+# ----------------------------------------------------------------------
+# Locks and once-only work
+# ----------------------------------------------------------------------
+@asynccontextmanager
+async def lock(key: str, ttl: float = LOCK_TTL, wait: float = LOCK_TTL):
+    """
+    Hold `lock:<key>` across workers. Waits up to `wait` seconds, then yields
+    False and lets the caller go ahead unprotected rather than stall.
+    """
+    backend = get_backend()
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    acquired = False
+    while True:
+        attempt = asyncio.ensure_future(backend.add(f"lock:{key}", owner, ttl))
+        try:
+            acquired = await asyncio.shield(attempt)
+        except asyncio.CancelledError:
+            # The add may still land (it runs off the loop): give the lock back if it does
+            attempt.add_done_callback(lambda t: _release_abandoned(t, backend, key, owner))
+            raise
+        except Exception as e:
+            logger.warning(f"Shared lock unavailable ({e}); continuing without it")
+            break
+        if acquired:
+            break
+        if time.monotonic() >= deadline:
+            stats["lock_timeouts"] += wait > 0
+            break
+        stats["lock_waits"] += 1
+        await asyncio.sleep(POLL_INTERVAL)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                await backend.release(f"lock:{key}", owner)
+            except Exception as e:
+                logger.warning(f"Shared lock release failed: {e}")
+
+
+def _release_abandoned(attempt: asyncio.Future, backend: Backend, key: str, owner: str):
+    if not attempt.cancelled() and attempt.exception() is None and attempt.result():
+        asyncio.ensure_future(backend.release(f"lock:{key}", owner))
+
+
+async def solve_once(key: str, solve):
+    """
+    `await solve()` in at most one worker for `key`; the others wait for its
+    published result. Returns (result, True if it came from another worker).
+    """
+    backend = get_backend()
+    result_key = f"solved:{key}"
+    deadline = time.monotonic() + LOCK_TTL
+    while time.monotonic() < deadline:
+        try:
+            cached = await backend.get(result_key)
+        except Exception as e:
+            logger.warning(f"Shared state unavailable ({e}); solving locally")
+            break
+        if cached is not None:
+            stats["deduped"] += 1
+            return json.loads(cached), True
+        async with lock(f"solve:{key}", wait=0) as acquired:
+            if acquired:
+                result = await solve()
+                try:
+                    await backend.set(result_key, json.dumps(result), RESULT_TTL)
+                except Exception as e:
+                    logger.warning(f"Solved result not shared: {e}")
+                stats["solved"] += 1
+                return result, False
+        # Someone else is solving it (if they fail, their lock goes and we take over)
+        await asyncio.sleep(POLL_INTERVAL)
+    stats["solved"] += 1
+    return await solve(), False
+
+
+async def forget(key: str):
+    """Drop the published result for `key` (e.g. it was rejected), so the next attempt solves again."""
+    try:
+        await get_backend().delete(f"solved:{key}")
+    except Exception as e:
+        logger.warning(f"Shared result not dropped: {e}")
+
+
+# ----------------------------------------------------------------------
+# Job snapshots (so any worker can answer /jobs/{id})
+# ----------------------------------------------------------------------
+async def save_job(snapshot: dict):
+    try:
+        await get_backend().set(f"job:{snapshot['id']}", json.dumps(snapshot, default=str), JOB_TTL)
+    except Exception as e:
+        logger.warning(f"Job snapshot not shared: {e}")
+
+
+async def load_job(job_id: str):
+    raw = await get_backend().get(f"job:{job_id}")
+    return json.loads(raw) if raw else None
+
+
+tracing.metrics.collect("quiz_shared_events_total", "Cross-worker solves, dedupes and lock waits.", "counter",
+                        lambda: [({"event": k}, v) for k, v in stats.items()])
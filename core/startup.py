@@ -0,0 +1,161 @@
+import asyncio
+import glob
+import importlib.util
+import logging
+import os
+import sys
+import time
+from core import colors, http_client, llm_gateway
+from core.browser import pool
+
+logger = logging.getLogger(__name__)
+
+# Launch Chromium (and park this many contexts) right after boot, in the background
+PREWARM_BROWSER = os.getenv("PREWARM_BROWSER", "1") != "0"
+PREWARM_CONTEXTS = int(os.getenv("PREWARM_CONTEXTS", "1"))
+# render-build.sh installs the browser at build time; this is only a safety net
+BROWSER_AUTO_INSTALL = os.getenv("BROWSER_AUTO_INSTALL", "1") != "0"
+# Failed warm-up checks run again after this long, doubling up to the max, until they pass
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "30"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "600"))
+
+
+def _browser_roots() -> list:
+    custom = os.getenv("PLAYWRIGHT_BROWSERS_PATH")
+    if custom == "0":
+        # Browsers installed inside the playwright package itself
+        spec = importlib.util.find_spec("playwright")
+        if spec is None or not spec.origin:
+            return []
+        return [os.path.join(os.path.dirname(spec.origin), "driver", "package", ".local-browsers")]
+    if custom:
+        return [custom]
+    if sys.platform == "darwin":
+        return [os.path.expanduser("~/Library/Caches/ms-playwright")]
+    if sys.platform == "win32":
+        return [os.path.join(os.getenv("LOCALAPPDATA", ""), "ms-playwright")]
+    return [os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "ms-playwright")]
+
+
+def browser_installed() -> bool:
+    """Whether a Chromium build is on disk, checked without running Playwright."""
+    patterns = ("chromium-*/chrome-*/chrome", "chromium-*/chrome-*/chrome.exe",
+                "chromium-*/chrome-mac/Chromium.app", "chromium_headless_shell-*/chrome-*/headless_shell*")
+    for root in _browser_roots():
+        if any(glob.glob(os.path.join(root, p)) for p in patterns):
+            return True
+    return False
+
+
+async def install_browser() -> bool:
+    """`playwright install chromium` as a child process, without blocking the event loop."""
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "playwright", "install", "chromium",
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+    )
+    out, _ = await proc.communicate()
+    if proc.returncode != 0:
+        logger.error(f"Browser install failed: {out.decode(errors='replace')[-500:]}")
+    return proc.returncode == 0
+
+
+class Startup:
+    """
+    Boot in two phases: the app starts serving as soon as the cheap parts are
+    up (live), while the browser, LLM client and heavy imports warm up
+    concurrently in the background (warm). It is ready once warm with every
+    check passed; failed checks are retried in the background.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.ready_at = None  # when the first warm-up pass finished
+        self.checks = {}
+        self._task = None
+        self._install_tried = False
+
+    @property
+    def warm(self) -> bool:
+        return self.ready_at is not None
+
+    @property
+    def failed(self) -> list:
+        """Checks that did not pass (an error, or the browser missing)."""
+        return [name for name, c in self.checks.items()
+                if c["status"] == "missing" or c["status"].startswith("failed")]
+
+    @property
+    def ready(self) -> bool:
+        return self.warm and not self.failed
+
+    async def start(self):
+        self.started_at = time.time()
+        await http_client.start()
+        self._task = asyncio.create_task(self._warm())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _check(self, name: str, fn):
+        t0 = time.perf_counter()
+        try:
+            status = await fn() or "ok"
+        except Exception as e:
+            logger.warning(f"Warm-up '{name}' failed: {e}")
+            status = f"failed: {e}"
+        self.checks[name] = {"status": status, "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+    async def _warm(self):
+        steps = {"browser": self._warm_browser, "llm": self._warm_llm, "imaging": self._warm_imaging}
+        await asyncio.gather(*(self._check(name, fn) for name, fn in steps.items()))
+        self.ready_at = time.time()
+        logger.info(f"Warm in {round((self.ready_at - self.started_at) * 1000)} ms: {self.checks}")
+        delay = WARMUP_RETRY_SECONDS
+        while self.failed:
+            logger.warning(f"Not ready, retrying {self.failed} in {delay:g}s")
+            await asyncio.sleep(delay)
+            await asyncio.gather(*(self._check(name, steps[name]) for name in self.failed))
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+
+    async def _warm_browser(self):
+        if not browser_installed():
+            # One install attempt per process: where it failed (read-only disk, no
+            # network) it will fail again. Retries still notice a browser installed since.
+            if not BROWSER_AUTO_INSTALL or self._install_tried:
+                return "missing"
+            self._install_tried = True
+            logger.info("Chromium not found; installing in the background...")
+            if not await install_browser():
+                return "missing"
+        if not PREWARM_BROWSER:
+            return "installed"
+        await pool.warm(PREWARM_CONTEXTS)
+
+    async def _warm_llm(self):
+        backend = llm_gateway.get_backend()
+        if not isinstance(backend, llm_gateway.OpenAIBackend):
+            return f"skipped ({backend.name} backend)"
+        if not backend.token:
+            return "skipped (no API token)"
+        # Importing openai and building the client is the slow part
+        await asyncio.to_thread(backend.client)
+        await asyncio.to_thread(llm_gateway.count_tokens, "warm-up")
+
+    async def _warm_imaging(self):
+        await asyncio.to_thread(colors.pil)
+
+    def report(self) -> dict:
+        return {
+            "ready": self.ready,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "warm_ms": round((self.ready_at - self.started_at) * 1000, 1) if self.warm else None,
+            "failed": self.failed,
+            "checks": self.checks,
+            "browser_running": pool.running,
+        }
+
+
+# Process-wide startup state, driven by the app lifespan
+state = Startup()
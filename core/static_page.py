@@ -0,0 +1,167 @@
+import base64
+import html as htmllib
+import re
+from html.parser import HTMLParser
+
+# Most quiz pages only decode a payload and write it into the DOM. Those
+# scripts are applied here without a browser; anything else is reported as
+# unresolved so the caller can fall back to Playwright.
+
+_STRING = r"""(?:"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|`[^`$]*`)"""
+_VALUE = rf"(?:atob\(\s*{_STRING}\s*\)|{_STRING})"
+_SCRIPT = re.compile(r"<script\b([^>]*)>(.*?)</script\s*>", re.IGNORECASE | re.DOTALL)
+_LOOKUP = (
+    r"document\.(?:getElementById\(\s*[\"'](?P<id>[^\"']+)[\"']\s*\)"
+    r"|querySelector\(\s*[\"'](?P<sel>[^\"']+)[\"']\s*\))"
+)
+_BINDING = re.compile(rf"\b(?:const|let|var)\s+(?P<var>\w+)\s*=\s*{_LOOKUP}")
+_CONSTANT = re.compile(rf"\b(?:const|let|var)\s+(?P<var>\w+)\s*=\s*(?P<value>{_VALUE})")
+_ASSIGN = re.compile(
+    rf"(?:{_LOOKUP}|\b(?P<target>\w+))\.(?P<prop>innerHTML|innerText|textContent)\s*=\s*(?P<value>{_VALUE}|\w+)"
+)
+_WRITE = re.compile(rf"document\.write(?:ln)?\(\s*(?P<value>{_VALUE}|\w+)\s*\)")
+# Anything that may change the document and that we did not account for
+_DYNAMIC = re.compile(
+    r"\.innerHTML\b|\.innerText\b|\.textContent\b|document\.write|appendChild|insertAdjacentHTML"
+    r"|\.append\(|\bfetch\(|XMLHttpRequest|\.outerHTML\b"
+)
+_UNRESOLVED = re.compile(r"\$\{[^}]*\}|\{\{[^}]*\}\}")
+_DATA_TYPES = ("application/json", "application/ld+json", "text/template", "text/x-template")
+_ESCAPES = re.compile(r"\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)", re.DOTALL)
+_SIMPLE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+
+
+class _BodyText(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._in_body = False
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            self._in_body = True
+        elif tag in ("style", "script", "template"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("style", "script", "template") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if self._in_body and not self._skip:
+            self.parts.append(data)
+
+
+def body_text(html: str) -> str:
+    parser = _BodyText()
+    parser.feed(html)
+    return "".join(parser.parts)
+
+
+def _js_string(literal: str) -> str:
+    body = literal[1:-1]
+    if literal[0] == "`":
+        return body
+    def unescape(m):
+        seq = m.group(1)
+        if seq[0] in "ux" and len(seq) > 1:
+            return chr(int(seq[1:], 16))
+        return _SIMPLE_ESCAPES.get(seq, seq)
+    return _ESCAPES.sub(unescape, body)
+
+
+def _atob(data: str) -> str:
+    raw = base64.b64decode(data + "=" * (-len(data) % 4))
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        # atob() yields a binary string; Latin-1 maps it byte for byte
+        return raw.decode("latin-1")
+
+
+def _evaluate(expr: str, constants: dict) -> str:
+    if expr in constants:
+        return constants[expr]
+    if expr.startswith("atob("):
+        return _atob(_js_string(re.search(_STRING, expr[4:]).group(0)))
+    if expr[0] in "\"'`":
+        return _js_string(expr)
+    raise ValueError(f"unknown value {expr}")
+
+
+def _element_id(m):
+    """Element id addressed by a getElementById/querySelector match (None for non-id selectors)."""
+    if m.group("id"):
+        return m.group("id")
+    sel = m.group("sel")
+    return sel[1:] if re.fullmatch(r"#[\w\-]+", sel) else None
+
+
+def _replace_inner(doc: str, element_id: str, content: str):
+    """`doc` with the contents of the element whose id is `element_id` replaced, or None if absent."""
+    m = re.search(rf"<(\w+)\b[^>]*\bid\s*=\s*[\"']{re.escape(element_id)}[\"'][^>]*>", doc, re.IGNORECASE)
+    if not m:
+        return None
+    close = re.compile(rf"</{m.group(1)}\s*>", re.IGNORECASE).search(doc, m.end())
+    end = close.start() if close else m.end()
+    return doc[: m.end()] + content + doc[end:]
+
+
+def _append_to_body(doc: str, content: str) -> str:
+    m = re.search(r"</body\s*>", doc, re.IGNORECASE)
+    return doc[: m.start()] + content + doc[m.start():] if m else doc + content
+
+
+def render(doc: str):
+    """
+    (html, visible text) with simple inline scripts applied, or None when the
+    page still needs a real browser: empty text, external or unrecognised
+    DOM-writing scripts, or unfilled ${...}/{{...}} templates.
+    """
+    writes = []         # (script match, replacement html) for document.write
+    assignments = []    # (element id or None, html)
+    for m in _SCRIPT.finditer(doc):
+        attrs, code = m.group(1).lower(), m.group(2)
+        if any(t in attrs for t in _DATA_TYPES):
+            continue
+        if "src=" in attrs.replace(" ", ""):
+            return None
+        bindings = {b.group("var"): _element_id(b) for b in _BINDING.finditer(code)}
+        handled = 0
+        try:
+            constants = {c.group("var"): _evaluate(c.group("value"), {}) for c in _CONSTANT.finditer(code)}
+            for a in _ASSIGN.finditer(code):
+                if a.group("target"):
+                    if a.group("target") not in bindings:
+                        return None
+                    element_id = bindings[a.group("target")]
+                else:
+                    element_id = _element_id(a)
+                value = _evaluate(a.group("value"), constants)
+                if a.group("prop") != "innerHTML":
+                    value = htmllib.escape(value)
+                assignments.append((element_id, value))
+                handled += 1
+            written = []
+            for w in _WRITE.finditer(code):
+                written.append(_evaluate(w.group("value"), constants))
+                handled += 1
+            if written:
+                writes.append((m, "".join(written)))
+        except (ValueError, AttributeError):
+            # Not valid base64, or a value computed at runtime
+            return None
+        if len(_DYNAMIC.findall(code)) > handled:
+            return None
+
+    for m, content in reversed(writes):
+        doc = doc[: m.start()] + content + doc[m.end():]
+    for element_id, content in assignments:
+        replaced = _replace_inner(doc, element_id, content) if element_id else None
+        doc = replaced if replaced is not None else _append_to_body(doc, content)
+
+    text = body_text(doc)
+    if not text.strip() or _UNRESOLVED.search(text):
+        return None
+    return doc, text
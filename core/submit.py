@@ -1,26 +1,29 @@
-import re
-import httpx
+from core import capture, extract, http_client, tracing
 
-def find_submit_url(q: str, html: str, url: str) -> str:
-    m = re.search(r'(https?://[^\s<>"\']+/submit[^\s<>"\']*)', q)
-    if m:
-        return m.group(1)
-    m = re.search(r'(https?://[^\s<>"\']+/submit[^\s<>"\']*)', html)
-    if m:
-        return m.group(1)
-    domain = re.match(r'(https?://[^/]+)', url)
-    if domain and "/submit" in q:
-        return domain.group(1) + "/submit"
-    # Fallback
-    if domain:
-        return domain.group(1) + "/submit"
-    return url
+ANSWERS = tracing.metrics.counter("quiz_answers_total", "Submitted answers by verdict.")
+
+
+def find_submit_url(q: str, html: str, url: str, index: extract.PageIndex = None) -> str:
+    # Question text first, then markup, then domain + /submit (see core.extract)
+    index = index or extract.build_index(url, q, html)
+    return index.submit_url or url
 
 async def submit_answer(email: str, secret: str, url: str, answer: str, submit_url: str) -> dict:
     payload = {"email": email, "secret": secret, "url": url, "answer": answer}
-    try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.post(submit_url, json=payload)
-            return r.json() if r.status_code == 200 else {"correct": False, "reason": f"HTTP {r.status_code}"}
-    except Exception as e:
-        return {"correct": False, "reason": str(e)}
+    with tracing.span("submit", url=submit_url) as sp:
+        if capture.replaying():
+            resp = capture.replay_submit(payload)
+        else:
+            # No verdict (correct: None) when the server never judged the answer
+            try:
+                r = await http_client.post(submit_url, kind="submit", json=payload)
+                resp = r.json() if r.status_code == 200 else {"correct": None, "reason": f"HTTP {r.status_code}"}
+            except Exception as e:
+                resp = {"correct": None, "reason": str(e)}
+            if capture.recording():
+                capture.record_submit(submit_url, payload, resp)
+        correct = resp.get("correct")
+        verdict = "unknown" if correct is None else str(bool(correct)).lower()
+        sp.set(correct=verdict)
+        ANSWERS.inc(correct=verdict)
+        return resp
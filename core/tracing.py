@@ -0,0 +1,246 @@
+import contextvars
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# When set, every chain's spans are written to <TRACE_DIR>/<trace id>.jsonl
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# ----------------------------------------------------------------------
+# Metrics (Prometheus text format, no client library needed)
+# ----------------------------------------------------------------------
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, dict(key), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.values = {}  # label key -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        row = self.values.get(key)
+        if row is None:
+            row = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[i] += 1
+        row[len(self.buckets)] += 1
+        row[-1] += value
+
+    def samples(self):
+        for key, row in self.values.items():
+            labels = dict(key)
+            for i, bound in enumerate(self.buckets):
+                yield f"{self.name}_bucket", {**labels, "le": repr(float(bound))}, row[i]
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, row[len(self.buckets)]
+            yield f"{self.name}_sum", labels, row[-1]
+            yield f"{self.name}_count", labels, row[len(self.buckets)]
+
+
+class Collected:
+    """Values read at scrape time from `fn() -> [(labels dict, value)]` (e.g. existing stats dicts)."""
+
+    def __init__(self, name: str, help: str, kind: str, fn):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        for labels, value in self.fn():
+            yield self.name, labels, value
+
+
+class Metrics:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._register(Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, buckets))
+
+    def collect(self, name: str, help: str, kind: str, fn) -> Collected:
+        return self._register(Collected(name, help, kind, fn))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                for name, labels, value in metric.samples():
+                    lines.append(f"{name}{_labels(labels)} {float(value)!r}")
+            except Exception as e:
+                logger.warning(f"Metric {metric.name} failed to collect: {e}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+SPAN_SECONDS = metrics.histogram("quiz_span_duration_seconds", "Duration of traced operations by span name.")
+SPANS = metrics.counter("quiz_spans_total", "Traced operations by span name and outcome.")
+
+
+# ----------------------------------------------------------------------
+# Spans
+# ----------------------------------------------------------------------
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration_ms", "status", "attrs")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str, attrs: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration_ms = None
+        self.status = "ok"
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def fail(self, error):
+        self.status = "error"
+        self.attrs["error"] = str(error)[:500]
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "trace_id": self.trace_id, "span_id": self.span_id,
+            "parent_id": self.parent_id, "start": self.start, "duration_ms": self.duration_ms,
+            "status": self.status, **self.attrs,
+        }
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.name = name
+        self.id = uuid.uuid4().hex
+        self.spans = []
+
+    def hot_spots(self, top: int = 5) -> list:
+        """[(span name, total ms)] by exclusive time, largest first."""
+        child_ms = {}
+        for s in self.spans:
+            if s["parent_id"]:
+                child_ms[s["parent_id"]] = child_ms.get(s["parent_id"], 0) + s["duration_ms"]
+        totals = {}
+        for s in self.spans:
+            own = max(s["duration_ms"] - child_ms.get(s["span_id"], 0), 0)
+            totals[s["name"]] = totals.get(s["name"], 0) + own
+        return sorted(((n, round(ms, 1)) for n, ms in totals.items()), key=lambda x: -x[1])[:top]
+
+    def export(self, directory: str = TRACE_DIR):
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.id}.jsonl")
+        with open(path, "w") as f:
+            for s in self.spans:
+                f.write(json.dumps(s, default=str) + "\n")
+        return path
+
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+recent = deque(maxlen=50)  # finished traces, newest last
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a block as a child of the current span. Works in sync and async code;
+    tasks started inside inherit it as their parent.
+    """
+    parent = _current_span.get()
+    trace = _current_trace.get()
+    s = Span(name, trace.id if trace else None, parent.span_id if parent else None, attrs)
+    token = _current_span.set(s)
+    t0 = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.fail(str(e) or type(e).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        s.duration_ms = round(elapsed * 1000, 2)
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned async generator)
+            pass
+        SPAN_SECONDS.observe(elapsed, span=name)
+        SPANS.inc(span=name, status=s.status)
+        if trace is not None:
+            trace.spans.append(s.to_dict())
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    """Collect every span opened inside (including in child tasks) under one trace id."""
+    t = Trace(name)
+    token = _current_trace.set(t)
+    try:
+        with span(name, **attrs) as root:
+            yield t
+    finally:
+        _current_trace.reset(token)
+        recent.append(t)
+        try:
+            path = t.export()
+            if path:
+                logger.info(f"Trace written to {path}")
+        except OSError as e:
+            logger.warning(f"Trace export failed: {e}")
+        logger.info(f"Trace {t.id} ({root.duration_ms} ms) hot spots: {t.hot_spots()}")
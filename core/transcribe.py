@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import shutil
+import wave
+
+try:
+    import numpy as np
+except ImportError:  # no silence detection without it; clips go up whole
+    np = None
+
+from core import assets, capture, llm_gateway
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.getenv("TRANSCRIBE_BACKEND", "whisper")
+FIXTURE_DIR = os.getenv("TRANSCRIBE_FIXTURES", "")
+CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))
+# Clips shorter than this are sent as-is
+CHUNK_MIN_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_MIN_SECONDS", "45"))
+CHUNK_TARGET_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_TARGET_SECONDS", "30"))
+SILENCE_DBFS = float(os.getenv("TRANSCRIBE_SILENCE_DBFS", "-40"))
+CACHE_DIR = os.path.join(assets.CACHE_DIR, "transcripts")
+
+SAMPLE_RATE = 16000
+FRAME_MS = 50
+
+
+class Backend:
+    """Turns one audio clip into text."""
+    name = "base"
+
+    async def transcribe(self, audio: bytes, filename: str) -> str:
+        raise NotImplementedError
+
+
+class WhisperBackend(Backend):
+    name = "whisper-1"
+
+    async def transcribe(self, audio: bytes, filename: str) -> str:
+        # Upload straight from memory on the pooled client; no shared temp files
+        result = await llm_gateway.openai_client().audio.transcriptions.create(
+            model="whisper-1", file=(filename, audio)
+        )
+        return result.text.strip()
+
+
+class FixtureBackend(Backend):
+    """
+    Offline stand-in: returns <dir>/<sha256 of clip>.txt, or `default`.
+    Lets tests and replays run without the remote API.
+    """
+    name = "fixture"
+
+    def __init__(self, directory: str = FIXTURE_DIR, default: str = ""):
+        self.directory = directory
+        self.default = default
+
+    async def transcribe(self, audio: bytes, filename: str) -> str:
+        path = os.path.join(self.directory, hashlib.sha256(audio).hexdigest() + ".txt")
+        if self.directory and os.path.exists(path):
+            with open(path) as f:
+                return f.read().strip()
+        return self.default
+
+
+BACKENDS = {"whisper": WhisperBackend, "fixture": FixtureBackend}
+_backend = None
+
+
+def get_backend() -> Backend:
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[BACKEND]()
+    return _backend
+
+
+def set_backend(backend: Backend) -> Backend:
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+async def decode_pcm(audio: bytes):
+    """16 kHz mono s16le samples via ffmpeg, or None if ffmpeg is unavailable/fails."""
+    if np is None or shutil.which("ffmpeg") is None:
+        return None
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate(audio)
+    if proc.returncode != 0:
+        logger.warning(f"ffmpeg decode failed: {err.decode(errors='replace')[:200]}")
+        return None
+    return np.frombuffer(out, dtype=np.int16)
+
+
+def split_points(samples) -> list:
+    """Sample offsets to cut at: the quietest frame near every CHUNK_TARGET_SECONDS boundary."""
+    frame = SAMPLE_RATE * FRAME_MS // 1000
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return []
+    frames = samples[: n_frames * frame].astype(np.float64).reshape(n_frames, frame)
+    rms = np.sqrt((frames ** 2).mean(axis=1)) / 32768.0
+    dbfs = 20 * np.log10(np.maximum(rms, 1e-9))
+
+    target = int(CHUNK_TARGET_SECONDS * 1000 / FRAME_MS)
+    window = target // 3
+    cuts = []
+    start = 0
+    while n_frames - start > target + window:
+        lo, hi = start + target - window, start + target + window
+        quiet = np.flatnonzero(dbfs[lo:hi] < SILENCE_DBFS)
+        # Prefer real silence; otherwise the quietest frame in the window
+        best = lo + (quiet[len(quiet) // 2] if len(quiet) else int(np.argmin(dbfs[lo:hi])))
+        cuts.append(best * frame)
+        start = best
+    return cuts
+
+
+def to_wav(samples) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+
+async def chunk_audio(audio: bytes, filename: str) -> list:
+    """[(bytes, filename)] — the clip itself, or silence-aligned WAV chunks for long clips."""
+    samples = await decode_pcm(audio)
+    if samples is None or len(samples) < CHUNK_MIN_SECONDS * SAMPLE_RATE:
+        return [(audio, filename)]
+    bounds = [0] + split_points(samples) + [len(samples)]
+    return [(to_wav(samples[a:b]), f"chunk{i}.wav") for i, (a, b) in enumerate(zip(bounds, bounds[1:]))]
+
+
+def _cache_path(digest: str, backend: Backend) -> str:
+    return os.path.join(CACHE_DIR, f"{backend.name}-{digest}.txt")
+
+
+async def transcribe(audio: bytes, filename: str = "audio.opus", backend: Backend = None) -> str:
+    """Transcript of `audio`, cached by content hash; long clips are split and sent concurrently."""
+    backend = backend or get_backend()
+    digest = hashlib.sha256(audio).hexdigest()
+    if capture.replaying():
+        return capture.replay_transcript(digest)
+    path = _cache_path(digest, backend)
+    if os.path.exists(path):
+        with open(path) as f:
+            text = f.read()
+        if capture.recording():
+            capture.record_transcript(digest, text)
+        return text
+
+    chunks = await chunk_audio(audio, filename)
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(data: bytes, name: str) -> str:
+        async with sem:
+            return await backend.transcribe(data, name)
+
+    parts = await asyncio.gather(*(one(d, n) for d, n in chunks))
+    text = " ".join(p.strip() for p in parts if p and p.strip())
+    logger.info(f"Transcribed {len(chunks)} chunk(s) with {backend.name}")
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    if capture.recording():
+        capture.record_transcript(digest, text)
+    return text
@@ -0,0 +1,307 @@
+"""
+Git tree listings as sorted-path indexes. A tree is fetched once per
+immutable SHA and kept on disk, so repeat count/list/size queries need no
+network: prefixes are a bisect range, extensions a precomputed bucket.
+
+    GITHUB_TREE_SOURCE=github    (default; the REST trees API, SHAs via the asset cache)
+    GITHUB_TREE_SOURCE=git       (a local clone at GITHUB_TREE_GIT_DIR)
+    GITHUB_TREE_SOURCE=fixture   (<GITHUB_TREE_FIXTURES>/<sha>.json, API-shaped)
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from bisect import bisect_left
+from collections import OrderedDict
+from core import assets, capture, http_client, shared, tracing
+
+logger = logging.getLogger(__name__)
+
+SOURCE = os.getenv("GITHUB_TREE_SOURCE", "github")
+GIT_DIR = os.getenv("GITHUB_TREE_GIT_DIR", ".")
+FIXTURE_DIR = os.getenv("GITHUB_TREE_FIXTURES", "")
+MEMORY_ENTRIES = int(os.getenv("GITHUB_TREE_MEMORY_ENTRIES", "16"))
+# Subtrees fetched at once when a recursive listing comes back truncated
+CONCURRENCY = int(os.getenv("GITHUB_TREE_CONCURRENCY", "8"))
+API = "https://api.github.com"
+
+# Only full object ids are immutable; branch or tag names are never cached here
+OBJECT_ID = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+TYPES = {"blob": "b", "tree": "t", "commit": "c"}
+KINDS = {v: k for k, v in TYPES.items()}
+# Sorts after any character a path can continue with
+_PREFIX_END = "\U0010ffff"
+
+stats = {"memory_hits": 0, "disk_hits": 0, "builds": 0, "subtree_fetches": 0}
+
+
+def _extension(path: str) -> str:
+    """Suffix from the last dot of the basename ('' if none), as endswith() would see it."""
+    name = path[path.rfind("/") + 1:]
+    dot = name.rfind(".")
+    return name[dot:] if dot != -1 else ""
+
+
+class TreeIndex:
+    """
+    Every entry of a tree, sorted by path, in parallel columns
+    (paths, one-letter types, sizes) plus a per-extension bucket of the same.
+    """
+
+    def __init__(self, paths: list, types: str, sizes: list):
+        self.paths = paths
+        self.types = types
+        self.sizes = sizes
+        self.extensions = {}  # ext -> (paths, positions), both sorted by path
+        for i, path in enumerate(paths):
+            bucket = self.extensions.setdefault(_extension(path), ([], []))
+            bucket[0].append(path)
+            bucket[1].append(i)
+
+    @classmethod
+    def from_entries(cls, entries) -> "TreeIndex":
+        """From GitHub-shaped entries: {path, type, size?}."""
+        rows = sorted((e["path"], TYPES.get(e.get("type"), "b"), e.get("size") or 0) for e in entries)
+        return cls([r[0] for r in rows], "".join(r[1] for r in rows), [r[2] for r in rows])
+
+    def __len__(self):
+        return len(self.paths)
+
+    # --- queries -----------------------------------------------------------
+    @staticmethod
+    def _range(paths: list, prefix: str):
+        if not prefix:
+            return 0, len(paths)
+        return bisect_left(paths, prefix), bisect_left(paths, prefix + _PREFIX_END)
+
+    def select(self, prefix: str = "", ext: str = "", kind: str = None) -> list:
+        """Positions of entries under `prefix` whose path ends with `ext`, optionally of one kind."""
+        if ext.startswith(".") and "." not in ext[1:] and "/" not in ext:
+            paths, positions = self.extensions.get(ext, ([], []))
+            lo, hi = self._range(paths, prefix)
+            found = positions[lo:hi]
+        else:
+            lo, hi = self._range(self.paths, prefix)
+            found = [i for i in range(lo, hi) if self.paths[i].endswith(ext)] if ext else list(range(lo, hi))
+        if kind is not None:
+            code = TYPES[kind]
+            found = [i for i in found if self.types[i] == code]
+        return found
+
+    def count(self, prefix: str = "", ext: str = "", kind: str = None) -> int:
+        if kind is None and ext.startswith(".") and "." not in ext[1:] and "/" not in ext:
+            paths = self.extensions.get(ext, ([], []))[0]
+            lo, hi = self._range(paths, prefix)
+            return hi - lo
+        return len(self.select(prefix, ext, kind))
+
+    def list(self, prefix: str = "", ext: str = "", kind: str = None) -> list:
+        return [self.paths[i] for i in self.select(prefix, ext, kind)]
+
+    def size(self, prefix: str = "", ext: str = "", kind: str = "blob") -> int:
+        """Total bytes of matching entries (only blobs carry a size)."""
+        return sum(self.sizes[i] for i in self.select(prefix, ext, kind))
+
+    def extension_counts(self, prefix: str = "") -> dict:
+        """{extension: entries under `prefix`}."""
+        counts = {}
+        for ext, (paths, _) in self.extensions.items():
+            lo, hi = self._range(paths, prefix)
+            if hi > lo:
+                counts[ext] = hi - lo
+        return counts
+
+    # --- storage -----------------------------------------------------------
+    def dump(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({"version": 1, "paths": self.paths, "types": self.types, "sizes": self.sizes}, f,
+                      separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TreeIndex":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["paths"], data["types"], data["sizes"])
+
+
+# ----------------------------------------------------------------------
+# Sources
+# ----------------------------------------------------------------------
+class Source:
+    """Lists every entry of a tree, GitHub-shaped: [{path, type, size?}]."""
+    name = "base"
+
+    async def entries(self, owner: str, repo: str, sha: str) -> list:
+        raise NotImplementedError
+
+
+class GitHubSource(Source):
+    """
+    The recursive trees API. A truncated listing (very large trees) is
+    completed by listing that level on its own and recursing into each
+    subtree concurrently, so no single response has to hold everything.
+    """
+    name = "github"
+
+    def __init__(self, api: str = API, concurrency: int = CONCURRENCY):
+        self.api = api.rstrip("/")
+        self.concurrency = concurrency
+
+    async def entries(self, owner: str, repo: str, sha: str) -> list:
+        sem = asyncio.Semaphore(self.concurrency)
+        base = f"{self.api}/repos/{owner}/{repo}/git/trees"
+
+        async def walk(tree_sha: str, prefix: str, recursive: bool = True) -> list:
+            async with sem:
+                listing = await self._listing(f"{base}/{tree_sha}{'?recursive=1' if recursive else ''}", tree_sha)
+            if recursive and listing.get("truncated"):
+                return await walk(tree_sha, prefix, recursive=False)
+            items = [{**e, "path": prefix + e["path"]} for e in listing.get("tree", [])]
+            if recursive:
+                return items
+            subtrees = [e for e in items if e.get("type") == "tree"]
+            stats["subtree_fetches"] += len(subtrees)
+            nested = await asyncio.gather(*(walk(e["sha"], e["path"] + "/") for e in subtrees))
+            return items + [e for part in nested for e in part]
+
+        return await walk(sha, "")
+
+    async def _listing(self, url: str, sha: str) -> dict:
+        if OBJECT_ID.fullmatch(sha):
+            # Addressed by SHA, so the asset cache's copy never goes stale
+            return await assets.fetch_json(url)
+        # A branch or tag can move: the asset cache would serve it unrevalidated for minutes
+        resp = await http_client.get(url)
+        resp.raise_for_status()
+        return resp.json()
+
+
+class GitSource(Source):
+    """`git ls-tree` against a local clone that has the commit or tree."""
+    name = "git"
+
+    def __init__(self, directory: str = GIT_DIR):
+        self.directory = directory
+
+    async def entries(self, owner: str, repo: str, sha: str) -> list:
+        proc = await asyncio.create_subprocess_exec(
+            "git", "-C", self.directory, "ls-tree", "-r", "-t", "-l", "-z", sha,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        out, err = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"git ls-tree {sha} failed: {err.decode(errors='replace')[:200]}")
+        items = []
+        for record in out.decode("utf-8", errors="surrogateescape").split("\0"):
+            if not record:
+                continue
+            meta, path = record.split("\t", 1)
+            _mode, kind, _object, size = meta.split()
+            items.append({"path": path, "type": kind, "size": int(size) if size.isdigit() else None})
+        return items
+
+
+class FixtureSource(Source):
+    """Offline stand-in: <dir>/<sha>.json holding a trees API response."""
+    name = "fixture"
+
+    def __init__(self, directory: str = FIXTURE_DIR):
+        self.directory = directory
+
+    async def entries(self, owner: str, repo: str, sha: str) -> list:
+        with open(os.path.join(self.directory, f"{sha}.json")) as f:
+            return json.load(f).get("tree", [])
+
+
+SOURCES = {"github": GitHubSource, "git": GitSource, "fixture": FixtureSource}
+_source = None
+
+
+def get_source() -> Source:
+    global _source
+    if _source is None:
+        _source = SOURCES[SOURCE]()
+    return _source
+
+
+def set_source(source: Source) -> Source:
+    global _source
+    previous, _source = _source, source
+    return previous
+
+
+# ----------------------------------------------------------------------
+# Loading
+# ----------------------------------------------------------------------
+_memory = OrderedDict()
+_inflight = {}
+
+
+def _index_path(key: str) -> str:
+    # Under the live asset cache, so fresh caches (bench, replay) start empty too
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return os.path.join(assets.cache.disk.root, "trees", f"{digest}.json.gz")
+
+
+def _remember(key: str, index: TreeIndex):
+    _memory[key] = index
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+
+
+async def _build(key: str, owner: str, repo: str, sha: str, source: Source) -> TreeIndex:
+    with tracing.span("tree_index", source=source.name, sha=sha) as sp:
+        if not OBJECT_ID.fullmatch(sha):
+            # A branch or tag can move: list it every time
+            sp.set(cache="ref")
+            return TreeIndex.from_entries(await source.entries(owner, repo, sha))
+        path = _index_path(key)
+        # While recording, go through the source so the listing lands in the capture
+        if os.path.exists(path) and not capture.recording():
+            stats["disk_hits"] += 1
+            sp.set(cache="disk")
+            index = await asyncio.to_thread(TreeIndex.load, path)
+        else:
+            # Workers sharing the cache directory build each tree once
+            async with shared.lock(f"tree:{path}"):
+                if os.path.exists(path) and not capture.recording():
+                    stats["disk_hits"] += 1
+                    sp.set(cache="disk")
+                    index = await asyncio.to_thread(TreeIndex.load, path)
+                else:
+                    stats["builds"] += 1
+                    sp.set(cache="miss")
+                    index = TreeIndex.from_entries(await source.entries(owner, repo, sha))
+                    await asyncio.to_thread(index.dump, path)
+        sp.set(entries=len(index))
+        _remember(key, index)
+        return index
+
+
+async def load(owner: str, repo: str, sha: str, source: Source = None) -> TreeIndex:
+    """Index of the tree at `sha`, from memory, disk, or (once) the source."""
+    source = source or get_source()
+    key = f"{source.name}:{owner}/{repo}@{sha}"
+    index = _memory.get(key)
+    if index is not None and not capture.recording():
+        stats["memory_hits"] += 1
+        _memory.move_to_end(key)
+        return index
+    # Concurrent queries for the same tree share one build
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_build(key, owner, repo, sha, source))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+tracing.metrics.collect("quiz_tree_index_events_total", "Tree index hits, builds and subtree fetches.", "counter",
+                        lambda: [({"event": k}, v) for k, v in stats.items()])
@@ -0,0 +1,55 @@
+import asyncio
+import logging
+from core import assets, budget, codegen, extract, sandbox
+
+logger = logging.getLogger(__name__)
+
+DATA_EXTENSIONS = ("sql", "json", "txt")
+
+
+async def handler(question: str, url: str = None, index: extract.PageIndex = None) -> str:
+    """
+    Answer a question about a data file by running a small LLM-written program
+    over the whole file (see core.codegen / core.sandbox) instead of pasting a
+    truncated copy into the prompt. Programs are reused across questions of the
+    same template once an answer from them has been accepted (codegen.settle).
+    "" when no program works, or when the sandbox cannot isolate one here, so
+    the router falls back to the LLM.
+    """
+    try:
+        if await sandbox.unavailable():
+            return ""
+        index = index or extract.build_index(url or "", question)
+        file_url = index.asset(*DATA_EXTENSIONS) or next(
+            (u for u in index.known_file_urls() if codegen.file_kind(u) in DATA_EXTENSIONS), None
+        )
+        if not file_url:
+            return ""
+        name = file_url.rsplit("/", 1)[-1]
+        kind = codegen.file_kind(name)
+        path = await assets.fetch_path(file_url)
+        template, params = codegen.template(question)
+        key = codegen.store.key(template, kind)
+
+        cached = codegen.store.lookup(key)
+        if cached is not None:
+            try:
+                answer = await sandbox.run(cached[1], cached[0], path, kind, params)
+                codegen.propose(question, answer, key, template, *cached)
+                logger.info(f"    ⚙️ Cached {cached[0]} program answered: {answer}")
+                return answer
+            except sandbox.SandboxError as e:
+                logger.warning(f"    Cached program failed ({e}); writing a new one")
+                codegen.store.forget(key)
+
+        if not budget.affords(budget.LLM_MIN_SECONDS):
+            return ""
+        head = await asyncio.to_thread(codegen.sample, path, kind)
+        language, code = await codegen.generate(template, params, name, head)
+        answer = await sandbox.run(code, language, path, kind, params)
+        codegen.propose(question, answer, key, template, language, code)
+        logger.info(f"    ⚙️ Generated {language} program answered: {answer}")
+        return answer
+    except Exception as e:
+        logger.error(f"    Code solver failed: {e}")
+        return ""
@@ -1,31 +1,14 @@
-import re
-import csv
-from io import StringIO
-import httpx
+from core import assets, csv_stream, extract
 
-async def handler(question: str, url: str) -> str:
+async def handler(question: str, url: str, index: extract.PageIndex = None) -> str:
     try:
-        m = re.search(r'Cutoff[:\s]+(\d+)', question, re.IGNORECASE)
-        cutoff = int(m.group(1)) if m else 0
-        csv_url = None
-        m = re.search(r'(https?://[^\s<>"\']+\.csv[^\s<>"\']*)', question, re.IGNORECASE)
-        if m:
-            csv_url = m.group(1)
+        index = index or extract.build_index(url, question)
+        cutoff = index.params.get("cutoff", 0)
+        csv_url = index.asset("csv")
         if not csv_url:
             return "0"
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(csv_url, timeout=10)
-            csv_text = resp.text
-        reader = csv.reader(StringIO(csv_text))
-        total = 0
-        for row in reader:
-            for cell in row:
-                try:
-                    v = float(cell)
-                    if v > cutoff:
-                        total += v
-                except:
-                    pass
+        # Parsed chunk by chunk as it streams in; numeric columns are summed vectorized
+        total = await csv_stream.sum_above(assets.stream(csv_url), cutoff)
         return str(int(total))
     except:
         return "0"
@@ -1,29 +1,20 @@
-import re
-import httpx
-import json
+from core import assets, extract, tree_index
 
-async def handler(question: str, url: str, email: str) -> str:
+async def handler(question: str, url: str, email: str, index: extract.PageIndex = None) -> str:
     try:
-        m = re.search(r'(/project2/[^\s"\'<>]+\.json)', question)
-        if not m:
+        index = index or extract.build_index(url, question)
+        cfg_url = index.asset("json")
+        if not cfg_url:
             return "0"
-        relative = m.group(1)
-        domain = re.match(r'(https?://[^/]+)', url).group(1)
-        cfg_url = domain + relative
-        async with httpx.AsyncClient() as client:
-            cfg = (await client.get(cfg_url)).json()
+        cfg = await assets.fetch_json(cfg_url)
         owner = cfg["owner"]
         repo = cfg["repo"]
         sha = cfg["sha"]
         prefix = cfg.get("pathPrefix", "")
         ext = cfg.get("extension", ".md")
-        api = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{sha}?recursive=1"
-        tree = (await httpx.AsyncClient().get(api)).json()
-        count = 0
-        for item in tree.get("tree", []):
-            path = item.get("path", "")
-            if path.startswith(prefix) and path.endswith(ext):
-                count += 1
+        # Indexed once per SHA; repeat questions never touch the network
+        tree = await tree_index.load(owner, repo, sha)
+        count = tree.count(prefix, ext)
         offset = len(email) % 2
         return str(count + offset)
     except:
@@ -1,23 +1,33 @@
+import asyncio
 import re
-import io
-from collections import Counter
-from PIL import Image
-import httpx
+from core import assets, colors, extract
 
-async def handler(question: str, url: str) -> str:
+_TOP_K = re.compile(r'top\s+(\d+)\s+(?:most\s+(?:common|frequent)\s+)?colou?rs', re.IGNORECASE)
+_MEAN = re.compile(r'\b(?:average|mean)\s+colou?r', re.IGNORECASE)
+_REGION = re.compile(
+    r'(?:region|area|box|crop)[^0-9]*\(?\s*(\d+)\s*,\s*(\d+)\s*\)?[^0-9]+\(?\s*(\d+)\s*,\s*(\d+)\s*\)?',
+    re.IGNORECASE,
+)
+
+def _solve(img_bytes: bytes, question: str) -> str:
+    m = _REGION.search(question)
+    region = tuple(int(g) for g in m.groups()) if m else None
+    img = colors.load(img_bytes, region=region)
+    if _MEAN.search(question):
+        return colors.mean_color(img)
+    m = _TOP_K.search(question)
+    if m:
+        return ",".join(hex_ for hex_, _ in colors.top_colors(img, int(m.group(1))))
+    return colors.dominant(img)
+
+async def handler(question: str, url: str, index: extract.PageIndex = None) -> str:
     try:
-        m = re.search(r'(/project2/[^\s"\'<>]+\.png)', question)
-        if not m:
+        index = index or extract.build_index(url, question)
+        img_url = index.asset("png")
+        if not img_url:
             return "#000000"
-        relative = m.group(1)
-        domain = re.match(r'(https?://[^/]+)', url).group(1)
-        img_url = domain + relative
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(img_url, timeout=10)
-            img_bytes = resp.content
-        img = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-        pixels = list(img.getdata())
-        (r, g, b), _ = Counter(pixels).most_common(1)[0]
-        return "#{:02x}{:02x}{:02x}".format(r, g, b)
+        img_bytes = await assets.fetch_bytes(img_url)
+        # Decoding and counting are CPU-bound; keep the event loop free
+        return await asyncio.to_thread(_solve, img_bytes, question)
     except:
         return "#000000"
@@ -1,31 +1,24 @@
-import re
-import io
-import zipfile
 import json
-import httpx
+from core import assets, extract, logstream
 
-async def handler(question: str, url: str, email: str) -> str:
+async def handler(question: str, url: str, email: str, index: extract.PageIndex = None) -> str:
     try:
-        m = re.search(r'(/project2/[^\s"\'<>]+\.zip)', question)
-        if not m:
+        index = index or extract.build_index(url, question)
+        zip_url = index.asset("zip", "gz", "jsonl")
+        if not zip_url:
             return "0"
-        relative = m.group(1)
-        domain = re.match(r'(https?://[^/]+)', url).group(1)
-        zip_url = domain + relative
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(zip_url, timeout=10)
-            zip_bytes = resp.content
-        total = 0
-        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as z:
-            for name in z.namelist():
-                with z.open(name) as f:
-                    for line in f:
-                        try:
-                            obj = json.loads(line)
-                            if obj.get("event") == "download":
-                                total += obj.get("bytes", 0)
-                        except:
-                            pass
+        spec = logstream.spec_from_question(question)
+        if spec is None:
+            # No filter we can trust; "0" hands the question to the LLM
+            return "0"
+        # Spooled to disk by the asset cache, then mmapped by the workers
+        path = await assets.fetch_path(zip_url)
+        totals = await logstream.aggregate(path, spec)
+        if spec.group_by:
+            return json.dumps(dict(sorted(totals.items())))
+        total = totals.get("", 0)
+        if isinstance(total, float) and total.is_integer():
+            total = int(total)
         offset = len(email) % 5
         return str(total + offset)
     except:
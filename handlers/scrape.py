@@ -1,5 +1,5 @@
 import re
-from playwright.async_api import async_playwright
+from core.fetch import fetch_page
 
 async def handler(question: str, url: str) -> str:
     
@@ -15,19 +15,13 @@ async def handler(question: str, url: str) -> str:
         
         print(f"  Scraping: {scrape_url}")
         
-        # Use Playwright to render
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
-            await page.goto(scrape_url, wait_until="networkidle", timeout=10000)
-            await page.wait_for_timeout(1500)
-            
-            html = await page.content()
-            text = await page.text_content("body")
-            
-            await browser.close()
+        # Render via the shared fetcher (pooled browser, adaptive readiness)
+        page_data = await fetch_page(scrape_url)
+        if not page_data:
+            return "error"
+        text = page_data["question"]
         
+        print(f"  Fetch timings ({page_data['strategy']}): {page_data['timings']}")
         print(f"  Full content:\n{text[:300]}...")
         
         # Look for "Secret code is XXXX" pattern
@@ -44,17 +38,16 @@ async def handler(question: str, url: str) -> str:
             print(f"  ✅ Found code: {secret}")
             return secret
         
-        # Look in HTML comments
-        m = re.search(r'<!--\s*([0-9a-zA-Z_\-]{6,})\s*-->', html, re.IGNORECASE)
-        if m:
-            secret = m.group(1).strip()
-            print(f"  ✅ Found in comment: {secret}")
-            return secret
+        # Look in HTML comments (already indexed by fetch_page)
+        index = page_data["index"]
+        for comment in index.comments:
+            if re.fullmatch(r'[0-9a-zA-Z_\-]{6,}', comment):
+                print(f"  ✅ Found in comment: {comment}")
+                return comment
         
         # Look for data attributes
-        m = re.search(r'data-secret=["\']([^"\']+)["\']', html, re.IGNORECASE)
-        if m:
-            secret = m.group(1).strip()
+        if index.data_attrs.get("secret"):
+            secret = index.data_attrs["secret"].strip()
             print(f"  ✅ Found in data attr: {secret}")
             return secret
         
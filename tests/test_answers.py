@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+
+from core import answers, extract, http_client
+from core.submit import submit_answer
+
+PAGE = "https://quiz.example/q1"
+
+
+def test_unknown_verdict_never_overrides(tmp_path):
+    store = answers.AnswerStore(str(tmp_path / "answers.sqlite"))
+    store.record("k", "42", None)
+    assert store.lookup("k") is None
+    store.record("k", "42", True)
+    store.record("k", "42", None)  # e.g. a resubmit that hit a network error
+    assert store.lookup("k") == "42"
+
+
+def test_later_accept_replaces_reject(tmp_path):
+    store = answers.AnswerStore(str(tmp_path / "answers.sqlite"))
+    store.record("k", "42", False)
+    store.record("k", "42", True)
+    assert store.lookup("k") == "42"
+    store.record("k", "42", False)
+    assert store.lookup("k") is None
+
+
+def test_submit_without_verdict_is_unknown():
+    async def submit():
+        transport = httpx.MockTransport(lambda request: httpx.Response(400, text="bad gateway"))
+        with http_client.override(transport=transport) as client:
+            try:
+                return await submit_answer("a@b.c", "s", PAGE, "42", "https://quiz.example/submit")
+            finally:
+                await client.aclose()
+    resp = asyncio.run(submit())
+    assert resp["correct"] is None
+    assert resp["reason"] == "HTTP 400"
+
+
+def test_fingerprints_only_what_handlers_read():
+    index = extract.build_index(
+        PAGE, "Find the dominant color of /img/heatmap.png. See database.sql and config.json.",
+        '<img src="/img/logo.png"><a href="/docs/help.pdf">help</a>',
+    )
+    inputs = answers.solver_inputs(index)
+    assert "https://quiz.example/img/heatmap.png" in inputs
+    assert "https://quiz.example/img/logo.png" not in inputs
+    assert f"{extract.BASE_FILE_URL}database.sql" in inputs
+    assert f"{extract.BASE_FILE_URL}config.json" in inputs
+    # The footer PDF is still the first (only) pdf, so a handler could read it
+    assert "https://quiz.example/docs/help.pdf" in inputs
+
+
+def test_slow_file_does_not_block_the_key(monkeypatch):
+    async def slow(url):
+        await asyncio.sleep(30)
+    monkeypatch.setattr(answers.assets.cache, "ensure", slow)
+    monkeypatch.setattr(answers, "FINGERPRINT_TIMEOUT", 0.05)
+
+    async def keys():
+        question = "Sum the values in /data/sales.csv"
+        return [await answers.key_for(question, PAGE, "a@b.c") for _ in range(2)]
+    first, second = asyncio.run(keys())
+    assert first != second
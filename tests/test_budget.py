@@ -0,0 +1,27 @@
+import asyncio
+import time
+
+from core import budget, chain
+
+
+def test_timeout_is_capped_by_what_is_left():
+    b = budget.Budget(limit=30, reserve=10)
+    assert 19 < b.timeout(60) <= 20
+    assert 29 < b.timeout(60, submit=True) <= 30
+    assert budget.Budget(limit=0).timeout(60) == 60
+
+
+def test_solve_runs_into_half_the_reserve(monkeypatch):
+    async def never(key, solve):
+        await asyncio.sleep(30)
+    monkeypatch.setattr(chain.shared, "solve_once", never)
+    b = budget.Budget(limit=2.0, reserve=1.0)
+
+    async def solve():
+        t0 = time.monotonic()
+        try:
+            await chain._solve("k", "q", "https://quiz.example/q1", {}, "a@b.c", b)
+        except asyncio.TimeoutError:
+            return time.monotonic() - t0
+    # Solve deadline at 1s; the runaway guard fires at 1.5s
+    assert 1.3 < asyncio.run(solve()) < 1.8
@@ -0,0 +1,26 @@
+import asyncio
+
+from core import http_client, llm_gateway
+
+
+def test_openai_client_follows_the_shared_pool(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    backend = llm_gateway.OpenAIBackend()
+    first = backend.client()
+    assert backend.client() is first
+    asyncio.run(http_client.stop())
+    again = backend.client()
+    assert again is not first and not http_client.get_client().is_closed
+    asyncio.run(http_client.stop())
+
+
+def test_stop_drops_loop_bound_primitives():
+    async def use():
+        async with http_client._slot("https://example.com/a"):
+            pass
+        llm_gateway._limits_for("key")
+
+    asyncio.run(use())
+    asyncio.run(http_client.stop())
+    llm_gateway.stop()
+    assert http_client._host_slots == {} and llm_gateway._limits == {}
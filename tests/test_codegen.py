@@ -0,0 +1,49 @@
+import pytest
+
+from core import codegen
+
+
+@pytest.mark.parametrize("question, template, params", [
+    ("Sum the values above 500 in numbers.txt.", "Sum the values above {0} in numbers.txt.", [500]),
+    ("How many dates fall after 2024-01-02? Use 4.", "How many dates fall after {0}? Use {1}.", ["2024-01-02", 4]),
+    ("Mail a@b.co about -3.5 at https://x.y/q?id=7", "Mail {0} about {1} at <url>", ["a@b.co", -3.5]),
+    ("Cutoff:  12\nnow", "Cutoff: {0} now", [12]),
+])
+def test_template_lifts_values(question, template, params):
+    assert codegen.template(question) == (template, params)
+
+
+def test_same_template_for_every_variant():
+    assert codegen.template("Count rows above 10 in echo.json")[0] == codegen.template("Count rows above 99 in echo.json")[0]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = codegen.ProgramStore(str(tmp_path / "programs.sqlite"))
+    monkeypatch.setattr(codegen, "store", store)
+    codegen._pending.clear()
+    return store
+
+
+def test_program_kept_only_after_accept(store):
+    codegen.propose("q", "42", "k", "t", "python", "answer = 42")
+    assert store.lookup("k") is None
+    codegen.settle("q", "42", None)  # no verdict: nothing kept
+    assert store.lookup("k") is None
+    codegen.propose("q", "42", "k", "t", "python", "answer = 42")
+    codegen.settle("q", "42", True)
+    assert store.lookup("k") == ("python", "answer = 42")
+
+
+def test_rejected_program_is_forgotten(store):
+    store.record("k", "t", "python", "answer = 41")
+    codegen.propose("q", "41", "k", "t", "python", "answer = 41")
+    codegen.settle("q", "41", False)
+    assert store.lookup("k") is None
+
+
+def test_settle_ignores_answers_from_other_solvers(store):
+    store.record("k", "t", "python", "answer = 41")
+    codegen.propose("q", "41", "k", "t", "python", "answer = 41")
+    codegen.settle("q", "something else", False)
+    assert store.lookup("k") == ("python", "answer = 41")
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from core import csv_stream
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    """Two rows per batch, so column typing is exercised across batches."""
+    parse = csv_stream.iter_batches
+    monkeypatch.setattr(csv_stream, "iter_batches", lambda chunks, batch_rows=2: parse(chunks, batch_rows))
+
+
+async def _chunks(data: bytes, size: int = 7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _sum(data: bytes, cutoff: float) -> float:
+    return asyncio.run(csv_stream.sum_above(_chunks(data), cutoff))
+
+
+def _baseline(data: bytes, cutoff: float) -> float:
+    total = 0.0
+    for line in data.decode().splitlines():
+        for cell in line.split(","):
+            try:
+                v = float(cell)
+            except ValueError:
+                continue
+            total += v if v > cutoff else 0
+    return total
+
+
+def test_numbers_after_a_text_batch_still_count():
+    data = b"name,value\nfoo,bar\nbaz,qux\n1,20\n30,n/a\n5,7\n"
+    assert _sum(data, 6) == _baseline(data, 6) == 20 + 30 + 7
+
+
+def test_header_and_ragged_rows():
+    data = b"100,value\n1,2\n3\n4,50,60\n"
+    assert _sum(data, 2) == _baseline(data, 2) == 100 + 3 + 4 + 50 + 60
+
+
+def test_quoted_newlines_across_chunks():
+    batches = asyncio.run(_collect(b'a,b\n"x\ny",1\n2,3\n'))
+    assert [row for batch in batches for row in batch] == [["a", "b"], ["x\ny", "1"], ["2", "3"]]
+
+
+async def _collect(data: bytes):
+    return [batch async for batch in csv_stream.iter_batches(_chunks(data, 3))]
+
+
+def test_normalized_rows_types_columns():
+    async def run():
+        data = b"ID,Full Name,Joined\n2,Ann,03/01/2024\n1,Bob,2024-01-02\n"
+        return await csv_stream.encode_sorted(csv_stream.normalized_rows(_chunks(data)))
+    assert asyncio.run(run()) == (
+        '[{"id": 1, "full_name": "Bob", "joined": "2024-01-02"}, '
+        '{"id": 2, "full_name": "Ann", "joined": "2024-01-03"}]'
+    )
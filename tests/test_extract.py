@@ -0,0 +1,30 @@
+from core.extract import build_index
+
+PAGE = "https://tds-llm-analysis.s-anand.net/demo-audio?email=a%40b.c&id=1"
+
+
+def test_cutoff_run_together_with_next_sentence():
+    # Visible text of the TDS audio step: no space between the cutoff and "Post"
+    question = (
+        "Download CSV file. Cutoff: 500Post your answer to "
+        "https://tds-llm-analysis.s-anand.net/submit with this JSON payload:"
+    )
+    index = build_index(PAGE, question)
+    assert index.params["cutoff"] == 500
+    assert index.submit_url == "https://tds-llm-analysis.s-anand.net/submit"
+
+
+def test_number_at_sentence_end():
+    assert build_index(PAGE, "Sum values above the cutoff. Cutoff: 500.").params["cutoff"] == 500
+
+
+def test_decimal_and_first_value_wins():
+    index = build_index(PAGE, "threshold = 12.5, later threshold = 3")
+    assert index.params["threshold"] == 12.5
+
+
+def test_assets_and_known_files():
+    index = build_index(PAGE, "Download /data/sales.csv and read config.json", '<a href="clip.opus">x</a>')
+    assert index.asset("csv") == "https://tds-llm-analysis.s-anand.net/data/sales.csv"
+    assert index.asset("opus") == "https://tds-llm-analysis.s-anand.net/clip.opus"
+    assert index.known_files == ["config.json"]
@@ -0,0 +1,64 @@
+import asyncio
+
+from core import jobs, shared
+
+
+def _recording(monkeypatch):
+    saved = []
+
+    async def save_job(snapshot):
+        saved.append(snapshot)
+    monkeypatch.setattr(shared, "save_job", save_job)
+    return saved
+
+
+def test_snapshots_are_coalesced_and_the_terminal_one_is_prompt(monkeypatch):
+    saved = _recording(monkeypatch)
+    monkeypatch.setattr(jobs, "JOB_SNAPSHOT_SECONDS", 5)
+
+    async def chain(on_event):
+        for n in range(500):
+            on_event({"type": "step_done", "step": n, "time": 0})
+            await asyncio.sleep(0)
+
+    async def run():
+        manager = jobs.JobManager(workers=1)
+        await manager.start()
+        job = manager.submit(chain)
+        # Well inside one snapshot interval
+        await asyncio.wait_for(_until(lambda: saved and saved[-1]["status"] == "done"), 1)
+        await manager.stop()
+        return job
+    job = asyncio.run(run())
+    assert len(saved) <= 3
+    assert saved[-1]["event_count"] == len(job.events) == 502
+
+
+def test_snapshot_carries_only_the_latest_events(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_SNAPSHOT_EVENTS", 3)
+    job = jobs.Job(None, ())
+    for n in range(10):
+        job.emit({"type": "tick", "n": n})
+    snapshot = jobs.JobManager._snapshot(job)
+    assert [e["n"] for e in snapshot["events"]] == [7, 8, 9] and snapshot["event_count"] == 10
+
+
+def test_remote_events_follow_a_sliding_tail(monkeypatch):
+    def snapshot(first, last, status="running"):
+        events = [{"type": "tick", "n": n} for n in range(first, last)]
+        return {"status": status, "events": events, "event_count": last}
+    snapshots = iter([snapshot(0, 3), snapshot(2, 6), snapshot(5, 8, "done")])
+
+    async def load_job(job_id):
+        return next(snapshots)
+    monkeypatch.setattr(shared, "load_job", load_job)
+
+    async def run():
+        return [chunk async for chunk in jobs.sse_remote("job", poll=0)]
+    chunks = asyncio.run(run())
+    assert [int(c.split('"n": ')[1].split("}")[0]) for c in chunks] == list(range(8))
+
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import zipfile
+
+import pytest
+
+from core import logstream
+from core.logstream import spec_from_question
+
+
+@pytest.mark.parametrize("question, field", [
+    ("What is the total download size in the logs?", "bytes"),
+    ("Sum the bytes of all download events in the logs.", "bytes"),
+    ("How many bytes were downloaded in total?", "bytes"),
+    ('What is the total of duration_ms where event is "upload"?', "duration_ms"),
+    ("Compute the sum of the latency for each user.", "latency"),
+    ("What is the total amount of latency?", "latency"),
+    ("Sum the latency of download events.", "latency"),
+    ('Report the sum of "ms" for downloads.', "ms"),
+])
+def test_sum_field(question, field):
+    assert spec_from_question(question).field == field
+
+
+def test_filters_grouping_and_count():
+    spec = spec_from_question('How many events where event is "upload", grouped by user?')
+    assert (spec.op, spec.where, spec.group_by) == ("count", (("event", "upload"),), "user")
+    assert spec_from_question("Sum the bytes of all download events.").where == (("event", "download"),)
+
+
+@pytest.mark.parametrize("question, where", [
+    ("How many requests returned status 404?", (("status", "404"),)),
+    ("Count the number of error events", (("event", "error"),)),
+    ("How many download events are there?", (("event", "download"),)),
+])
+def test_count_questions_filter_on_what_they_name(question, where):
+    spec = spec_from_question(question)
+    assert (spec.op, spec.where) == ("count", where)
+
+
+@pytest.mark.parametrize("question", [
+    "How many lines are in the log?",
+    "How many unique users appear?",
+    "What is the total?",
+])
+def test_no_spec_without_a_trustworthy_filter(question):
+    assert spec_from_question(question) is None
+
+
+def test_download_default_only_for_byte_sums():
+    assert spec_from_question("What is the total download size in the logs?").where == (("event", "download"),)
+    assert spec_from_question("What is the total amount of latency?").where == ()
+
+
+def test_parallel_aggregate_never_forks_the_server(tmp_path, monkeypatch):
+    path = tmp_path / "logs.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        for n in range(3):
+            archive.writestr(f"{n}.jsonl", "".join(json.dumps({"event": "download", "bytes": i}) + "\n" for i in range(10)))
+    monkeypatch.setattr(logstream, "PARALLEL_MIN_BYTES", 0)
+    try:
+        totals = asyncio.run(logstream.aggregate(str(path), spec_from_question("Sum the bytes of download events.")))
+        assert totals == {"": 3 * 45}
+        assert logstream._pool._mp_context.get_start_method() != "fork"
+    finally:
+        logstream.shutdown()
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from core import router, tracing
+from core.registry import Registry, Solver
+
+
+def _solver(name, answer, signals=(), **kwargs):
+    async def handler(question, url):
+        return answer
+    return Solver(name, handler, list(signals), **kwargs)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """The LLM fallback answers "llm" and counts its calls."""
+    calls = []
+
+    async def handler(question, url, index):
+        calls.append(question)
+        return "llm"
+    monkeypatch.setattr(router.fallback, "handler", handler)
+    return calls
+
+
+def test_overlapping_signals_all_count():
+    registry = Registry()
+    registry.register(Solver("files", None, [(r"\b(?:config|echo)\.json\b", 0.4)]))
+    registry.register(Solver("json", None, [(r"\.json\b", 0.1)]))
+    scores = {s.name: c for c, s in registry.score("Read config.json")}
+    assert scores == {"files": 0.4, "json": 0.1}
+
+
+def test_github_tree_sees_json_inside_config_json():
+    scores = {s.name: c for c, s in router.registry.score("GitHub tree: count config.json files")}
+    assert scores["github_tree"] == pytest.approx(0.8)
+
+
+def test_every_sentinel_returning_solver_declares_it():
+    declared = {s.name: s.failure_values for s in router.registry.solvers}
+    assert "#000000" in declared["image_color"]
+    assert "[]" in declared["csv_normalize"]
+    for name in ("audio", "csv_sum", "logs_zip", "github_tree"):
+        assert "0" in declared[name], name
+
+
+def test_sentinel_falls_back_to_llm(llm):
+    # image_color scores 0.6 on "color" but finds no image and returns "#000000"
+    answer = asyncio.run(router.route_and_solve("What color is the sky?", "https://quiz.example/q1", None, "a@b.c"))
+    assert answer == "llm"
+    assert llm == ["What color is the sky?"]
+
+
+def test_race_ignores_sentinel_answers(llm):
+    field = [(0.6, _solver("first", "#000000", failure_values=("#000000",))), (0.5, _solver("second", "42"))]
+
+    async def race():
+        with tracing.span("route") as sp:
+            return await router._race(field, "q", "https://quiz.example/q1", None, "a@b.c", None, sp)
+    assert asyncio.run(race()) == "42"
+    assert llm == []
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from core import sandbox
+
+isolated = pytest.mark.skipif(
+    asyncio.run(sandbox.unavailable()) is not None, reason="no namespace isolation on this host"
+)
+
+
+@pytest.fixture
+def data(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("name,value\nx,1\ny,2\n")
+    return str(path)
+
+
+def _run(code, path, kind="csv", params=(), timeout=sandbox.TIMEOUT):
+    return asyncio.run(sandbox.run(code, "python", path, kind, list(params), timeout))
+
+
+@isolated
+def test_program_reads_the_file(data):
+    code = "import csv\nanswer = sum(int(r[1]) for r in csv.reader(text().splitlines()[1:]) if int(r[1]) > PARAMS[0])"
+    assert _run(code, data, params=[1]) == "2"
+
+
+@isolated
+def test_sql_dump(tmp_path):
+    dump = tmp_path / "db.sql"
+    dump.write_text("CREATE TABLE t (a INT); INSERT INTO t VALUES (1), (2), (5);")
+    answer = asyncio.run(sandbox.run("SELECT SUM(a) FROM t WHERE a > :p0", "sql", str(dump), "sql", [1]))
+    assert answer == "7"
+
+
+@isolated
+@pytest.mark.parametrize("code", [
+    "answer = open('/etc/hostname').read()",
+    "import _socket\ns = _socket.socket()\ns.connect(('1.1.1.1', 80))\nanswer = 'connected'",
+    "import subprocess\nanswer = subprocess.run(['true']).returncode",
+    "import os\nanswer = os.fork()",
+    "import os\nos.execv('/bin/sh', ['sh', '-c', 'true'])\nanswer = 'ran'",
+    "import os\nos.mkdir('x')\nos.chroot('x')\nanswer = 'escaped'",
+    "open(path, 'a').write('x')\nanswer = 'wrote'",
+])
+def test_escapes_are_refused(data, code):
+    with pytest.raises(sandbox.SandboxError):
+        _run(code, data)
+
+
+@isolated
+def test_only_the_data_file_is_visible(data):
+    assert _run("import os\nanswer = sorted(os.listdir('/'))", data) == '["data"]'
+
+
+@isolated
+def test_wall_clock_timeout(data):
+    with pytest.raises(sandbox.SandboxError, match="exceeded"):
+        _run("while True:\n    pass", data, timeout=1)
+
+
+def test_nothing_runs_without_isolation(data, monkeypatch):
+    monkeypatch.setattr(sandbox, "UNSHARE", None)
+    monkeypatch.setattr(sandbox, "_probe", None)
+    with pytest.raises(sandbox.SandboxError, match="No isolation"):
+        _run("answer = 1", data)
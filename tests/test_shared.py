@@ -0,0 +1,39 @@
+import asyncio
+
+from core import shared
+
+
+def test_sqlite_backend_round_trip(tmp_path):
+    backend = shared.SQLiteBackend(str(tmp_path / "shared.sqlite"))
+
+    async def run():
+        await backend.set("k", "v")
+        first = await backend.add("lock", "a", 60), await backend.add("lock", "b", 60)
+        await backend.release("lock", "b")
+        held = await backend.get("lock")
+        await backend.release("lock", "a")
+        value, released = await backend.get("k"), await backend.get("lock")
+        await backend.close()
+        return first, held, value, released
+    assert asyncio.run(run()) == ((True, False), "a", "v", None)
+
+
+def test_lock_cancelled_mid_acquire_is_given_back(tmp_path):
+    backend = shared.SQLiteBackend(str(tmp_path / "shared.sqlite"))
+    previous = shared.set_backend(backend)
+
+    async def acquire():
+        async with shared.lock("k"):
+            await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(acquire())
+        await asyncio.sleep(0)  # the add is now running in a thread
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        async with shared.lock("k", wait=1) as acquired:
+            return acquired
+    try:
+        assert asyncio.run(run()) is True
+    finally:
+        shared.set_backend(previous)
@@ -0,0 +1,102 @@
+import asyncio
+
+from core import startup
+
+
+def _state(monkeypatch, browser):
+    state = startup.Startup()
+    monkeypatch.setattr(state, "_warm_browser", browser)
+
+    async def ok():
+        return None
+    monkeypatch.setattr(state, "_warm_llm", ok)
+    monkeypatch.setattr(state, "_warm_imaging", ok)
+    return state
+
+
+def test_failed_check_is_not_ready_until_it_passes(monkeypatch):
+    attempts = []
+
+    async def browser():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("no display")
+    monkeypatch.setattr(startup, "WARMUP_RETRY_SECONDS", 0.01)
+    state = _state(monkeypatch, browser)
+
+    async def run():
+        task = asyncio.create_task(state._warm())
+        while not state.warm:
+            await asyncio.sleep(0)
+        report = state.report()
+        await task
+        return report
+    first = asyncio.run(run())
+    assert first["ready"] is False and first["failed"] == ["browser"]
+    assert state.ready and state.report()["failed"] == [] and len(attempts) == 2
+
+
+def test_missing_browser_is_not_ready(monkeypatch):
+    async def browser():
+        return "missing"
+    monkeypatch.setattr(startup, "WARMUP_RETRY_SECONDS", 3600)
+    state = _state(monkeypatch, browser)
+
+    async def run():
+        task = asyncio.create_task(state._warm())
+        while not state.warm:
+            await asyncio.sleep(0)
+        task.cancel()
+        return state.report()
+    report = asyncio.run(run())
+    assert report["ready"] is False and report["warm_ms"] is not None
+
+
+def test_failed_install_is_not_spawned_again(monkeypatch):
+    installs, cycles = [], []
+
+    async def install_browser():
+        installs.append(1)
+        return False
+
+    def browser_installed():
+        cycles.append(1)
+        return False
+    monkeypatch.setattr(startup, "install_browser", install_browser)
+    monkeypatch.setattr(startup, "browser_installed", browser_installed)
+    monkeypatch.setattr(startup, "BROWSER_AUTO_INSTALL", True)
+    monkeypatch.setattr(startup, "WARMUP_RETRY_SECONDS", 0.001)
+    state = startup.Startup()
+
+    async def ok():
+        return None
+    monkeypatch.setattr(state, "_warm_llm", ok)
+    monkeypatch.setattr(state, "_warm_imaging", ok)
+
+    async def run():
+        task = asyncio.create_task(state._warm())
+        while len(cycles) < 4:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(run())
+    assert len(installs) == 1 and state.failed == ["browser"]
+
+
+def test_retries_back_off(monkeypatch):
+    delays = []
+    sleep = asyncio.sleep
+
+    async def record(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    async def browser():
+        if len(delays) < 5:
+            return "missing"
+    monkeypatch.setattr(startup, "WARMUP_RETRY_SECONDS", 1)
+    monkeypatch.setattr(startup, "WARMUP_RETRY_MAX_SECONDS", 4)
+    monkeypatch.setattr(startup.asyncio, "sleep", record)
+    state = _state(monkeypatch, browser)
+    asyncio.run(state._warm())
+    assert delays == [1, 2, 4, 4, 4] and state.ready
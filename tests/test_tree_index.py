@@ -0,0 +1,117 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from core import assets, http_client, shared, tree_index
+from core.tree_index import TreeIndex
+
+SHA = "a" * 40
+
+
+def _tree(n=500, seed=1):
+    rng = random.Random(seed)
+    dirs = ["", "docs/", "docs2/", "docs/api/", "src/", "src/core/", "dö/"]
+    exts = [".md", ".py", ".json", ".tar.gz", "", ".MD"]
+    entries = {f"{rng.choice(dirs)}f{i}{rng.choice(exts)}": rng.randrange(1000) for i in range(n)}
+    items = [{"path": p, "type": "blob", "size": s} for p, s in entries.items()]
+    items += [{"path": d.rstrip("/"), "type": "tree"} for d in dirs if d]
+    return items
+
+
+@pytest.mark.parametrize("prefix", ["", "docs", "docs/", "docs/api/", "src/", "dö/", "zzz"])
+@pytest.mark.parametrize("ext", ["", ".md", ".json", ".gz", ".tar.gz", "s/api"])
+def test_queries_match_brute_force(prefix, ext):
+    entries = _tree()
+    index = TreeIndex.from_entries(entries)
+    expected = sorted(e["path"] for e in entries if e["path"].startswith(prefix) and e["path"].endswith(ext))
+    assert index.list(prefix, ext) == expected
+    assert index.count(prefix, ext) == len(expected)
+    blobs = [e for e in entries if e["type"] == "blob" and e["path"].startswith(prefix) and e["path"].endswith(ext)]
+    assert index.size(prefix, ext) == sum(e["size"] for e in blobs)
+    assert index.count(prefix, ext, kind="blob") == len(blobs)
+
+
+def test_dump_and_load_round_trip(tmp_path):
+    index = TreeIndex.from_entries(_tree())
+    index.dump(str(tmp_path / "t" / "tree.json.gz"))
+    again = TreeIndex.load(str(tmp_path / "t" / "tree.json.gz"))
+    assert (again.paths, again.types, again.sizes) == (index.paths, index.types, index.sizes)
+    assert again.extension_counts("docs/") == index.extension_counts("docs/")
+
+
+class _CountingSource(tree_index.Source):
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def entries(self, owner, repo, sha):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return _tree(50)
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "cache", assets.AssetCache(str(tmp_path / "assets")))
+    previous = shared.set_backend(shared.SQLiteBackend(str(tmp_path / "shared.sqlite")))
+    monkeypatch.setattr(tree_index, "_memory", tree_index.OrderedDict())
+    yield
+    shared.set_backend(previous)
+
+
+def test_load_builds_once_per_sha(caches):
+    source = _CountingSource()
+
+    async def run():
+        first = await asyncio.gather(*(tree_index.load("o", "r", SHA, source) for _ in range(5)))
+        tree_index._memory.clear()
+        from_disk = await tree_index.load("o", "r", SHA, source)
+        return first, from_disk
+    first, from_disk = asyncio.run(run())
+    assert source.calls == 1
+    assert all(i is first[0] for i in first)
+    assert from_disk.paths == first[0].paths
+
+
+def test_refs_are_never_cached(caches):
+    source = _CountingSource()
+
+    async def run():
+        await tree_index.load("o", "r", "main", source)
+        await tree_index.load("o", "r", "main", source)
+    asyncio.run(run())
+    assert source.calls == 2
+
+
+def test_github_source_completes_truncated_listings(monkeypatch):
+    sub = "b" * 40
+    listings = {
+        f"{SHA}?recursive=1": {"truncated": True, "tree": []},
+        SHA: {"tree": [{"path": "a.md", "type": "blob"}, {"path": "sub", "type": "tree", "sha": sub}]},
+        f"{sub}?recursive=1": {"tree": [{"path": "b.md", "type": "blob"}, {"path": "deep/c.md", "type": "blob"}]},
+    }
+
+    async def fetch_json(url):
+        return listings[url.rsplit("/", 1)[-1]]
+    monkeypatch.setattr(assets, "fetch_json", fetch_json)
+    entries = asyncio.run(tree_index.GitHubSource(api="https://api.test").entries("o", "r", SHA))
+    assert sorted(e["path"] for e in entries) == ["a.md", "sub", "sub/b.md", "sub/deep/c.md"]
+
+
+def test_github_source_lists_a_ref_every_time(caches):
+    served = []
+
+    def respond(request):
+        served.append(request.url.path)
+        return httpx.Response(200, json={"tree": [{"path": f"v{len(served)}.md", "type": "blob"}]})
+
+    async def run():
+        source = tree_index.GitHubSource(api="https://api.test")
+        return [await tree_index.load("o", "r", "main", source) for _ in range(2)]
+    with http_client.override(transport=httpx.MockTransport(respond)):
+        first, second = asyncio.run(run())
+    assert served == ["/repos/o/r/git/trees/main"] * 2
+    assert (first.paths, second.paths) == (["v1.md"], ["v2.md"])